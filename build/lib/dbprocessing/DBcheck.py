@@ -0,0 +1,175 @@
+"""Database consistency checks.
+
+Each check is a single set-based query which returns one row per
+violation, so the database does the work rather than Python loops over
+every file. Checks are registered by name in :data:`checks`; use
+:func:`runCheck` on an open database, or :func:`runChecks` to run
+several at once, each on its own read-only connection.
+"""
+
+from __future__ import division
+
+import collections
+import concurrent.futures
+
+import sqlalchemy
+import sqlalchemy.orm
+from sqlalchemy import and_, func, or_
+
+from . import DButils
+
+
+checks = collections.OrderedDict()
+"""Registered checks, keyed by name. Each value is a function which takes
+a :class:`~dbprocessing.DButils.DButils` and returns a query; its
+docstring describes the violation found."""
+
+
+def _register(name):
+    """Decorator to register a check function under a name"""
+    def decorator(function):
+        checks[name] = function
+        return function
+    return decorator
+
+
+@_register('no_instrument_link')
+def noInstrumentLink(dbu):
+    """Products which do not have an instrument"""
+    return dbu.session.query(dbu.Product.product_id,
+                             dbu.Product.product_name)\
+        .filter(~dbu.session.query(dbu.Instrumentproductlink)
+                .filter(dbu.Instrumentproductlink.product_id
+                        == dbu.Product.product_id).exists())\
+        .order_by(dbu.Product.product_id)
+
+
+@_register('multiple_instrument_links')
+def multipleInstrumentLinks(dbu):
+    """Products which have more than one instrument"""
+    ipl = dbu.Instrumentproductlink
+    return dbu.session.query(ipl.product_id,
+                             func.count(ipl.instrument_id).label('count'))\
+        .group_by(ipl.product_id)\
+        .having(func.count(ipl.instrument_id) > 1)\
+        .order_by(ipl.product_id)
+
+
+@_register('duplicate_version')
+def duplicateVersion(dbu):
+    """Product and date with more than one file of the same version"""
+    f = dbu.File
+    cols = (f.product_id, f.utc_file_date, f.interface_version,
+            f.quality_version, f.revision_version)
+    return dbu.session.query(*(cols + (func.count(f.file_id).label('count'),)))\
+        .group_by(*cols)\
+        .having(func.count(f.file_id) > 1)\
+        .order_by(*cols)
+
+
+@_register('parents_not_newest')
+def parentsNotNewest(dbu):
+    """Files which are newest version, but have an input which is not"""
+    link = dbu.Filefilelink
+    result = sqlalchemy.orm.aliased(dbu.File)
+    source = sqlalchemy.orm.aliased(dbu.File)
+    return dbu.session.query(link.resulting_file, link.source_file)\
+        .join(result, result.file_id == link.resulting_file)\
+        .join(source, source.file_id == link.source_file)\
+        .filter(~dbu._newerExists(result), dbu._newerExists(source))\
+        .order_by(link.resulting_file, link.source_file)
+
+
+@_register('version_too_large')
+def versionTooLarge(dbu):
+    """Files with a version component of 1000 or greater"""
+    f = dbu.File
+    return dbu.session.query(f.file_id, f.filename, f.interface_version,
+                             f.quality_version, f.revision_version)\
+        .filter(or_(f.interface_version >= 1000, f.quality_version >= 1000,
+                    f.revision_version >= 1000))\
+        .order_by(f.file_id)
+
+
+@_register('suspicious_duration')
+def suspiciousDuration(dbu):
+    """Newest version files not covering about a day, week, month, or year"""
+    f = dbu.File
+    if dbu.engine.dialect.name == 'postgresql':
+        days = func.extract('epoch', f.utc_stop_time - f.utc_start_time) \
+            / 86400.
+    else:
+        days = func.julianday(f.utc_stop_time) \
+            - func.julianday(f.utc_start_time)
+    days = days.label('days')
+    return dbu.session.query(f.file_id, f.filename, days)\
+        .filter(~dbu._newerExists(f))\
+        .filter(or_(days < 1 / 24,  # Under an hour
+                    and_(days > 2, days < 6),  # Between day and week
+                    and_(days > 8, days < 27),  # Between week and month
+                    and_(days > 35, days < 364),  # Between month and year
+                    days > 368))\
+        .order_by(f.file_id)
+
+
+def runCheck(dbu, name):
+    """Run one consistency check
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database to check.
+    name : :class:`str`
+        Name of the check, a key of :data:`checks`.
+
+    Returns
+    -------
+    :class:`list` of :class:`dict`
+        One entry per violation, keyed by column name.
+    """
+    return [row._asdict() for row in checks[name](dbu)]
+
+
+def _runCheckOwnConnection(mission, name):
+    """Run one consistency check on a new read-only connection"""
+    dbu = DButils.DButils(mission, readonly=True)
+    try:
+        return runCheck(dbu, name)
+    finally:
+        dbu.closeDB()
+
+
+def runChecks(mission, names=None, connections=1):
+    """Run several consistency checks concurrently
+
+    Each check is run on its own read-only connection to the database.
+
+    Parameters
+    ----------
+    mission : :class:`str`
+        Mission database, as for :class:`~dbprocessing.DButils.DButils`.
+    names : :class:`list` of :class:`str`, optional
+        Names of checks to run (default all, in order of :data:`checks`).
+    connections : :class:`int`, default 1
+        Number of checks to run at once.
+
+    Returns
+    -------
+    :class:`~collections.OrderedDict`
+        Violations (as from :func:`runCheck`) keyed by check name, in
+        the order of ``names``.
+
+    Raises
+    ------
+    KeyError
+        If any name is not a registered check.
+    """
+    names = list(checks) if names is None else list(names)
+    for name in names:
+        if name not in checks:
+            raise KeyError('Unknown check {0}'.format(name))
+    with concurrent.futures.ThreadPoolExecutor(connections) as executor:
+        futures = [executor.submit(_runCheckOwnConnection, mission, name)
+                   for name in names]
+        return collections.OrderedDict(
+            (name, fut.result()) for name, fut in zip(names, futures))
@@ -0,0 +1,174 @@
+"""Opt-in profiling of the SQL issued by :class:`~dbprocessing.DButils.DButils`.
+
+Counts calls, SQL statements, rows and time for each public method of a
+:class:`~dbprocessing.DButils.DButils` instance, to find methods which
+issue many small statements (e.g. once per file) in a processing pass.
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import functools
+import inspect
+import json
+import time
+
+import sqlalchemy.event
+
+
+class DBProfiler(object):
+    """Aggregate SQL statistics per :class:`~dbprocessing.DButils.DButils` method
+
+    Hooks the ``before_cursor_execute`` and ``after_cursor_execute``
+    events of the database engine and wraps every public method of one
+    :class:`~dbprocessing.DButils.DButils` instance. Each statement is
+    charged to the innermost wrapped method running at the time (or to
+    ``<other>`` if none is, e.g. a direct ``session.query``); wall time
+    of a method includes any methods it calls.
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection to profile.
+
+    Examples
+    --------
+    >>> prof = DBProfiler(dbu)
+    >>> prof.start()
+    >>> dbu.getFiles(product=1)
+    >>> prof.stop()
+    >>> print(prof.report())
+
+    Notes
+    -----
+    Rows are as reported by the database driver, which for most drivers
+    is only meaningful for ``INSERT``/``UPDATE``/``DELETE``; statements
+    without a row count do not add to the total. Methods which return a
+    generator are only timed until the generator is returned; statements
+    issued while it is consumed are charged to the consumer.
+    """
+    OTHER = '<other>'
+    """Key for statements issued outside any profiled method."""
+
+    def __init__(self, dbu):
+        self.dbu = dbu
+        self.stats = {}
+        """Statistics, keyed by method name. Each value is a :class:`dict`
+        with keys ``calls``, ``statements``, ``rows``, ``time`` (wall
+        time in the method, seconds) and ``sql_time`` (time executing
+        statements charged to this method, seconds)."""
+        self._stack = []
+        self._started = []
+        self._wrapped = []
+        self.running = False
+
+    def _entry(self, name):
+        """Get the statistics entry for a method, creating if needed"""
+        if name not in self.stats:
+            self.stats[name] = {'calls': 0, 'statements': 0, 'rows': 0,
+                                'time': 0., 'sql_time': 0.}
+        return self.stats[name]
+
+    def _before(self, conn, cursor, statement, parameters, context,
+                executemany):
+        """Engine hook, before executing statement"""
+        self._started.append(time.time())
+
+    def _after(self, conn, cursor, statement, parameters, context,
+               executemany):
+        """Engine hook, after executing statement"""
+        elapsed = time.time() - self._started.pop() if self._started else 0.
+        entry = self._entry(self._stack[-1] if self._stack else self.OTHER)
+        entry['statements'] += 1
+        entry['sql_time'] += elapsed
+        rows = getattr(cursor, 'rowcount', -1)
+        if rows is not None and rows > 0:
+            entry['rows'] += rows
+
+    def _wrap(self, name, method):
+        """Make a wrapper for method that records calls and time"""
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            entry = self._entry(name)
+            entry['calls'] += 1
+            self._stack.append(name)
+            t0 = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                entry['time'] += time.time() - t0
+                self._stack.pop()
+        return wrapper
+
+    def start(self):
+        """Start collecting statistics
+
+        Statistics accumulate across multiple start/stop; use
+        :meth:`reset` to clear.
+        """
+        if self.running:
+            return
+        sqlalchemy.event.listen(self.dbu.engine, 'before_cursor_execute',
+                                self._before)
+        sqlalchemy.event.listen(self.dbu.engine, 'after_cursor_execute',
+                                self._after)
+        for name, method in inspect.getmembers(type(self.dbu),
+                                               inspect.isfunction):
+            if name.startswith('_'):
+                continue
+            setattr(self.dbu, name,
+                    self._wrap(name, getattr(self.dbu, name)))
+            self._wrapped.append(name)
+        self.running = True
+
+    def stop(self):
+        """Stop collecting statistics, restoring the original methods"""
+        if not self.running:
+            return
+        sqlalchemy.event.remove(self.dbu.engine, 'before_cursor_execute',
+                                self._before)
+        sqlalchemy.event.remove(self.dbu.engine, 'after_cursor_execute',
+                                self._after)
+        for name in self._wrapped:
+            delattr(self.dbu, name)
+        self._wrapped = []
+        self._stack = []
+        self._started = []
+        self.running = False
+
+    def reset(self):
+        """Clear all collected statistics"""
+        self.stats = {}
+
+    def report(self, fmt='table'):
+        """Format the collected statistics
+
+        Parameters
+        ----------
+        fmt : :class:`str`, default 'table'
+            ``table`` for a human-readable table, sorted by number of
+            statements (most first); ``json`` for a JSON object keyed by
+            method name (values as in :data:`stats`).
+
+        Returns
+        -------
+        :class:`str`
+            Formatted statistics.
+        """
+        if fmt == 'json':
+            return json.dumps(self.stats, indent=2, sort_keys=True)
+        if fmt != 'table':
+            raise ValueError('Unknown report format {0}'.format(fmt))
+        order = sorted(self.stats,
+                       key=lambda k: (-self.stats[k]['statements'], k))
+        width = max([len(k) for k in order] + [len('method')])
+        fmtstr = '{0:<' + str(width) + '} {1:>8} {2:>10} {3:>10} {4:>10}' \
+                 ' {5:>10}'
+        lines = [fmtstr.format('method', 'calls', 'statements', 'rows',
+                               'time', 'sql_time')]
+        for k in order:
+            s = self.stats[k]
+            lines.append(fmtstr.format(
+                k, s['calls'], s['statements'], s['rows'],
+                '{0:.3f}'.format(s['time']), '{0:.3f}'.format(s['sql_time'])))
+        return '\n'.join(lines)
@@ -0,0 +1,278 @@
+"""Handling of version numbers for codes and files, including comparisons."""
+
+from __future__ import division
+from __future__ import print_function
+
+from functools import total_ordering
+
+
+class VersionError(Exception):
+    """Error class for Version
+
+    Calls out that an invalid version has been specified"""
+    pass
+
+
+_QUALITY_SHIFT = 2 ** 16
+"""Multiplier of quality version in packed key"""
+_INTERFACE_SHIFT = 2 ** 32
+"""Multiplier of interface version in packed key"""
+
+
+def packKey(interface_version, quality_version, revision_version):
+    """
+    Pack version numbers into a single integer which sorts as the version
+
+    The key is ``interface << 32 | quality << 16 | revision``, computed
+    with arithmetic so that the inputs may be :class:`int`, NumPy integer
+    arrays, or SQL column expressions (e.g. to find ``max()`` of versions
+    in the database). Only valid if the quality and revision versions are
+    in the range 0 to 65535.
+
+    Parameters
+    ----------
+    interface_version
+        The interface version(s)
+    quality_version
+        The quality version(s)
+    revision_version
+        The revision version(s)
+
+    Returns
+    -------
+    various
+        Packed key, of the same type as the inputs.
+
+    See Also
+    --------
+    Version.key, Version.fromKey
+    """
+    return interface_version * _INTERFACE_SHIFT \
+        + quality_version * _QUALITY_SHIFT + revision_version
+
+
+@total_ordering
+class Version(object):
+    """
+    A version class to simplify pushing around version information
+
+    Handles Boolean operators (>, <, =, !=) and database interface for
+    version is also implemented in another module.
+
+    The version scheme is X,Y,Z where:
+        * X is the interface version, incremented only when the interface
+          to a file or code changes
+        * Y is the quality version, incremented when a change is made to a
+          file that affects quality
+        * Z is the revision version, incremented when a revision has been
+          done to a code or file, as minor as fixing a typo
+
+    See Also
+    --------
+    :ref:`concepts_versions`
+
+    Notes
+    -----
+    The interface version starts at 1.
+
+    Examples
+    --------
+
+    >>> import Version
+    >>> v = Version.Version(1,1,1)
+    >>> print(v)
+    1.1.1
+
+    Version objects can perform Boolean operations
+
+    >>> v2 = Version.Version(1,2,1)
+    >>> print(v2 > v)
+    True
+
+    Increment the version
+
+    >>> v.incQuality()
+    >>> print(v)
+    1.2.1
+
+    Same version is equal
+
+    >>> v == v2
+    True
+
+    Versions are hashable (by value) and can be packed into a single
+    integer which sorts in the same order
+
+    >>> Version.Version.fromKey(v.key) == v
+    True
+
+    .. warning::
+       The hash depends on the version numbers, but :meth:`incInterface`,
+       :meth:`incQuality` and :meth:`incRevision` change them in place.
+       **Never** increment a Version that is in a :class:`set` or used
+       as a :class:`dict` key; the container will silently stop finding
+       it. Copy it first, e.g. ``Version.Version.fromKey(v.key)``, and
+       increment the copy.
+    """
+    __slots__ = ('interface', 'quality', 'revision')
+
+    def __init__(self, interface_version, quality_version, revision_version):
+        """
+        Sets the class attributes
+
+        Parameters
+        ----------
+        interface_version : int
+            The interface version for the object
+        quality_version : int
+            The quality version for the object
+        revision_version : int
+            The revision version for the object
+        """
+        self.interface = int(interface_version)
+        """The interface version for the object"""
+        self.quality = int(quality_version)
+        """The quality version for the object"""
+        self.revision = int(revision_version)
+        """The revision version for the object"""
+        self._checkVersion()
+
+    @staticmethod
+    def fromString(inval):
+        """
+        Given a string of the form x.y.z return a Version object
+
+        Parameters
+        ----------
+        inval : :class:`str`
+            Version in the form xx.yy.zz
+
+        Returns
+        -------
+        :class:`Version`
+            Version instance created from the string
+        """
+        return Version(*inval.split('.'))
+
+    @staticmethod
+    def fromKey(key):
+        """
+        Given a packed integer key return a Version object
+
+        Parameters
+        ----------
+        key : :class:`int`
+            Key, as from :data:`key` or :func:`packKey`
+
+        Returns
+        -------
+        :class:`Version`
+            Version instance created from the key
+        """
+        key = int(key)
+        return Version(key // _INTERFACE_SHIFT,
+                       key % _INTERFACE_SHIFT // _QUALITY_SHIFT,
+                       key % _QUALITY_SHIFT)
+
+    @property
+    def key(self):
+        """
+        Single integer which sorts in the same order as the version
+
+        See :func:`packKey`.
+
+        Raises
+        ------
+        VersionError
+            If the quality or revision version cannot be packed.
+        """
+        if not (0 <= self.quality < _QUALITY_SHIFT
+                and 0 <= self.revision < _QUALITY_SHIFT):
+            raise VersionError("Cannot pack version {0}".format(self))
+        return packKey(self.interface, self.quality, self.revision)
+
+    def _checkVersion(self):
+        """
+        Check a version to make sure it is valid, works on current object
+        """
+        if self.interface == 0:
+            raise VersionError("interface_version starts at 1")
+
+    def __repr__(self):
+        return 'Version: ' + self.__str__()
+
+    def __str__(self):
+        return str(self.interface) + '.' + str(self.quality) + '.' + \
+               str(self.revision)
+
+    def __format__(self, *args, **kwargs):
+        """Explicitly format as string"""
+        return format(str(self), *args, **kwargs)
+
+    def incInterface(self):
+        """
+        Increment the interface version and reset the other two
+
+        Changes this object in place, and thus its hash; see the
+        warning in :class:`Version`.
+        """
+        self.interface += 1
+        self.quality = 0
+        self.revision = 0
+        self._checkVersion()
+
+    def incQuality(self):
+        """
+        Increment the quality version and reset the revision
+
+        Changes this object in place, and thus its hash; see the
+        warning in :class:`Version`.
+        """
+        self.quality += 1
+        self.revision = 0
+        self._checkVersion()
+
+    def incRevision(self):
+        """
+        Increment the revision version
+
+        Changes this object in place, and thus its hash; see the
+        warning in :class:`Version`.
+        """
+        self.revision += 1
+        self._checkVersion()
+
+    def __eq__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+        return ((self.interface, self.quality, self.revision) == \
+                (other.interface, other.quality, other.revision))
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __lt__(self, other):
+        if not isinstance(other, Version):
+            return NotImplemented
+        return ((self.interface, self.quality, self.revision) < \
+                (other.interface, other.quality, other.revision))
+
+    def __hash__(self):
+        # Hash by value; a Version used as a dict key must not be changed
+        return hash((self.interface, self.quality, self.revision))
+
+    def __sub__(self, other):
+        """
+        Subtract works on each version number
+
+        Parameters
+        ----------
+        other : :class:`Version`
+            The other Version object
+
+        Returns
+        -------
+        :class:`list`
+            Three-element difference of each version number
+        """
+        return [self.interface - other.interface, self.quality - other.quality, self.revision - other.revision]
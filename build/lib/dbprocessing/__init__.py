@@ -0,0 +1,34 @@
+"""dbprocessing main module.
+
+All dbprocessing functionality is in submodules of this module.
+
+.. rubric:: Modules
+
+.. autosummary::
+
+   DBfile
+   DBlogging
+   dbprocessing
+   DBqueue
+   DBstrings
+   DButils
+   Diskfile
+   inspector
+   module
+   reports
+   runMe
+   tables
+   Utils
+   Version
+"""
+
+from __future__ import print_function
+
+
+__all__ = ['DBfile', 'DBlogging', 'dbprocessing',
+           'DBqueue', 'DBstrings', 'DButils',
+           'Diskfile', 'inspector', 'module',
+           'reports', 'runMe', 'tables',
+           'Utils', 'Version']
+
+__version__ = '0.1.1rc0'
@@ -0,0 +1,527 @@
+#!/usr/bin/env python
+"""
+Support for making reports from dbprocessing logs.
+
+things included are:
+    - number and list of files ingested
+    - number and list of files requested for ingestion that failed
+    - number and list of other products created
+    - list of commands run
+
+TODO include later
+    - any errors or anomalies reported (TODO not done)
+
+"""
+from __future__ import print_function
+
+
+
+import gzip
+import os
+import re
+
+import dateutil.parser as dup
+
+from dbprocessing import DButils
+
+
+_TIMESTAMP = re.compile(r'(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d)')
+"""Timestamp at the start of a log line"""
+_LEVEL = re.compile(r'\s-\s(ERROR|INFO|DEBUG)\s-\s')
+"""Level of a log line"""
+_INGESTED = re.compile(
+    r'\s-\sINFO\s-\sFile\s.*\sentered\sin\sDB.*f\_id=\d*$')
+"""INFO line for an ingested file"""
+_MOVEDTOERROR = re.compile(r'INFO\s-\smoveToError')
+"""INFO line for a file moved to error"""
+_COMMANDRUN = re.compile(r'^.*\sINFO\s\-\srunning command\:\s.*$')
+"""INFO line for a command run"""
+
+
+def _lineTime(line):
+    """Timestamp of a log line
+
+    Parameters
+    ----------
+    line : :class:`str`
+        Line from log file
+
+    Returns
+    -------
+    :class:`str`
+        Timestamp as YYYY-MM-DD HH:MM:SS, or None if the line does not
+        start with a timestamp (e.g. continuation of a multiline entry).
+    """
+    m = _TIMESTAMP.match(line)
+    return m.group(1).replace('T', ' ') if m else None
+
+
+class logfile(object):
+    """
+    class to hold a datafile
+
+    The log is read in one pass, one line at a time, classifying each line
+    once. It may be plain text or gzip compressed. If a time range is
+    given, uncompressed logs are searched for the start of the range by
+    bisection, and reading stops at the end of the range.
+    """
+    def __init__(self, filename, timerange=None, keep_lines=True):
+        """
+        read in the file and collect what we need
+
+        Parameters
+        ----------
+        filename : :class:`str`
+           Log file to read
+        timerange : :class:`~collections.abc.Sequence`, optional
+            Start and end time of log timestamps to process, default all.
+            (:class:`~datetime.datetime`)
+        keep_lines : :class:`bool`, default True
+            Keep all ERROR, INFO, and DEBUG lines in :data:`error`,
+            :data:`info`, :data:`debug`. If False, these are empty, and
+            memory use is only that of the report entries (e.g.
+            :data:`ingested`, :data:`errors`); use :data:`counts` for the
+            number of lines of each level.
+        """
+        if not os.path.isfile(filename):
+            raise(ValueError('filename does not exist'))
+        #setup the instance vars so they always exist
+        self.error = []
+        self.info = []
+        self.debug = []
+        self.ingested = []
+        self.movedToError = []
+        self.commandsRun = []
+        self.errors = []
+        """All lines in the log with errors (:class:`list` of :class:`str`)"""
+        self.counts = {'ERROR': 0, 'INFO': 0, 'DEBUG': 0}
+        """Number of lines of each level (:class:`dict` of :class:`int`)"""
+        self.timerange = None
+
+        self.filename = filename
+        with open(self.filename, 'rb') as fp:
+            self._gzipped = fp.read(2) == b'\x1f\x8b'
+        if timerange is not None:
+            self.setTimerange(timerange)
+        self.filerange = self._firstLastDate()
+        self._parse(keep_lines)
+
+    def setTimerange(self, timerange):
+        """Sets the time range for this report
+
+        Parameters
+        ----------
+        timerange : :class:`~collections.abc.Sequence`, optional
+            Start and end time of log timestamps to process, default all.
+            (:class:`~datetime.datetime`)
+        """
+        if len(timerange) != 2:
+            raise(ValueError('timerange must be a list/tuple of 2 datetime objects'))
+        self.timerange = timerange
+
+    def _open(self):
+        """Open the log file for reading as binary, decompressing if needed"""
+        return gzip.open(self.filename, 'rb') if self._gzipped \
+            else open(self.filename, 'rb')
+
+    def _lines(self, fp):
+        """Iterate over decoded lines from current position of a file"""
+        for line in fp:
+            yield line.decode('utf-8', 'replace')
+
+    def _nextTime(self, fp):
+        """Timestamp of the first line with one, from current position"""
+        for line in self._lines(fp):
+            t = _lineTime(line)
+            if t is not None:
+                return t
+        return None
+
+    def _firstLastDate(self):
+        """Get first and last date within the log file
+
+        Returns
+        -------
+        :class:`tuple` of :class:`~datetime.datetime`
+            First and last timestamp in the log
+        """
+        with self._open() as fp:
+            first = self._nextTime(fp)
+            if self._gzipped:
+                # Cannot seek back from the end, so stream it all
+                last = first
+                for line in self._lines(fp):
+                    last = _lineTime(line) or last
+            else:
+                # Back up from the end until a timestamped line is found
+                size = fp.seek(0, os.SEEK_END)
+                last = None
+                step = 4096
+                pos = size
+                while last is None and pos > 0:
+                    pos = max(pos - step, 0)
+                    fp.seek(pos)
+                    if pos:
+                        fp.readline()  # partial line
+                    for line in self._lines(fp):
+                        last = _lineTime(line) or last
+                    step *= 2
+        return tuple(None if t is None else dup.parse(t)
+                     for t in (first, last))
+
+    def _seekStart(self, fp, start):
+        """Move to a point in an uncompressed log before a time
+
+        Bisects on file position to find a position where all lines
+        after have timestamps at or after ``start``, except possibly
+        for the first full line.
+        """
+        lo, hi = 0, fp.seek(0, os.SEEK_END)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            fp.seek(mid)
+            fp.readline()  # partial line
+            t = self._nextTime(fp)
+            if t is None or t >= start:
+                hi = mid
+            else:
+                lo = mid + 1
+        fp.seek(lo)
+        if lo:
+            fp.readline()  # line at lo is before start
+
+    def _parse(self, keep_lines=True):
+        """Read the log and find all report entries
+
+        Parameters
+        ----------
+        keep_lines : :class:`bool`, default True
+            Keep all lines of each level (see :class:`logfile`).
+        """
+        start = end = None
+        if self.timerange is not None:
+            start, end = (t.strftime('%Y-%m-%d %H:%M:%S')
+                          for t in self.timerange)
+        commands = {}  # First command run for each command name
+        keep = {'ERROR': self.error, 'INFO': self.info, 'DEBUG': self.debug}
+        with self._open() as fp:
+            if start is not None and not self._gzipped:
+                self._seekStart(fp, start)
+            inrange = start is None
+            for line in self._lines(fp):
+                t = _lineTime(line)
+                if t is not None:
+                    if end is not None and t > end:
+                        if not self._gzipped:
+                            break  # Everything after is out of range
+                        inrange = False
+                        continue
+                    inrange = start is None or t >= start
+                if not inrange:
+                    continue
+                m = _LEVEL.search(line)
+                if not m:
+                    continue
+                level = m.group(1)
+                self.counts[level] += 1
+                if keep_lines:
+                    keep[level].append(line)
+                if level == 'ERROR':
+                    self.errors.append(errors(line))
+                elif level == 'INFO':
+                    if _INGESTED.search(line):
+                        self.ingested.append(ingested(line))
+                    if _MOVEDTOERROR.search(line):
+                        self.movedToError.append(movedToError(line))
+                    if _COMMANDRUN.match(line):
+                        c = commandsRun(line)
+                        commands.setdefault(c.filename, c)
+        self.commandsRun = [commands[k] for k in sorted(commands)]
+
+
+class HTMLbase(object):
+    """Support comparisons based on time stored in this object"""
+    
+    def __eq__(self, other):
+        try:
+            return self.dt == other.dt
+        except TypeError:
+            return self.dt.strftime('%Y-%m-%d') == other.dt
+
+    def __ne__(self, other):
+        try:
+            return self.dt != other.dt
+        except TypeError:
+            return self.dt.strftime('%Y-%m-%d') != other.dt
+
+    def __gt__(self, other):
+        try:
+            return self.dt > other.dt
+        except TypeError:
+            return self.dt.strftime('%Y-%m-%d') > other.dt
+
+    def __ge__(self, other):
+        try:
+            return self.dt >= other.dt
+        except TypeError:
+            return self.dt.strftime('%Y-%m-%d') >= other.dt
+
+    def __lt__(self, other):
+        try:
+            return self.dt < other.dt
+        except TypeError:
+            return self.dt.strftime('%Y-%m-%d') < other.dt
+
+    def __le__(self, other):
+        try:
+            return self.dt <= other.dt
+        except TypeError:
+            return self.dt.strftime('%Y-%m-%d') <= other.dt
+
+
+class commandsRun(HTMLbase):
+    """Report on commands that have been run by the chain"""
+
+    def __init__(self, inStr):
+        """
+        pass in the line and parse it grabbing what we need
+
+        Parameters
+        ----------
+        inStr : :class:`str`
+            Line from log file
+        """
+        global dbu
+        self.dt = dup.parse(inStr.split(',')[0])
+        m = re.search( r'^.*\sINFO\s\-\srunning command\:\s(.*)$' , inStr.strip() )
+        self.filename = m.group(1).split()[0]
+        # get the process name
+#        dbu.session.query(dbu.Code).filter_by(filename = os.path.basename(self.filename))
+
+    def htmlheader(self):
+        """
+        return a string html header
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row header
+        """
+        outStr = '<tr>'
+        for attr in ['filename', ]:
+            outStr += '<th>{0}</th>'.format(attr)
+        outStr += '</tr>\n'
+        return outStr
+
+    def html(self, alt=False):
+        """
+        return a html string for this
+
+        Parameters
+        ----------
+        alt : :class:`bool`, default False
+            Alternate line (used to style every other table row differently).
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row for this entry.
+        """
+        if alt:
+            outStr = '<tr class="alt">'
+        else:
+            outStr = '<tr>'
+        for v in ['filename', ]:
+            if v == 'dt':
+                val = self.dt.isoformat()
+            else:
+                val = self.__getattribute__(v)
+            outStr += '<td>{0}</td>'.format(val)
+        outStr += '</tr>'
+        return outStr
+
+
+class ingested(HTMLbase):
+    """Report files that have been ingested in to the chain"""
+
+    def __init__(self, inStr):
+        """
+        pass in the line and parse it grabbing what we need
+
+        Parameters
+        ----------
+        inStr : :class:`str`
+            Line from log file
+        """
+        global dbu
+        self.dt = dup.parse(inStr.split(',')[0])
+        m = re.search( r'\s-\sINFO\s-\sFile\s(.*)\sentered' , inStr.strip())
+        self.filename = m.group(1)
+        m = re.search( r'f\_id=(\d*)' , inStr)
+        self.file_id = m.group(1)
+        try:
+            tb = dbu.getTraceback('File', self.file_id)
+            self.product_name = tb['product'].product_name
+            self.level = tb['file'].data_level
+        except:
+            self.product_name = 'unknown; file not in db'
+            self.level = None
+
+    def htmlheader(self):
+        """
+        return a string html header
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row header
+        """
+        outStr = '<tr>'
+        for attr in ['dt', 'file_id', 'filename', 'product_name', 'level']:
+            outStr += '<th>{0}</th>'.format(attr)
+        outStr += '</tr>\n'
+        return outStr
+
+    def html(self, alt=False):
+        """
+        return a html string for this
+
+        Parameters
+        ----------
+        alt : :class:`bool`, default False
+            Alternate line (used to style every other table row differently).
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row for this entry.
+        """
+        if alt:
+            outStr = '<tr class="alt">'
+        else:
+            outStr = '<tr>'
+        for v in ['dt', 'file_id', 'filename', 'product_name', 'level']:
+            if v == 'dt':
+                val = self.dt.isoformat()
+            else:
+                val = self.__getattribute__(v)
+            outStr += '<td>{0}</td>'.format(val)
+        outStr += '</tr>'
+        return outStr
+
+
+class movedToError(HTMLbase):
+    """Report files that have moved to the dbprocessing error directory"""
+
+    def __init__(self, inStr):
+        """
+        pass in the log line and parse it saving what we want
+
+        Parameters
+        ----------
+        inStr : :class:`str`
+            Line from log file
+        """
+        self.dt = dup.parse(inStr.split(',')[0])
+        self.filename = os.path.basename(inStr.split()[-4]) # this is hopefully always constant
+
+    def htmlheader(self):
+        """
+        return a string html header
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row header
+        """
+        outStr = '<tr>'
+        for attr in ['dt', 'filename', 'movedTo']:
+            outStr += '<th>{0}</th>'.format(attr)
+        outStr += '</tr>\n'
+        return outStr
+
+    def html(self, alt=False):
+        """
+        return a html string for this
+
+        Parameters
+        ----------
+        alt : :class:`bool`, default False
+            Alternate line (used to style every other table row differently).
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row for this entry.
+        """
+        if alt:
+            outStr = '<tr class="alt">'
+        else:
+            outStr = '<tr>'
+        for v in ['dt', 'filename']:
+            if v == 'dt':
+                val = self.dt.isoformat()
+            else:
+                val = self.__getattribute__(v)
+            outStr += '<td>{0}</td>'.format(val)
+        outStr += '</tr>'
+        return outStr
+
+
+class errors(HTMLbase):
+    """Report all ERRORs logged by dbprocessing"""
+    def __init__(self, inStr):
+        """
+        parse the error and collect what we want
+
+        Parameters
+        ----------
+        inStr : :class:`str`
+            Line from log file
+        """
+        self.dt = dup.parse(inStr.split(',')[0])
+        m = re.findall( r'^.*,\d\d\d\s\-\s(.*)\s\-\sERROR\s\-\s(.*)$' , inStr.strip())
+        self.codename = m[0][0]
+        self.errormsg = m[0][1]
+
+    def htmlheader(self):
+        """
+        return a string html header
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row header
+        """
+        outStr = '<tr>'
+        for attr in ['dt', 'Codename', 'Error message']:
+            outStr += '<th>{0}</th>'.format(attr)
+        outStr += '</tr>\n'
+        return outStr
+
+    def html(self, alt=False):
+        """
+        return a html string for this
+
+        Parameters
+        ----------
+        alt : :class:`bool`, default False
+            Alternate line (used to style every other table row differently).
+
+        Returns
+        -------
+        :class:`str`
+            HTML table row for this entry.
+        """
+        if alt:
+            outStr = '<tr class="alt">'
+        else:
+            outStr = '<tr>'
+        for v in ['dt', 'codename', 'errormsg']:
+            if v == 'dt':
+                val = self.dt.isoformat()
+            else:
+                val = self.__getattribute__(v)
+            outStr += '<td>{0}</td>'.format(val)
+        outStr += '</tr>'
+        return outStr
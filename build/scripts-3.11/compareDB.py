@@ -0,0 +1,424 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+"""Compare two databases for similarities in products, files, etc."""
+
+import argparse
+import collections.abc
+import hashlib
+
+import sqlalchemy
+import sqlalchemy.orm
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import BIT
+
+import dbprocessing.DButils
+
+
+def main(mission1, mission2):
+    """Compare contents of two missions
+
+    Will open both missions and check if have same products, processes,
+    codes, and files. Output printed to screen. Comparison is based on
+    names, not IDs.
+
+    Parameters
+    ----------
+    mission1 : str
+        Name of first mission, e.g. database name or path to sqlite database
+    mission2 : str
+        Name of second mission
+    """
+    dbu1, dbu2 = None, None
+    try:
+        dbu1 = dbprocessing.DButils.DButils(mission1, readonly=True)
+        dbu2 = dbprocessing.DButils.DButils(mission2, readonly=True)
+        for t in ('product', 'process', 'code'):
+            res = check_tables(t, dbu1, dbu2)
+            if res:
+                print('\n'.join(res))
+        for line in check_files(dbu1, dbu2):
+            print(line)
+        for line in check_links(dbu1, dbu2):
+            print(line)
+    finally:
+        if dbu1 is not None:
+            dbu1.closeDB()
+        if dbu2 is not None:
+            dbu2.closeDB()
+
+
+def check_tables(table, dbu1, dbu2):
+    """Compare tables present in each database
+
+    Parameters
+    ----------
+    table : {'code', 'file', 'process', 'product'}
+        table name
+    dbu1, dbu2 : dbprocessing.DButils.DButils
+        database utils instances
+
+    Returns
+    -------
+    list
+        Any discrepancies found between databases (empty list if none)
+    """
+    out = []
+    table = table.lower()
+    assert table in ('code', 'file', 'process', 'product')
+    nameattr = '{}_name'.format(table)
+    # Get all records for this table.
+    gettername = 'getAll{}{}s'.format(table.title(),
+                                      'e' if table.endswith('s') else '')
+    if table == 'file':
+        return list(check_files(dbu1, dbu2))
+    entries1 = getattr(dbu1, gettername)()
+    entries2 = getattr(dbu2, gettername)()
+    # E.g. getAllCodes returns dicts, of which only one part is the code record
+    # So recover just that part
+    if entries1 and isinstance(entries1[0], collections.abc.Mapping):
+        entries1 = [e[table] for e in entries1]
+        entries2 = [e[table] for e in entries2]
+    # Codes also have a description not a name, and files have no _
+    for name_suffix in ('_name', '_description', 'name'):
+        nameattr = '{}{}'.format(table, name_suffix)
+        if entries1 and hasattr(entries1[0], nameattr):
+            break
+    # Code description is often not unique, so make something
+    # that might be
+    if table == 'code':
+        entries1 = { '{} {} {}'.format(
+            p.code_description, p.filename, p.arguments): p for p in entries1 }
+        entries2 = { '{} {} {}'.format(
+            p.code_description, p.filename, p.arguments): p for p in entries2 }
+    else:
+        entries1 = { getattr(p, nameattr): p for p in entries1 }
+        entries2 = { getattr(p, nameattr): p for p in entries2 }
+    # Check what's in only one database
+    names1 = set(entries1.keys())
+    names2 = set(entries2.keys())
+    for n in sorted(names1.difference(names2)):
+        out.append('{} {} is in mission1 but not mission2.'.format(
+            table.title(), n))
+    for n in sorted(names2.difference(names1)):
+        out.append('{} {} is in mission2 but not mission1.'.format(
+            table.title(), n))
+    # For every column in the record, compare across databases
+    for n in sorted(names1.intersection(names2)):
+        e1, e2 = entries1[n], entries2[n]
+        for a in list(dir(e1)):
+            if a.startswith('_'):
+                # Skip the non-public
+                continue
+            if a in (nameattr, '{}_id'.format(table)):
+                # Don't compare IDs for this table
+                continue
+            if a in ('verbose_provenance', 'shasum', 'file_create_date'):
+                # Don't compare stuff that's likely to be different
+                continue
+            if a.endswith('_id') or a in ('output_product'):
+                # Reference to another table, compare *names*
+                othertbl = 'product' if a == 'output_product' \
+                           else a.split('_')[0]
+                id1 = getattr(e1, a) #IDs into the other table
+                id2 = getattr(e2, a)
+                # Allow for not having a reference (e.g. no output product)
+                if id1 in (None, ''):
+                    n1 = ''
+                else:
+                    n1 = getattr(dbu1.getEntry(othertbl.title(), id1),
+                                 '{}_name'.format(othertbl))
+                if id2 in (None, ''):
+                    n2 = ''
+                else:
+                    n2 = getattr(dbu2.getEntry(othertbl.title(), id2),
+                                 '{}_name'.format(othertbl))
+                if n1 != n2:
+                    out.append('{} {} {} is {} in mission 1 but {} in mission 2'
+                               .format(table.title(), n, a, n1, n2))
+            elif getattr(e1, a) != getattr(e2, a):
+                # Something else. Compare values
+                out.append(
+                    '{} {} {} is {} in mission 1 but {} in mission2'.format(
+                        table.title(), n, a, getattr(e1, a), getattr(e2, a)))
+    return out
+
+
+def check_links(dbu1, dbu2):
+    """Compare file-file and file-code links across databases
+
+    Links are compared with :func:`diff_rows`, so only files whose
+    links differ are examined in detail. Links of files that are only
+    in one database are not reported (see :func:`check_files`).
+
+    Parameters
+    ----------
+    dbu1, dbu2 : dbprocessing.DButils.DButils
+        database utils instances
+
+    Returns
+    -------
+    generator of str
+        Any discrepancies found between databases
+    """
+    def in_both(f):
+        """Is file f in both databases?"""
+        for dbu in (dbu1, dbu2):
+            try:
+                dbu.getFileID(f)
+            except dbprocessing.DButils.DBNoData:
+                return False
+        return True
+
+    for f, rows1, rows2 in diff_rows(dbu1, dbu2, _input_rows):
+        if not in_both(f):
+            continue
+        # Check for same input files
+        infiles1 = set(r[1] for r in rows1)
+        infiles2 = set(r[1] for r in rows2)
+        for n in sorted(infiles1.difference(infiles2)):
+            yield '{} input file {} is in mission1 but not mission2.'\
+                .format(f, n)
+        for n in sorted(infiles2.difference(infiles1)):
+            yield '{} input file {} is in mission2 but not mission1.'\
+                .format(f, n)
+    # Now check for same input codes
+    for f, incode1, incode2 in diff_rows(dbu1, dbu2, _code_rows):
+        if not in_both(f):
+            continue
+        if len(incode1) != len(incode2):
+            yield '{} has {} codes in mission1 but {} in mission2.'\
+                .format(f, len(incode1), len(incode2))
+            continue
+        if len(incode1) != 1:
+            yield '{} has {} codes, should be 0 or 1.'.format(f, len(incode1))
+            continue
+        for attr, e1, e2 in zip(
+                ('code_description', 'filename', 'relative_path', 'arguments'),
+                incode1[0][1:], incode2[0][1:]):
+            if e1 != e2:
+                yield '{} code has {} {} in mission1 but {} in mission2.'\
+                    .format(f, attr, e1, e2)
+
+
+def check_files(dbu1, dbu2, leafsize=1000):
+    """Compare file records across databases
+
+    Records are matched by filename and compared with :func:`diff_rows`,
+    so if the databases mostly match, only a few aggregate queries are
+    made. Product is compared by name; file ID, provenance, shasum and
+    creation date are not compared.
+
+    Parameters
+    ----------
+    dbu1, dbu2 : dbprocessing.DButils.DButils
+        database utils instances
+    leafsize : int
+        Maximum number of records to compare directly, rather than by
+        digest.
+
+    Returns
+    -------
+    generator of str
+        Any discrepancies found between databases
+    """
+    columns = _file_rows(dbu1)[1]
+    for n, rows1, rows2 in diff_rows(dbu1, dbu2, _file_rows, leafsize):
+        if not rows2:
+            yield 'File {} is in mission1 but not mission2.'.format(n)
+        elif not rows1:
+            yield 'File {} is in mission2 but not mission1.'.format(n)
+        else:
+            for c, v1, v2 in zip(columns[1:], rows1[0][1:], rows2[0][1:]):
+                if v1 == v2:
+                    continue
+                if c.key == 'product_id':
+                    yield 'File {} {} is {} in mission 1 but {} in mission 2'\
+                        .format(n, c.key, v1, v2)
+                else:
+                    yield 'File {} {} is {} in mission 1 but {} in mission2'\
+                        .format(n, c.key, v1, v2)
+
+
+def _file_rows(dbu):
+    """Comparable file records, keyed by filename
+
+    Returns
+    -------
+    tuple
+        Key column, list of columns for each row (key first), table to
+        select from, and list of joins (each a tuple of arguments to
+        :meth:`~sqlalchemy.orm.Query.join`), as used by :func:`diff_rows`.
+    """
+    f, p = dbu.File, dbu.Product
+    columns = [f.filename]
+    for c in dbu.metadata.tables['file'].columns:
+        if c.name in ('file_id', 'filename', 'verbose_provenance', 'shasum',
+                      'file_create_date'):
+            continue
+        # Reference to another table, compare *names*
+        columns.append(p.product_name.label('product_id')
+                       if c.name == 'product_id' else getattr(f, c.name))
+    return f.filename, columns, f, [(p, p.product_id == f.product_id)]
+
+
+def _input_rows(dbu):
+    """Input file names of every file, keyed by filename; see _file_rows"""
+    link = dbu.Filefilelink
+    result = sqlalchemy.orm.aliased(dbu.File)
+    source = sqlalchemy.orm.aliased(dbu.File)
+    return result.filename, [result.filename, source.filename], link, [
+        (result, result.file_id == link.resulting_file),
+        (source, source.file_id == link.source_file)]
+
+
+def _code_rows(dbu):
+    """Code used to make every file, keyed by filename; see _file_rows"""
+    link, c = dbu.Filecodelink, dbu.Code
+    result = sqlalchemy.orm.aliased(dbu.File)
+    return result.filename, [result.filename, c.code_description, c.filename,
+                             c.relative_path, c.arguments], link, [
+        (result, result.file_id == link.resulting_file),
+        (c, c.code_id == link.source_code)]
+
+
+def _digest_part(text, part):
+    """32 bits (part 0 or 1) of the MD5 of text, as an integer
+
+    Registered as a function with sqlite, and matches the postgresql
+    expression made by :func:`_row_digests`.
+    """
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()
+               [8 * part:8 * part + 8], 16)
+
+
+def _row_digests(dbu, columns):
+    """Make expressions for the digest of a row
+
+    The digest of a set of rows is the count and sum of these, which
+    does not depend on row order and can be aggregated by the database.
+
+    Returns
+    -------
+    list
+        Two expressions, each a 32-bit integer digest of ``columns``.
+    """
+    text = sqlalchemy.literal('')
+    for c in columns:
+        text = text + '|' + func.coalesce(
+            sqlalchemy.cast(c, sqlalchemy.String), '\\N')
+    if dbu.engine.dialect.name == 'postgresql':
+        return [sqlalchemy.cast(sqlalchemy.cast(
+            sqlalchemy.literal('x') + func.substr(func.md5(text),
+                                                  8 * part + 1, 8),
+            BIT(32)), sqlalchemy.BigInteger) for part in (0, 1)]
+    # sqlite has no hash function; use ours, defined per connection
+    dbu.session.connection().connection.create_function(
+        'dbp_digest_part', 2, _digest_part)
+    return [func.dbp_digest_part(text, part) for part in (0, 1)]
+
+
+def diff_rows(dbu1, dbu2, rows, leafsize=1000):
+    """Find differences in a set of rows between databases
+
+    The rows are split into chunks by range of a key. Each database
+    computes the count and digest of a chunk in one aggregate query;
+    only chunks which differ are split further (at the median key),
+    and only small chunks are loaded and compared directly. Digests
+    are only compared between databases of the same type; otherwise
+    every chunk is compared directly.
+
+    Parameters
+    ----------
+    dbu1, dbu2 : dbprocessing.DButils.DButils
+        database utils instances
+    rows : callable
+        Takes a DButils and returns key column, list of columns (key
+        first), table, and list of joins, e.g. :func:`_file_rows`.
+    leafsize : int
+        Maximum number of rows to compare directly, rather than by
+        digest.
+
+    Returns
+    -------
+    generator of tuple
+        For every key which differs, in order: the key, and sorted
+        list of rows with that key from each database.
+    """
+    specs = [rows(dbu) for dbu in (dbu1, dbu2)]
+    same_dialect = dbu1.engine.dialect.name == dbu2.engine.dialect.name
+
+    def query(i, entities, lo, hi):
+        """Query on database i for rows with key in [lo, hi)"""
+        dbu = (dbu1, dbu2)[i]
+        key, columns, table, joins = specs[i]
+        q = dbu.session.query(*entities).select_from(table)
+        for j in joins:
+            q = q.join(*j)
+        if lo is not None:
+            q = q.filter(key >= lo)
+        if hi is not None:
+            q = q.filter(key < hi)
+        return q
+
+    def digest(i, lo, hi):
+        """Count and digest of rows on database i with key in [lo, hi)"""
+        parts = _row_digests((dbu1, dbu2)[i], specs[i][1]) \
+            if same_dialect else []
+        return tuple(query(i, [func.count()] + [func.sum(p) for p in parts],
+                           lo, hi).one())
+
+    def load(i, lo, hi):
+        """Rows on database i with key in [lo, hi), by key"""
+        out = collections.defaultdict(list)
+        for r in query(i, specs[i][1], lo, hi):
+            out[r[0]].append(tuple(r))
+        return out
+
+    ranges = [(None, None)]
+    while ranges:
+        lo, hi = ranges.pop()
+        d1, d2 = digest(0, lo, hi), digest(1, lo, hi)
+        if same_dialect and d1 == d2:
+            continue
+        count = max(d1[0], d2[0])
+        if count > leafsize:
+            # Split at median key of the database with more rows
+            i = 0 if d1[0] >= d2[0] else 1
+            mid = query(i, [specs[i][0]], lo, hi).order_by(specs[i][0])\
+                .offset(count // 2).limit(1).scalar()
+            if mid is not None and mid != lo:
+                ranges.extend([(mid, hi), (lo, mid)])  # Low half first
+                continue
+        rows1, rows2 = load(0, lo, hi), load(1, lo, hi)
+        for k in sorted(set(rows1).union(rows2)):
+            r1, r2 = sorted(rows1.get(k, [])), sorted(rows2.get(k, []))
+            if r1 != r2:
+                yield k, r1, r2
+
+
+def parse_args(argv=None):
+    """Parse arguments for this script
+
+    Parameters
+    ----------
+    argv : list
+        Argument list, default from sys.argv
+
+    Returns
+    -------
+    options : argparse.Values
+        Arguments from command line, from flags and non-flag arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", required=True, action='append',
+                        help="Mission databases to compare, specify twice")
+
+    options = parser.parse_args(argv)
+    if len(options.mission) != 2:
+        parser.error('Must specify two missions for comparison.')
+    return options
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    main(options.mission[0], options.mission[1])
@@ -0,0 +1,19 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+from __future__ import print_function
+
+import argparse
+
+from dbprocessing import DButils
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", dest="mission",
+                        help="selected mission database", required=True)
+    options = parser.parse_args()
+
+    a = DButils.DButils(options.mission)
+    f = a.getAllFileIds()
+    n = a._purgeFileFromDB(f, trust_id=True)
+    print('deleted {0} files'.format(n))
+    a.closeDB()
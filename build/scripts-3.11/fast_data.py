@@ -0,0 +1,182 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+import argparse
+import datetime
+import os
+import os.path
+import shutil
+import warnings
+
+import numpy as np
+import spacepy.datamanager
+
+from dbprocessing import DButils, Version
+from dbprocessing.FileGraph import FileGraph
+
+
+def build_graph(dbu):
+    """Loads the file records and their parent-child relationships into a graph
+
+    Arguments:
+        dbu {DButils} -- The DButils instance for the mission
+
+    Returns:
+        FileGraph -- A Graph of file records and their parent-child relationships
+    """
+    return FileGraph(dbu)
+
+
+def filter_graph(graph, cutoff):
+    """Filter files from the graph that we don't want to delete
+
+    All files that are the newest version, or in a release, and any
+    of their inputs should be kept (i.e. removed from consideration
+    for deletion.)
+
+    Also any level0 files that are older than our cutoff (and thus
+    out of the "fast" regime), and their descendents.
+
+    Why not outputs for newest/release? Because one file might be the
+    latest and have multiple outputs for same day/product due to
+    reprocessing, and we only want the latest of those, and it will be
+    retained in its own right. Similarly for the release...just
+    because something was built from a file in the release doesn't
+    mean it needs to be kept.
+
+    Note this will keep inputs to "latest" even if the inputs themselves
+    aren't the latest (i.e. the database is in an inconsistent state).
+    Earlier version of fast_data would not keep those inputs, so this
+    is a little more paranoid.
+
+    Returns:
+        numpy.ndarray -- Boolean mask of graph nodes which are not kept
+                         (i.e. meet the fast data criteria)
+    """
+    keep = graph.reachable(graph.newest | graph.in_release, 'ancestors')
+    old_roots = (graph.in_degree() == 0) \
+        & (graph.utc_file_date <= np.datetime64(cutoff, 'D'))
+    keep |= graph.reachable(old_roots, 'descendants')
+    return ~keep
+
+
+def reap(dbu, graph, participants, dofiles=False, dorecords=False, verbose=False,
+         archive=None):
+    """Reap files and/or records from nodes in a graph
+
+    Arguments:
+        graph: the full graph of file relationships
+        participants: Nodes (boolean mask or node indices) that meet the
+                      fast data criteria (from filter_graph).
+        dofiles: remove files from disc
+        dorecords: remove records from db (only if the files do not exist)
+        verbose: print matching files (ones to delete)
+        archive: directory to copy files to instead of deleting, requires dofiles.
+    """
+    if dofiles and dorecords:
+        #This is in theory possible but for now probably safer not to
+        raise ValueError('Cannot reap files and records in one call')
+    if archive is not None and not dofiles:
+        raise ValueError(
+            'Cannot specify archive directory without reaping files')
+    missiondir = spacepy.datamanager.RePath.path_split(
+        dbu.getMissionDirectory())
+    # Path index of "leading" directory information
+    leading_idx = len(missiondir)
+    if missiondir[-1] == '':
+        leading_idx -= 1
+    participants = np.asarray(participants)
+    if participants.dtype == bool:
+        participants = np.flatnonzero(participants)
+    # Sort by product, date, version (last key is primary)
+    version = graph.version[participants]
+    nodes = participants[np.lexsort((
+        Version.packKey(version[:, 0], version[:, 1], version[:, 2]),
+        graph.utc_file_date[participants], graph.product_id[participants]))]
+    nodes = nodes[:-1][::-1]
+    # Only purge records of files that were already off disk at start
+    purge = nodes[~graph.exists_on_disk[nodes]] if dorecords else nodes[:0]
+    removed = []
+    for node in nodes:
+        if verbose:
+            print(graph.filename[node])
+        if graph.exists_on_disk[node] and dofiles:
+            fullpath = dbu.getFileFullPath(int(graph.file_id[node]))
+            if archive is None:
+                os.remove(fullpath)
+            else:
+                targetdir = os.path.join(
+                    archive, spacepy.datamanager.RePath.path_slice(
+                        fullpath, leading_idx, -1))
+                if not os.path.isdir(targetdir):
+                    os.makedirs(targetdir)
+                shutil.move(fullpath, targetdir)
+            removed.append(node)
+    if removed:
+        dbu._setExistsOnDisk(graph.file_id[removed].tolist(), False,
+                             commit=False)
+        graph.exists_on_disk[removed] = False
+    if purge.size:
+        dbu._purgeFileFromDB(graph.file_id[purge].tolist(),
+                             trust_id=True, commit=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--mission",
+        required=True,
+        help="selected mission database",)
+    parser.add_argument(
+        "-a", "--archive", default=None,
+        help="Directory to archive files instead of deleting",)
+    parser.add_argument(
+        "--cutoff",
+        required=True,
+        help="What date to use as the fast data cut off",)
+    parser.add_argument(
+        "--reap-files",
+        dest="files",
+        action='store_true',
+        help="Removes all Level0 files, and all of their children, that are not the newest version and are newer than the cut off date. It will still keep the records of the files in the dbprocessing database, but sets exists_on_disk to false.",
+        default=False)
+    parser.add_argument(
+        "--reap-records",
+        dest="records",
+        action='store_true',
+        help="Removes any file records that are marked as not exists_on_disk, and will sanity check that none of its children are still on disk. It also removes the corresponding file_file_links and file_code_links.",
+        default=False)
+    parser.add_argument(
+        "--verbose",
+        action='store_true',
+        help="Prints names of files that will be deleted",
+        default=False)
+
+    options = parser.parse_args()
+
+    if options.mission is None:
+        parser.error("Mission needs to be specified")
+
+    try:
+        cut_date = datetime.datetime.strptime(
+            options.cutoff, "%Y-%m-%d").date()
+    except TypeError as err:
+        parser.error("Must pass a cutoff date in form YYYY-MM-DD")
+    except ValueError as err:
+        parser.error(str(err))
+
+    if not (options.files or options.records):
+        warnings.warn("Will not take any action without --reap-files or"
+                      " --reap-records")
+
+    dbu = DButils.DButils(options.mission)
+    G = build_graph(dbu)
+
+    fd = filter_graph(G, cut_date)
+
+    if fd.any():
+        reap(dbu, G, fd, dofiles=options.files, dorecords=options.records,
+             verbose=options.verbose, archive=options.archive)
+
+    dbu.commitDB()
+    dbu.closeDB()
@@ -0,0 +1,269 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+from __future__ import print_function
+
+import argparse
+import collections
+import datetime
+import glob
+import hashlib
+import os
+import sys
+import re
+import tempfile
+import shutil
+import time
+import stat
+
+import dateutil
+import numpy
+from sqlalchemy import func
+
+
+from dbprocessing import coverage, Utils, inspector, Version
+
+from dbprocessing import DButils
+
+def EventTimer(Event, Time1):
+    """
+    Times an event then prints out the time and the name of the event,
+    nice for debugging and seeing that the code is progressing
+    """
+    Time2 = time.time()
+    print("%4.2f" % (Time2 - Time1), Event)
+    return Time2
+
+product = collections.namedtuple(
+    'product', ['product_name', 'product_id', 'level', 'satellite'])
+"""Information on one product in the report"""
+
+coverageInfo = collections.namedtuple(
+    'coverageInfo', ['startdate', 'enddate', 'satellites'])
+"""Information for the whole report, as from :func:`getInfo`"""
+
+
+def getInfo(mission):
+    """
+    connect to the db and get the information that we need into a dict
+
+    Products (with their satellite) are read in one joined query, and
+    the version of the newest file of each product on each date from
+    :func:`~dbprocessing.coverage.productsCoverage`. Returns a
+    :data:`coverageInfo` with the first and last file date in the
+    database; ``satellites[satellite][product_name]`` is a list of a
+    :class:`product` and an array of the version on each day (one row
+    per day from ``startdate``; -1 if no file).
+    """
+    Time2 = time.time()
+
+    dbu = DButils.DButils(mission, readonly=True)
+    startdate = dbu.session.query(func.min(dbu.File.utc_file_date)).first()[0]
+    enddate = dbu.session.query(func.max(dbu.File.utc_file_date)).first()[0]
+
+    q = dbu.session.query(
+        dbu.Satellite.satellite_name, dbu.Product.product_id,
+        dbu.Product.product_name, dbu.Product.level)\
+        .join(dbu.Instrument,
+              dbu.Instrument.satellite_id == dbu.Satellite.satellite_id)\
+        .join(dbu.Instrumentproductlink,
+              dbu.Instrumentproductlink.instrument_id
+              == dbu.Instrument.instrument_id)\
+        .join(dbu.Product, dbu.Product.product_id
+              == dbu.Instrumentproductlink.product_id)
+    products = {}  # product ID to product
+    for sat, p_id, name, level in q:
+        # First satellite of a product with more than one instrument
+        products.setdefault(p_id, product(name, p_id, level, sat))
+    p_ids = sorted(products)
+    if startdate is not None:
+        _, versions = coverage.productsCoverage(
+            dbu, p_ids, startdate, enddate)
+    else:
+        versions = numpy.full((len(p_ids), 0, 3), -1)
+    versions = versions.astype(numpy.int32)
+
+    satellites = {}
+    for p_id, ver in zip(p_ids, versions):
+        p = products[p_id]
+        satellites.setdefault(p.satellite, {})[p.product_name] = [p, ver]
+    Time2 = EventTimer ('     Products and files collected', Time2)
+
+    return coverageInfo(startdate, enddate, satellites), dbu
+
+
+def signature(dbu, info, satellite, delta_days=3):
+    """
+    find a signature of the contents of a satellite's page
+
+    The page only needs to be rewritten if the signature changes.
+    """
+    h = hashlib.md5()
+    h.update(repr((dbu.mission, satellite, info.startdate, info.enddate,
+                   delta_days)).encode('ascii'))
+    for name in sorted(info.satellites[satellite]):
+        p, ver = info.satellites[satellite][name]
+        h.update(repr(tuple(p)).encode('ascii'))
+        h.update(ver.tobytes())
+    return h.hexdigest()
+
+
+def pageSignature(filename):
+    """
+    find the signature recorded in an existing page, None if none
+    """
+    try:
+        with open(filename, 'rt') as fp:
+            for line in fp:
+                match = re.match(r'\s*<!-- signature: (\w+) -->', line)
+                if match:
+                    return match.group(1)
+    except IOError:
+        pass
+    return None
+
+
+def makeHTML(dbu, info, satellite, delta_days=3, signature=None):
+    """
+    given the info dict mak the html that we want to write out
+    """
+    header = """
+    <!DOCTYPE html PUBLIC "-//W3C//DTD HTML 4.01//EN" "http://www.w3.org/TR/html4/strict.dtd">
+    <html><head>
+      <meta content="text/html; charset=ISO-8859-1" http-equiv="content-type"><title>{0}</title>
+        <style type="text/css">
+            table, td, th
+            {{
+            border:1px solid green;
+            padding:3px 7px 2px 7px;
+            }}
+            th
+            {{
+            background-color:green;
+            color:white;
+            }}
+            tr.alt td
+            {{
+            color:#000000;
+            background-color:#EAF2D3;
+            }}
+        </style>
+
+    </head>
+
+
+    <body>
+
+    """.format(os.path.basename(dbu.mission))
+    footer = \
+    """
+    <br>
+    <br>
+    </body></html>
+    """
+    kwargs = {'delete': False, 'suffix': '_htmlCoverage', 'mode': 'w+t'}
+    if str is not bytes: # Encoding of temporary file only in python 3
+        kwargs['encoding'] = 'ascii'
+    output = tempfile.NamedTemporaryFile(**kwargs)
+    output.writelines(header)
+    if signature is not None:
+        output.write('<!-- signature: {0} -->\n'.format(signature))
+
+    output.write('<h1>{0}</h1>\n'.format(dbu.mission))
+    output.write('<h2>{0}</h2>\n'.format(datetime.datetime.utcnow().isoformat()))
+    output.write('<h2>{0}</h2>\n'.format(satellite))
+
+    output.write('<h2>{0}</h2>\n'.format('Files Present'))
+
+    prodinfo = info.satellites[satellite]
+    products = sorted(prodinfo.keys(), key=lambda x: (prodinfo[x][0].level, prodinfo[x][0].product_name))
+
+    def makeHeader():
+        # make the table structure now for the products
+        output.write('<tr>')
+        output.write('<td></td>') #date
+        output.write('<td></td>') # mission day
+
+        for prod in products:
+            output.write('<th>{0}</th>'.format(prod))
+        output.write('<td></td>')
+        output.write('</tr>\n')
+        output.write('<tr>')
+        output.write('<td></td>') #date
+        output.write('<td></td>') # mission day
+        for prod in products:
+            output.write('<th>{0}</th>'.format(prodinfo[prod][0].product_id))
+        output.write('<td></td>')
+        output.write('</tr>\n')
+
+    # now add in all the data
+    startdate = info.startdate
+    enddate = info.enddate + datetime.timedelta(days=delta_days)
+    d_d = enddate - startdate
+
+    dates = [startdate + datetime.timedelta(days=v) for v in range(d_d.days)]
+
+    output.write('<table>\n')
+
+    # and write all the data
+    for ii, d in enumerate(list(dates)[::-1]):
+        if d.day == 1:
+             makeHeader()
+        if ii % 2 == 0:
+            output.write('<tr>')
+        else:
+            output.write('<tr class="alt">')
+        output.write('<td>{0}</td>'.format(d.isoformat()))
+        output.write('<td>{0}</td>'.format(
+            d.strftime('%Y-%j')))
+
+        # versions for each product start on startdate
+        ind = (d - startdate).days
+        for p in products:
+            versions = prodinfo[p][1]
+            if ind < len(versions) and versions[ind, 0] >= 0:
+                output.write('<td>[{0}]</td>'.format(
+                    Version.Version(*versions[ind])))
+            else:
+                output.write('<td>{0}</td>'.format(None))
+
+        output.write('</tr>\n')
+
+    output.write('</table>\n')
+
+    output.writelines(footer)
+
+    output.close()
+    return output.name
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", type=str, required=True,
+                        help="mission to connect to")
+    parser.add_argument("-d", "--deltadays", type=int,
+                        help="days past last file to make table", default=3)
+    parser.add_argument("-f", "--force", action="store_true", default=False,
+                        help="rewrite all pages, even if unchanged")
+    parser.add_argument('outbase', type=str,
+                        help='Output filename base; _mission.html is appended.')
+    options = parser.parse_args()
+
+    Time1 = time.time()
+    info, dbu = getInfo(options.mission)
+    Time1 = EventTimer ('Info collected', Time1) 
+
+    for sat in info.satellites:
+        outname = options.outbase + '_{0}.html'.format(sat)
+        sig = signature(dbu, info, sat, delta_days=options.deltadays)
+        if not options.force and pageSignature(outname) == sig:
+            Time1 = EventTimer ('Unchanged: {0}'.format(outname), Time1)
+            continue
+        filename = makeHTML(dbu, info, sat, delta_days=options.deltadays,
+                            signature=sig)
+        shutil.move(filename, outname)
+        os.chmod(outname, 0o664)
+        Time1 = EventTimer ('Created: {0}'.format(outname), Time1) 
+    dbu.closeDB()
+
+
+
@@ -0,0 +1,214 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+"""Find files that have not been ingested and link them to incoming"""
+
+import argparse
+import os.path
+import posixpath
+import re
+import sys
+
+import dbprocessing.DButils
+import dbprocessing.DBstrings
+
+
+def parse_args(argv=None):
+    """Parse arguments for this script
+
+    Parameters
+    ----------
+    argv : list
+        Argument list, default from sys.argv
+
+    Returns
+    -------
+    kwargs : dict
+        Keyword arguments for :func:`main`.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", required=True,
+                        help="selected mission database")
+    parser.add_argument("-p", "--product", action='append', dest="products",
+                        help="Product name or ID to check; specify multiple"
+                        " times for multiple products (default: all).")
+    options = parser.parse_args(argv)
+    return vars(options)
+
+
+def product_pattern(dbu, product):
+    """Find where files for a product are, and what they look like
+
+    Parameters
+    ----------
+    dbu : dbprocess.DButils.DButils
+        Open mission database
+
+    product : int or str
+        Product name or ID
+
+    Returns
+    -------
+    tuple of str
+        Static part of the product's relative path (the directory,
+        relative to mission directory, containing all files of the
+        product), and regular expression to match the path of a
+        product file relative to mission directory.
+    """
+    prod = dbu.getEntry('Product', product)
+    tb = dbu.getTraceback('Product', prod.product_id)
+    kwargs = {'INSTRUMENT': tb['instrument'].instrument_name,
+              'MISSION': tb['mission'].mission_name,
+              'PRODUCT': prod.product_name,
+              'SATELLITE': tb['satellite'].satellite_name,
+              'SPACECRAFT': tb['satellite'].satellite_name,
+              }
+    fmtr = dbprocessing.DBstrings.DBformatter()
+    pat = fmtr.re(prod.format, **kwargs)
+    proddir = fmtr.re(prod.relative_path, **kwargs)
+    pat = posixpath.normpath(posixpath.join(proddir, pat))
+    if os.path.sep == '\\':  # Path-separator and regex escape are ambiguous.
+        # This path is well-formatted (from normpath); can be handled naively.
+        pat = '\\\\'.join(pat.split(posixpath.sep))
+    # Leading directories which are fully specified by the names
+    static = []
+    for part in posixpath.normpath(prod.relative_path).split(posixpath.sep):
+        fields = [f for _, f, _, _ in fmtr.parse(part) if f is not None]
+        if not all(f in kwargs for f in fields):
+            break
+        static.append(fmtr.format(part, **kwargs))
+    prefix = os.path.normpath(os.path.join(*static)) if static else ''
+    if prefix in (os.curdir, ''):
+        prefix = ''
+    return prefix, pat
+
+
+def list_all_files(dbu, products):
+    """List all files on disk matching any of several products
+
+    Walks the mission directory once, visiting only the directories which
+    can contain files of at least one product.
+
+    Parameters
+    ----------
+    dbu : dbprocess.DButils.DButils
+        Open mission database
+
+    products : list
+        Product names or IDs
+
+    Returns
+    -------
+    dict
+        Keyed by product ID, path to all matching files relative to
+        mission directory.
+    """
+    md = os.path.normpath(dbu.getMissionDirectory())
+    bydir = {}  # (regex, product ID) for each static directory
+    flist = {}
+    for product in products:
+        p_id = dbu.getProductID(product)
+        prefix, pat = product_pattern(dbu, p_id)
+        bydir.setdefault(prefix, []).append((re.compile(pat), p_id))
+        flist[p_id] = []
+    # Walk each top-level directory (those not inside another) only once
+    roots = []
+    for prefix in sorted(bydir):
+        if not any(prefix == r or prefix.startswith(r + os.sep) or r == ''
+                   for r in roots):
+            roots.append(prefix)
+    for root in roots:
+        for dn, _, fnames in os.walk(os.path.join(md, root)):
+            rel = os.path.relpath(dn, md)
+            rel = '' if rel == os.curdir else rel
+            # All products that can be under this directory
+            candidates = [c for prefix, cs in bydir.items()
+                          if prefix == '' or rel == prefix
+                          or rel.startswith(prefix + os.sep)
+                          for c in cs]
+            if not candidates:
+                continue
+            for f in fnames:
+                path = os.path.join(rel, f)
+                for regex, p_id in candidates:
+                    if regex.match(path):
+                        flist[p_id].append(path)
+    return flist
+
+
+def list_files(dbu, product):
+    """List all files on disk matching a product
+
+    Parameters
+    ----------
+    dbu : dbprocess.DButils.DButils
+        Open mission database
+
+    product : int or str
+        Product name or ID
+
+    Returns
+    -------
+    list
+        Path to all matching files relative to mission directory.
+    """
+    p_id = dbu.getProductID(product)
+    return list_all_files(dbu, [p_id])[p_id]
+
+
+def indb(dbu, fname, prod):
+    """Checks if a filename is in database
+
+    Parameters
+    ----------
+
+    dbu : dbprocess.DButils.DButils
+        Open mission database
+
+    fname : str
+        Filename (no pathing)
+
+    product : int
+        Product ID
+
+    Returns
+    -------
+    bool
+        True if file with that name and product are present.
+    """
+    return bool(dbu.session.query(dbu.File)
+                .filter_by(product_id=prod, filename=fname).count())
+
+
+def main(mission, products=None):
+    """Check for files not in database
+
+    Find all files that match a product specification but are not in the
+    database and symlink them to incoming.
+
+    Parameters
+    ----------
+    mission : str
+        Path to the mission file
+
+    products : list
+        Product names or IDs to check; default all
+    """
+    dbu = dbprocessing.DButils.DButils(mission)
+    md = os.path.normpath(dbu.getMissionDirectory())
+    plist = dbu.getAllProducts() if products is None \
+            else [dbu.getEntry('Product', p) for p in products]
+    inc = dbu.getIncomingPath()
+    flists = list_all_files(dbu, [prod.product_id for prod in plist])
+    for p_id, flist in flists.items():
+        ingested = set(f for f, in dbu.session.query(dbu.File.filename)
+                       .filter_by(product_id=p_id))
+        missing = [f for f in flist
+                   if os.path.basename(f) not in ingested]
+        for m in missing:
+            os.symlink(os.path.join(md, m),
+                       os.path.join(inc, os.path.basename(m)))
+
+
+if __name__ == "__main__":
+    main(**parse_args())
+
@@ -0,0 +1,75 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+
+"""
+go through the DB and print put a list of dates that do not have files for a given database
+
+Missing dates for every child product are found at once (see
+:mod:`dbprocessing.coverage`), and the files of the parent products
+on those dates added to the process queue in one push.
+"""
+
+import argparse
+import datetime
+
+from dateutil import parser as dup
+
+import dbprocessing.DBlogging as DBlogging
+from dbprocessing import coverage
+from dbprocessing import DButils
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--startDate", dest="startDate", type=str,
+                        help="Date to start search (e.g. 2012-10-02 or 20121002)", default=None)
+    parser.add_argument("-e", "--endDate", dest="endDate", type=str,
+                        help="Date to end search (e.g. 2012-10-25 or 20121025)", default=None)
+    parser.add_argument("-m", "--mission", dest="mission", required=True,
+                        help="selected mission database **required**", default=None)
+    parser.add_argument("-d", "--dryrun", action="store_true", default=False,
+                        help="only print missing dates, do not add to the process queue")
+
+    options = parser.parse_args()
+
+    if options.startDate is not None:
+        startDate = dup.parse(options.startDate)
+    else:
+        startDate = datetime.datetime(2012, 8, 30)
+    if options.endDate is not None:
+        endDate = dup.parse(options.endDate)
+    else:
+        endDate = datetime.datetime.now()
+
+    if endDate < startDate:
+        parser.error("endDate must be >= to startDate")
+
+    dbu = DButils.DButils(options.mission, readonly=options.dryrun)
+
+    # get the product tree:
+    tree = dbu.getProductParentTree()
+    children = sorted(set(c for parent, kids in tree for c in kids))
+    missing = coverage.missingDates(dbu, children,
+                                    startDate.date(), endDate.date())
+
+    # dates to reprocess for each parent product
+    todo = {}
+    for parent, kids in tree:
+        for child in kids:
+            if not missing[child]:
+                continue
+            print("Missing files for product {0} (parent {1}) for these dates:"
+                  .format(child, parent))
+            print("{0}".format(' '.join(d.isoformat() for d in missing[child])))
+            todo.setdefault(parent, set()).update(missing[child])
+    if not todo:
+        print("No missing files")
+    elif not options.dryrun:
+        files = coverage.filesOnDates(dbu, todo)
+        added = dbu.ProcessqueuePush(files)
+        print("   -- Added {0} files to be reprocessed for products {1}"
+              .format(len(added), ', '.join(str(p) for p in sorted(todo))))
+        DBlogging.dblogger.info(
+            'Added {0} files to be reprocessed for products {1}'.format(
+                len(added), ', '.join(str(p) for p in sorted(todo))))
+    dbu.closeDB()
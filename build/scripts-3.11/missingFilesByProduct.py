@@ -0,0 +1,88 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+
+"""
+go through the DB and print put a list of dates that do not have files for a given product
+
+"""
+
+import argparse
+import datetime
+import fnmatch
+import sys
+import warnings
+
+from dateutil import parser as dup
+
+import dbprocessing.DBlogging as DBlogging
+import dbprocessing.dbprocessing as dbprocessing
+from dbprocessing import coverage
+from dbprocessing import DButils
+from dbprocessing import inspector
+
+warnings.filterwarnings("ignore")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--startDate", type=str,
+                        help="Date to start search (e.g. 2012-10-02 or 20121002)", default=None)
+    parser.add_argument("-e", "--endDate", type=str,
+                        help="Date to end search (e.g. 2012-10-25 or 20121025)", default=None)
+    parser.add_argument("-m", "--mission", required=True,
+                        help="selected mission database **required**", default=None)
+    parser.add_argument("-f", "--filter",
+                        help="Filter to use on filename (space separated globs)", default=None)
+    parser.add_argument("-p", "--process", action='store_true', default=False,
+                        help="Add those dates to the process queue for the specified DB")
+    parser.add_argument("--parent", type=int, default=None,
+                        help="The parent product ID  to enable processing of the missing files")
+    parser.add_argument("--echo", default=False, action='store_true',
+                        help="Put the database in echo mode")
+    parser.add_argument('product_id', action='store', type=int,
+                        help='Product ID to check.')
+
+    
+    options = parser.parse_args()
+
+    if options.startDate is not None:
+        startDate = dup.parse(options.startDate)
+    else:
+        startDate = datetime.datetime(2012, 8, 30)
+
+    startDate = startDate.date()
+
+    if options.endDate is not None:
+        endDate = dup.parse(options.endDate)
+    else:
+        endDate = datetime.datetime.now()
+
+    endDate = endDate.date()
+
+    if endDate < startDate:
+        parser.error("endDate must be >= to startDate")
+
+    db = dbprocessing.ProcessQueue(options.mission,)
+
+    dbu = DButils.DButils(options.mission, echo=options.echo)
+
+    product_id = options.product_id
+
+    missing_dates = coverage.missingDates(
+        dbu, [product_id], startDate, endDate)[product_id]
+    if not missing_dates:
+        print("No missing files")
+        del dbu
+        sys.exit(0)
+       
+    print("Missing files for product {0} for these dates:".format(product_id))
+    tmp = [d.isoformat() for d in missing_dates]
+    print("{0}".format(' '.join(tmp)))
+
+    if options.process:
+        if options.parent is None:
+            parser.error("Cannot process without a parent product id specified")
+        files = coverage.filesOnDates(dbu, {options.parent: missing_dates})
+        added = dbu.ProcessqueuePush(files)
+        print("   -- Added {0} files to be reprocessed for product {1}".format(len(added), options.parent))
+        DBlogging.dblogger.info('Added {0} files to be reprocessed for product {1}'.format(len(added), options.parent))
+    del dbu
@@ -0,0 +1,76 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+"""Check a database for possible inconsistencies"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+
+from dbprocessing import DBcheck
+
+
+def parse_args(argv=None):
+    """Parse arguments for this script
+
+    Parameters
+    ==========
+    argv : list
+        Argument list, default from sys.argv
+
+    Returns
+    =======
+    options : argparse.Values
+        Arguments from command line, from flags and non-flag arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", required=True,
+                        help="selected mission", default=None)
+    parser.add_argument("-c", "--check", dest="checks", action="append",
+                        choices=list(DBcheck.checks), default=None,
+                        help="Check to run (may be repeated; default all)")
+    parser.add_argument("-n", "--num-connections", dest="connections",
+                        type=int, default=1,
+                        help="Number of checks to run at once")
+    parser.add_argument("--json", dest="as_json", action='store_true',
+                        default=False,
+                        help="Output violations as JSON")
+    options = parser.parse_args(argv)
+    return vars(options)
+
+
+def main(mission, checks=None, connections=1, as_json=False):
+    """Run consistency checks and print violations
+
+    Parameters
+    ==========
+    mission : str
+        Path to the mission file
+    checks : list of str
+        Names of checks to run, default all
+    connections : int
+        Number of checks to run at once
+    as_json : bool
+        Print JSON instead of human-readable text
+
+    Returns
+    =======
+    int
+        Total number of violations
+    """
+    results = DBcheck.runChecks(mission, checks, connections)
+    if as_json:
+        json.dump(results, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        for name, violations in results.items():
+            print('{0}: {1} ({2} found)'.format(
+                name, DBcheck.checks[name].__doc__, len(violations)))
+            for v in violations:
+                print('    ' + ', '.join('{0}={1}'.format(k, v[k]) for k in v))
+    return sum(len(v) for v in results.values())
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(**parse_args()) else 0)
@@ -0,0 +1,139 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+from __future__ import print_function
+
+import argparse
+import datetime
+import sys
+
+from dbprocessing import DButils
+
+def output_html(items, products=None, start=0, output=None):
+    """Write queue as HTML to output (default stdout), a row at a time"""
+    if output is None:
+        output = sys.stdout
+    output.write("""<!DOCTYPE html>
+<html>
+  <head>
+    <title>DBprocessing</title>
+    <style type="text/css">
+        table, td, th
+        {
+        border:1px solid green;
+        padding:3px 7px 2px 7px;
+        border-collapse: collapse;
+        }
+        th
+        {
+        background-color:green;
+        color:white;
+        }
+        tr.alt td
+        {
+        color:#000000;
+        background-color:#EAF2D3;
+        }
+    </style>
+  </head>
+
+
+  <body>
+""")
+    output.write('    <h1>{0}</h1>\n'.format(dbu.mission))
+    output.write('    <h2>{0}</h2>\n'.format(datetime.datetime.utcnow().isoformat()))
+
+    if products:
+        output.write('    <h2>{0}</h2>\n'.format('Products'))
+        output.write("""    <table>
+        <tr><th>product_id</th><th>product</th></tr>
+""")
+        for i, prod in enumerate(products):
+            output.write('        <tr{}>'.format(
+                " class='alt'" if i % 2 else ''))
+            output.write('<td>{0}</td><td>{1}</td></tr>\n'.format(
+                prod.product_id, prod.product_name))
+        output.write("    </table>\n")
+    output.write('    <h2>{0}</h2>\n'.format('processQueue'))
+    output.write("""    <table>
+        <tr><th>file #</th><th>filename</th><th>product</th></tr>
+""")
+    for index, item in enumerate(items, start):
+        if( index % 2 == 0 ):
+            output.write('        <tr>')
+        else:
+            output.write("        <tr class='alt'>")
+
+        output.write('<td>{0}</td><td>{1}</td><td>{2}</td></tr>\n'.format(index, item.filename, item.product_name))
+
+    output.write("    </table>\n  </body>\n</html>")
+
+def output_text(items, products=None, start=0, output=None):
+    """Write queue as text to output (default stdout), a line at a time"""
+    if output is None:
+        output = sys.stdout
+    output.write(dbu.mission + '\n')
+    output.write(datetime.datetime.utcnow().isoformat() + '\n')
+    if products:
+        output.write('Products\n{}\n'.format('\n'.join([
+            '{}\t{}'.format(p.product_id, p.product_name)
+            for p in products])))
+    output.write('ProcessQueue\n')
+    for index, item in enumerate(items, start):
+        output.write('{0}\t{1}\t{2}\n'.format(index, item.filename, item.product_name))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--html", action='store_true',
+                        help="Output in html")
+    parser.add_argument("-q", "--quiet",  action='store_true',
+                        help="Do not display output")
+    parser.add_argument("-o", "--output",
+                        help="Write output to a file")
+    parser.add_argument(
+        'database', action='store', type=str,
+        help='Name of database (or sqlite file), i.e. mission, to open.')
+    parser.add_argument(
+        '-p', '--product', nargs='+',
+        help='Limit result and counts to these product IDs or names.')
+    parser.add_argument(
+        "-s", "--sort", action='store_true',
+        help="Sort output by date, then product (default: in queue order).")
+    parser.add_argument(
+        "--offset", type=int, default=None,
+        help="Skip this many files at start of output.")
+    parser.add_argument(
+        "--limit", type=int, default=None,
+        help="Output at most this many files.")
+    returncode = parser.add_mutually_exclusive_group()
+    returncode.add_argument("-e", "--exist",  action='store_true',
+                            help="Exit code 1 if queue empty; 0 (True) if not.")
+    returncode.add_argument("-c", "--count", action='store_true',
+                            help="Set exit code to count of files in queue.")
+    options = parser.parse_args()
+    if options.quiet and (options.html or options.output or options.sort
+                          or options.offset or options.limit):
+        parser.error('--html, -o, -s, --offset, and --limit are useless'
+                     ' with -q.')
+
+    dbu = DButils.DButils(options.database, readonly=True)
+    products = None if options.product is None\
+               else [dbu.getEntry('Product', p) for p in options.product]
+    prod_ids = [p.product_id for p in products] if products else None
+    if not options.quiet:
+        items = dbu.ProcessqueueIter(products=prod_ids, sort=options.sort,
+                                     offset=options.offset,
+                                     limit=options.limit)
+        writer = output_html if options.html else output_text
+        if options.output is None:
+            writer(items, products, start=options.offset or 0)
+            print()
+        else:
+            with open(options.output, 'w') as output:
+                writer(items, products, start=options.offset or 0,
+                       output=output)
+    if options.exist or options.count:
+        count = dbu.ProcessqueueLen(products=prod_ids)
+    dbu.closeDB()
+    if options.exist:
+        sys.exit(not(count))
+    if options.count:
+        sys.exit(min(count, 255))
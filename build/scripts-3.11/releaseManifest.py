@@ -0,0 +1,60 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+"""Write the manifest of a release: filename, path and checksum of each file"""
+
+import argparse
+import sys
+
+from dbprocessing import DButils
+
+
+def write_manifest(dbu, release, output):
+    """Write manifest of a release
+
+    Checksums are as recorded in the database; files are not read.
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection.
+    release : :class:`str`
+        Release number.
+    output : file
+        Open file to write tab-separated filename, full path, and
+        :sql:column:`~file.shasum`, one line per file.
+
+    Returns
+    -------
+    :class:`int`
+        Number of files in the release.
+    """
+    count = 0
+    for filename, path, shasum in dbu.iterRelease(release):
+        output.write('{0}\t{1}\t{2}\n'.format(filename, path, shasum))
+        count += 1
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-m', '--mission', required=True,
+                        help='selected mission database **required**')
+    parser.add_argument('-t', '--tag', action='store_true', default=False,
+                        help='First tag all newest files as part of release')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Write manifest to this file (default stdout)')
+    parser.add_argument('release', help='Release number')
+    options = parser.parse_args()
+
+    dbu = DButils.DButils(options.mission, readonly=not options.tag)
+    try:
+        if options.tag:
+            added = dbu.tag_release(options.release)
+            sys.stderr.write('Added {0} files to release {1}\n'.format(
+                added, options.release))
+        if options.output is None:
+            write_manifest(dbu, options.release, sys.stdout)
+        else:
+            with open(options.output, 'w') as output:
+                write_manifest(dbu, options.release, output)
+    finally:
+        dbu.closeDB()
@@ -0,0 +1,42 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+import argparse
+
+from dbprocessing import DBcheck, DButils
+
+class scrubber(object):
+    def __init__(self, mission):
+        self.dbu = DButils.DButils(mission, readonly=True)
+
+    def __del__(self):
+        del self.dbu
+
+    def parents_are_newest(self):
+        bad = DBcheck.runCheck(self.dbu, 'parents_not_newest')
+        if not bad:
+            print("All parents of newest are newest")
+        else:
+            print("Parents of newest aren't newest")
+            print(set(b['source_file'] for b in bad))
+
+    def version_number_check(self):
+        for f in DBcheck.runCheck(self.dbu, 'version_too_large'):
+            print("File {0}:{1} has a version that is too large".format(
+                f['file_id'], f['filename']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--mission",
+        required=True,
+        help="selected mission database",
+        default=None)
+
+    options = parser.parse_args()
+
+    scrubber = scrubber(options.mission)
+    scrubber.parents_are_newest()
+    scrubber.version_number_check()
+    del scrubber
@@ -0,0 +1,72 @@
+#!/root/.pyenv/versions/3.11.7/bin/python
+
+"""Update Unix file timestamps in a database from the UTC start/stop time"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+
+import dbprocessing.DButils
+
+
+def parse_args(argv=None):
+    """Parse arguments for this script
+
+    Parameters
+    ==========
+    argv : list
+        Argument list, default from sys.argv
+
+    Returns
+    =======
+    options : argparse.Values
+        Arguments from command line, from flags and non-flag arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", required=True,
+                        help="selected mission database")
+    parser.add_argument("--missing", action="store_true", default=False,
+                        help="Only add Unix times for files without one")
+    parser.add_argument("-c", "--checkpoint", default=None,
+                        help="Checkpoint file, to resume an interrupted run")
+    parser.add_argument("-b", "--batch-size", dest="batchsize", type=int,
+                        default=10000,
+                        help="Number of files per batch (and checkpoint)")
+    options = parser.parse_args(argv)
+    return vars(options)
+
+
+def main(mission, missing=False, checkpoint=None, batchsize=10000):
+    """Rewrite Unix timestamps for a database.
+
+    Opens an existing database and rewrites all Unix timestamps based on the
+    UTC file timestamps. Prints progress after each batch (to stderr).
+
+    Parameters
+    ==========
+    mission : str
+        Path to the mission file
+    missing : bool
+        Only add Unix times for files without one (e.g. to finish an
+        interrupted migration), do not rewrite existing times.
+    checkpoint : str
+        Path to checkpoint file
+    batchsize : int
+        Number of files per batch
+    """
+    dbu = dbprocessing.DButils.DButils(mission)
+    done = 0
+    try:
+        for last, count in dbu.fillUnixTime(
+                update=not missing, batchsize=batchsize,
+                checkpoint=checkpoint):
+            done += count
+            print('{0} Unix times written, through file_id {1}'.format(
+                done, last), file=sys.stderr)
+    finally:
+        dbu.closeDB()
+
+
+if __name__ == "__main__":
+    main(**parse_args())
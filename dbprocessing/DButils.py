@@ -17,6 +17,8 @@ import datetime
 import getpass
 import glob
 import itertools
+import json
+import multiprocessing
 import os
 import os.path
 import posixpath
@@ -36,6 +38,7 @@ except NameError:
 
 import sqlalchemy
 import sqlalchemy.engine
+import sqlalchemy.event
 import sqlalchemy.schema
 import sqlalchemy.sql.expression
 from sqlalchemy import Table
@@ -88,7 +91,7 @@ class DBNoData(Exception):
     pass
 
 
-def postgresql_url(databasename):
+def postgresql_url(databasename, replica=False):
     """Build postgresl database URL
 
     Environment variable ``PGUSER`` is required. Will also use ``PGHOST``,
@@ -99,6 +102,9 @@ def postgresql_url(databasename):
     ----------
     databasename : :class:`str`
         Name of the database
+    replica : :class:`bool`, default False
+        Connect to a read-only replica: use ``PGREPLICAHOST`` and
+        ``PGREPLICAPORT`` in place of ``PGHOST`` and ``PGPORT``, if set.
 
     Returns
     -------
@@ -106,10 +112,13 @@ def postgresql_url(databasename):
         Full postgresql URL, suitable for use in
         :func:`~sqlalchemy.create_engine`
     """
+    hostvar, portvar = 'PGHOST', 'PGPORT'
+    if replica and 'PGREPLICAHOST' in os.environ:
+        hostvar, portvar = 'PGREPLICAHOST', 'PGREPLICAPORT'
     # If no host, defaults to Unix domain on localhost.
-    hostport = os.environ.get('PGHOST', '')
-    if 'PGPORT' in os.environ:
-        hostport = '{}:{}'.format(hostport, os.environ['PGPORT'])
+    hostport = os.environ.get(hostvar, '')
+    if portvar in os.environ:
+        hostport = '{}:{}'.format(hostport, os.environ[portvar])
     userpass = os.environ['PGUSER']
     if 'PGPASSWORD' in os.environ:
         userpass = '{}:{}'.format(userpass, urllib.parse.quote_plus(
@@ -119,6 +128,37 @@ def postgresql_url(databasename):
     return db_url
 
 
+def _checkDigest(args):
+    """Check a file's checksum, for :meth:`DButils.verifyFiles`
+
+    Module-level so that it can be used in a :mod:`multiprocessing` pool.
+
+    Parameters
+    ----------
+    args : :class:`tuple`
+        Path to the file and expected checksum.
+
+    Returns
+    -------
+    :class:`tuple`
+        Result (0 for match, 1 for bad checksum, 2 for missing file) and
+        size of the file in bytes.
+    """
+    path, shasum = args
+    try:
+        digest = calcDigest(path)
+    except DigestError:
+        return 2, 0
+    return (0 if digest == shasum else 1), os.path.getsize(path)
+
+
+def _refuseWrite(conn, cursor, statement, parameters, context, executemany):
+    """Refuse to execute a write statement on a read-only :class:`DButils`"""
+    if context is not None and (
+            context.isinsert or context.isupdate or context.isdelete):
+        raise DBError('Database is open read-only')
+
+
 class DButils(object):
     """Utility routines for DBProcessing class
 
@@ -134,8 +174,19 @@ class DButils(object):
        functionality to do so may have already been torn down. See for
        example `Python issue 39513 <https://bugs.python.org/issue39513>`_.
     """
-
-    def __init__(self, mission='Test', db_var=None, echo=False, engine=None):
+    _nameLookups = {
+        'Code': 'getCodeID',
+        'File': 'getFileID',
+        'Instrument': 'getInstrumentID',
+        'Mission': 'getMissionID',
+        'Process': 'getProcessID',
+        'Product': 'getProductID',
+        'Satellite': 'getSatelliteID',
+    }
+    """Method to look up primary key from name, by table (for :meth:`getEntry`)"""
+
+    def __init__(self, mission='Test', db_var=None, echo=False, engine=None,
+                 readonly=False):
         """
         Initialize the DButils class
 
@@ -153,6 +204,11 @@ class DButils(object):
             DB engine to connect to (e.g sqlite, postgresql).
             Defaults to sqlite if mission is an existing file, else
             postgresql.
+        readonly : :class:`bool`, default False
+            Open the database read-only, for reporting. Reads are not
+            held open in a transaction, so do not block a process writing
+            to the database; any attempt to write raises
+            :class:`DBError`. See :meth:`openDB`.
 
         Other Parameters
         ----------------
@@ -160,6 +216,7 @@ class DButils(object):
             Does nothing
         """
         self.dbIsOpen = False
+        self.readonly = readonly
         if mission is None:
             raise DBError("Must input database name to create DButils instance")
         if engine is None:
@@ -200,6 +257,12 @@ class DButils(object):
     def openDB(self, engine, db_var=None, verbose=False, echo=False):
         """Setup python to talk to the database
 
+        If the instance is :attr:`readonly`, sqlite databases are opened
+        with ``mode=ro`` and postgresql sessions are set to read-only
+        transactions, optionally on a replica (see
+        :func:`postgresql_url`). Statements are executed in autocommit
+        mode and any insert, update or delete raises :class:`DBError`.
+
         Parameters
         ----------
         engine : :class:`str`
@@ -217,18 +280,28 @@ class DButils(object):
         """
         if self.dbIsOpen == True:
             return
+        readonly = getattr(self, 'readonly', False)
+        kwargs = {}
         if engine == 'sqlite':
             if not os.path.isfile(os.path.expanduser(self.mission)):
                 raise ValueError("DB file specified doesn't exist")
-            db_url = '{0}:///{1}'.format(engine, os.path.expanduser(
-                self.mission))
             self.mission = os.path.abspath(os.path.expanduser(self.mission))
+            if readonly:
+                db_url = '{0}:///file:{1}?mode=ro&uri=true'.format(
+                    engine, urllib.parse.quote(self.mission))
+            else:
+                db_url = '{0}:///{1}'.format(engine, self.mission)
         elif engine == 'postgresql':
-            db_url = postgresql_url(self.mission)
+            db_url = postgresql_url(self.mission, replica=readonly)
+            if readonly:
+                kwargs['connect_args'] = {
+                    'options': '-c default_transaction_read_only=on'}
         else:
             raise DBError('Unknown engine {}'.format(engine))
+        if readonly:
+            kwargs['isolation_level'] = 'AUTOCOMMIT'
         try:
-            engineIns = sqlalchemy.create_engine(db_url, echo=echo)
+            engineIns = sqlalchemy.create_engine(db_url, echo=echo, **kwargs)
             DBlogging.dblogger.info("Database Connection opened: {0}  {1}".format(str(engineIns), self.mission))
 
         except (DBError, ArgumentError):
@@ -236,6 +309,9 @@ class DButils(object):
             raise DBError('Error creating engine: ' + str(v))
         try:
             metadata = sqlalchemy.MetaData(bind=engineIns)
+            if readonly:
+                sqlalchemy.event.listen(engineIns, 'before_cursor_execute',
+                                        _refuseWrite)
             # a session is what you use to actually talk to the DB, set one up with the current engine
             Session = sessionmaker(bind=engineIns)
             session = Session()
@@ -268,7 +344,13 @@ class DButils(object):
         ## when interacting using python use the class
         table_dict = { }
         for val in table_names:
+            # R*Tree index and its shadow tables have no primary key
+            if val.startswith(tables.interval_index):
+                continue
             table_dict[val.title()] = val
+        self._intervalIndex = 'unixtime' in table_names and \
+            tables.interval_index in table_names + [
+                i['name'] for i in inspector.get_indexes('unixtime')]
         ##  dynamically create all the classes (c1)
         ##  dynamically create all the tables in the db (c2)
         ##  dynamically create all the mapping between class and table (c3)
@@ -286,6 +368,56 @@ class DButils(object):
                 setattr(self, str(val), myclass)
                 if verbose: print("Class %s created" % (val))
                 if verbose: DBlogging.dblogger.debug("Class %s created" % (val))
+        self._statements = {}
+
+    def _statement(self, key):
+        """
+        Get a cached, pre-built statement for a frequent lookup
+
+        The statement is built on first use and reused thereafter,
+        which avoids rebuilding a query and (since SQLAlchemy caches
+        compilation by statement structure) recompiling it on every
+        call. Values are supplied as bound parameters when executed.
+
+        Parameters
+        ----------
+        key : :class:`str`
+            Name of the statement, one of ``fileIDByName``,
+            ``processIDByName``, ``productIDByName``, ``codeFromProcess``.
+
+        Returns
+        -------
+        :class:`~sqlalchemy.sql.expression.Select`
+            Statement for execution with :meth:`~sqlalchemy.orm.Session.execute`.
+        """
+        stmt = self._statements.get(key)
+        if stmt is not None:
+            return stmt
+        bp = sqlalchemy.bindparam
+        if key == 'fileIDByName':
+            stmt = sqlalchemy.select([self.File.file_id])\
+                .where(self.File.filename == bp('filename')).limit(1)
+        elif key == 'processIDByName':
+            stmt = sqlalchemy.select([self.Process.process_id])\
+                .where(self.Process.process_name == bp('process_name'))
+        elif key == 'productIDByName':
+            # if two products have the same name always use the lower id
+            stmt = sqlalchemy.select([self.Product.product_id])\
+                .where(self.Product.product_name == bp('product_name'))\
+                .order_by(self.Product.product_id).limit(1)
+        elif key == 'codeFromProcess':
+            # Two rows are enough to know there is more than one
+            date = bp('utc_file_date', type_=self.Code.code_start_date.type)
+            stmt = sqlalchemy.select([self.Code.code_id]).where(and_(
+                self.Code.process_id == bp('process_id'),
+                self.Code.newest_version.is_(True),
+                self.Code.active_code.is_(True),
+                self.Code.code_start_date <= date,
+                self.Code.code_stop_date >= date)).limit(2)
+        else:
+            raise ValueError('Unknown statement {0}'.format(key))
+        self._statements[key] = stmt
+        return stmt
 
 
             #####################################
@@ -473,6 +605,97 @@ class DButils(object):
         else:
             return True
 
+    def checkDiskForFiles(self, startDate=None, endDate=None,
+                          newest_version=False, startID=None, fix=False):
+        """
+        Find files recorded as on disk which are not on disk
+
+        Bulk equivalent of :meth:`checkDiskForFile` over the entire
+        database (or a date range). Rather than checking for each file
+        separately, each directory is listed once and compared against
+        all the files for a product from a single query.
+
+        Parameters
+        ----------
+        startDate : :class:`~datetime.datetime`, optional
+            First date to check, based on :sql:column:`~file.utc_file_date`
+        endDate : :class:`~datetime.datetime`, optional
+            Last date to check (inclusive)
+        newest_version : :class:`bool`, default False
+            Only check the newest version of each product and date.
+        startID : :class:`int`, optional
+            Only check files with :sql:column:`~file.file_id` at least this.
+        fix : :class:`bool`, default False
+            Set :sql:column:`~file.exists_on_disk` to False for all
+            missing files. They are then consistent and not returned
+            (as :meth:`checkDiskForFile` returns True once fixed).
+
+        Returns
+        -------
+        :class:`list` of :class:`int`
+            :sql:column:`~file.file_id` of every file recorded as on disk
+            but not present, sorted. Empty if ``fix``.
+
+        Notes
+        -----
+        A file is considered present if its name is in the directory
+        listing, so a broken symbolic link is considered present (unlike
+        :meth:`checkDiskForFile`).
+        """
+        files = self._filesQuery(
+            self._filePathColumns() + [self.File.product_id],
+            startDate=startDate, endDate=endDate, exists=True)\
+            .join(self.Product, self.File.product_id == self.Product.product_id)
+        if newest_version:
+            # Newest of all versions, whether on disk or not
+            files = files.filter(~self._newerExists(self.File))
+        if startID is not None:
+            files = files.filter(self.File.file_id >= startID)
+        files = files.order_by(self.File.product_id).yield_per(1000)
+        listings = {}
+        product = None
+        missing = []
+        for f in files:
+            if f.product_id != product:  # All done with last product
+                product = f.product_id
+                listings = {}
+            path = self._filePath(f)
+            dirname, basename = os.path.split(path)
+            if dirname not in listings:
+                try:
+                    listings[dirname] = set(e.name for e in os.scandir(dirname))
+                except OSError:  # Nonexistent directory
+                    listings[dirname] = set()
+            if basename not in listings[dirname]:
+                missing.append(f.file_id)
+        missing.sort()
+        if fix and missing:
+            self._setExistsOnDisk(missing, False)
+            DBlogging.dblogger.info(
+                "exists_on_disk set False for {0} files".format(len(missing)))
+            missing = []
+        return missing
+
+    def _setExistsOnDisk(self, file_ids, exists=False, commit=True):
+        """Set :sql:column:`~file.exists_on_disk` for many files at once
+
+        Parameters
+        ----------
+        file_ids : :class:`~collections.abc.Iterable` of :class:`int`
+            :sql:column:`~file.file_id` of files to update.
+        exists : :class:`bool`, default False
+            Value to set.
+        commit : :class:`bool`, default True
+            Commit changes to the database when done.
+        """
+        for chunk in Utils.chunker(sorted(set(file_ids)), 500):
+            self.session.query(self.File)\
+                .filter(self.File.file_id.in_(chunk))\
+                .update({'exists_on_disk': exists},
+                        synchronize_session=False)
+        if commit:
+            self.commitDB()
+
     def ProcessqueueFlush(self):
         """remove everything from the process queue
 
@@ -533,58 +756,194 @@ class DButils(object):
         DBlogging.dblogger.debug("Entire Processqueue was read: {0} elements returned".format(len(ans)))
         return ans
 
+    def _processqueueQuery(self, products=None):
+        """
+        Build query on the process queue joined to file and product
+
+        Parameters
+        ----------
+        products : :class:`list` of :class:`int`, optional
+            Only include files of these :sql:column:`~product.product_id`.
+
+        Returns
+        -------
+        :class:`~sqlalchemy.orm.Query`
+            Query for queue entries, not ordered.
+        """
+        q = self.session.query(
+            self.Processqueue.file_id, self.Processqueue.version_bump,
+            self.File.filename, self.File.utc_file_date,
+            self.Product.product_id, self.Product.product_name)\
+            .join(self.File, self.File.file_id == self.Processqueue.file_id)\
+            .join(self.Product,
+                  self.Product.product_id == self.File.product_id)
+        if products is not None:
+            q = q.filter(self.Product.product_id.in_(list(products)))
+        return q
+
+    def ProcessqueueIter(self, products=None, sort=False, offset=None,
+                         limit=None, yield_per=1000):
+        """
+        Iterate over the process queue, with file and product information
+
+        Entries are read in one query joining :sql:table:`processqueue`,
+        :sql:table:`file` and :sql:table:`product`, fetched from the
+        database in batches.
+
+        Parameters
+        ----------
+        products : :class:`list` of :class:`int`, optional
+            Only include files of these :sql:column:`~product.product_id`
+            (default all).
+        sort : :class:`bool`, default False
+            Order by :sql:column:`~file.utc_file_date`, then
+            :sql:column:`~product.product_name`. Default is queue order
+            (by :sql:column:`~processqueue.file_id`).
+        offset : :class:`int`, optional
+            Skip this many entries (after filtering and ordering).
+        limit : :class:`int`, optional
+            Return at most this many entries (default all).
+        yield_per : :class:`int`, default 1000
+            Number of entries to fetch from the database at once.
+
+        Yields
+        ------
+        various
+            :class:`tuple`-like row for each queue entry, with attributes
+            ``file_id``, ``version_bump``, ``filename``,
+            ``utc_file_date``, ``product_id``, ``product_name``.
+
+        See Also
+        --------
+        ProcessqueueGetAll
+        """
+        q = self._processqueueQuery(products)
+        if sort:
+            q = q.order_by(self.File.utc_file_date, self.Product.product_name,
+                           self.Processqueue.file_id)
+        else:
+            q = q.order_by(self.Processqueue.file_id)
+        for row in q.offset(offset).limit(limit).yield_per(yield_per):
+            yield row
+
+    def _processqueueInsert(self, fileid, version_bump=None, validate=True,
+                            returnids=False):
+        """
+        Add file ids to the process queue in a single server-side insert
+
+        The ids are loaded into a temporary table, then added with one
+        ``INSERT INTO processqueue SELECT ... WHERE NOT EXISTS``, so the
+        current contents of the queue are never read into Python. Files
+        are added in the order given. The temporary table is dropped
+        even if the insert fails.
+
+        Parameters
+        ----------
+        fileid : :class:`~collections.abc.Iterable` of :class:`int`
+            :sql:column:`~file.file_id` to add
+        version_bump : :class:`int`, optional
+            :sql:column:`~processqueue.version_bump` for all added files
+        validate : :class:`bool`, default True
+            Only add ids that exist in the :sql:table:`file` table
+            (otherwise silently dropped).
+        returnids : :class:`bool`, default False
+            Return the ids that were added, rather than just the number.
+            Uses ``RETURNING`` on PostgreSQL; otherwise the ids are
+            selected before the insert.
+
+        Returns
+        -------
+        :class:`int` or :class:`list` of :class:`int`
+            Number of files added to the queue, or their
+            :sql:column:`~file.file_id` (sorted) if ``returnids``.
+        """
+        # Unique, keeping first-seen order
+        fileid = list(collections.OrderedDict.fromkeys(fileid))
+        if not fileid:
+            return [] if returnids else 0
+        self.session.flush()  # Core statements below bypass the ORM
+        conn = self.session.connection()
+        pqtable = self.metadata.tables['processqueue']
+        filetable = self.metadata.tables['file']
+        incoming = sqlalchemy.Table(
+            'processqueue_incoming', sqlalchemy.MetaData(),
+            sqlalchemy.Column('ordinal', sqlalchemy.Integer,
+                              primary_key=True),
+            sqlalchemy.Column('file_id', sqlalchemy.Integer, nullable=False),
+            prefixes=['TEMPORARY'])
+        postgresql = self.engine.dialect.name == 'postgresql'
+        done = False
+        try:
+            try:
+                incoming.create(conn, checkfirst=True)
+                conn.execute(incoming.insert(),
+                             [{'ordinal': i, 'file_id': f}
+                              for i, f in enumerate(fileid)])
+                src = sqlalchemy.select([
+                    incoming.c.file_id,
+                    sqlalchemy.cast(sqlalchemy.literal(version_bump),
+                                    pqtable.c.version_bump.type)])\
+                    .where(~sqlalchemy.exists().where(
+                        pqtable.c.file_id == incoming.c.file_id))
+                if validate:
+                    src = src.where(sqlalchemy.exists().where(
+                        filetable.c.file_id == incoming.c.file_id))
+                src = src.order_by(incoming.c.ordinal)
+                ins = pqtable.insert().from_select(
+                    ['file_id', 'version_bump'], src)
+                if returnids and postgresql:
+                    added = sorted(r[0] for r in conn.execute(
+                        ins.returning(pqtable.c.file_id)))
+                    num = len(added)
+                else:
+                    if returnids:
+                        added = sorted(r[0] for r in conn.execute(src))
+                    num = conn.execute(ins).rowcount
+                done = True
+            finally:
+                # A failed statement on PostgreSQL aborts the transaction;
+                # the rollback then removes the table.
+                if done or not postgresql:
+                    incoming.drop(conn, checkfirst=True)
+        except IntegrityError as IE:
+            self.session.rollback()
+            raise DBError(IE)
+        DBlogging.dblogger.debug("{0} files added to process queue"
+                                 .format(num))
+        return added if returnids else num
+
     def ProcessqueuePush(self, fileid, version_bump=None, MAX_ADD=150):
         """
         Push a file onto the process queue (onto the right)
 
+        Files not in the database, or already in the queue, are silently
+        skipped.
+
         Parameters
         ----------
-        fileid : :class:`int` or :class:`str`
-            the :sql:column:`~file.file_id` or :sql:column:`~file.filename`
+        fileid : :class:`int` or :class:`~collections.abc.Iterable`
+            the :sql:column:`~file.file_id` or sequence of file ids
             to put on the process queue.
+        version_bump : :class:`int`, optional
+            Force processing and increment this version number, {0}.{1}.{2}
 
         Returns
         -------
-        file_id : :class:`int`
-            :sql:column:`~file.file_id` of the file placed on queue,
+        file_id : :class:`list` of :class:`int`
+            :sql:column:`~file.file_id` of the files placed on queue,
             as grabbed from the db.
+
+        Other Parameters
+        ----------------
+        MAX_ADD : :class:`int`
+            Unused; all files are added in a single statement.
         """
         if not hasattr(fileid, '__iter__'):
             fileid = [fileid]
-        else:
-            # do this in chunks as too many entries breaks things
-            if len(fileid) > MAX_ADD:
-                outval = []
-                for v in Utils.chunker(fileid, MAX_ADD):
-                    outval.extend(self.ProcessqueuePush(v, version_bump=version_bump))
-                return outval
-
-        # first filter() takes care of putting in values that are not in the DB.  It is silent
-        # second filter() takes care of not reading files that are already in the queue
-        subq = self.session.query(self.Processqueue.file_id).subquery()
-
-        fileid = (self.session.query(self.File.file_id)
-                  .filter(self.File.file_id.in_(fileid))
-                  .filter(~self.File.file_id.in_(subq.select()))).all()
-
-        fileid = list(map(itemgetter(0), fileid))  # nested tuples to list
-
-        pq = set(self.ProcessqueueGetAll())
-        fileid = set(fileid).difference(pq)
-
-        outval = []
-        objs = []
-        for f in fileid:
-            pq1 = self.Processqueue()
-            pq1.file_id = f
-            pq1.version_bump = version_bump
-            objs.append(pq1)
-            outval.append(pq1.file_id)
-        DBlogging.dblogger.debug("File added to process queue {0}:{1}".format(fileid, '---'))
-        if fileid:
-            self.session.add_all(objs)
+        outval = self._processqueueInsert(fileid, version_bump, validate=True,
+                                          returnids=True)
+        if outval:
             self.commitDB()
-        #        pqid = self.session.query(self.Processqueue.file_id).all()
         return outval
 
     def ProcessqueueRawadd(self, fileid, version_bump=None, commit=True):
@@ -600,44 +959,40 @@ class DButils(object):
         ----------
         fileid : :class:`int` or :class:`~collections.abc.Iterable`
             the :sql:column:`~file.file_id` or sequence of file ids to add
+        version_bump : :class:`int`, optional
+            Force processing and increment this version number, {0}.{1}.{2}
+        commit : :class:`bool`, default True
+            Commit changes to the database when done.
 
         Returns
         -------
         num : :class:`int`
             the number of entries added to the processqueue
         """
-        current_q = set(self.ProcessqueueGetAll())
-
         if not hasattr(fileid, '__iter__'):
             fileid = [fileid]
+        num = self._processqueueInsert(fileid, version_bump, validate=False)
+        if num and commit:
+            self.commitDB()  # commit once for all the adds
+        return num
 
-        fileid = set(fileid)
-        # drop all the values in the current_q from fileid
-        files_to_add = fileid.difference(current_q)
-
-        # are there any left?
-        if len(files_to_add) != 0:
-            for f in files_to_add:
-                pq1 = self.Processqueue()
-                pq1.file_id = f
-                pq1.version_bump = version_bump
-                self.session.add(pq1)
-                DBlogging.dblogger.debug("File added to process queue {0}:{1}".format(fileid, '---'))
-
-            if commit:
-                self.commitDB()  # commit once for all the adds
-        return len(files_to_add)
-
-    def ProcessqueueLen(self):
+    def ProcessqueueLen(self, products=None):
         """
         Return the number of files in the process queue
 
+        Parameters
+        ----------
+        products : :class:`list` of :class:`int`, optional
+            Only count files of these :sql:column:`~product.product_id`
+            (default all).
+
         Returns
         -------
         :class:`int`
             Count of files in the queue
         """
-
+        if products is not None:
+            return self._processqueueQuery(products).count()
         return self.session.query(self.Processqueue).count()
 
     def ProcessqueuePop(self, index=0):
@@ -684,7 +1039,8 @@ class DButils(object):
         """Keep only latest version of each file in the process queue.
 
         This is determined by :sql:column:`~file.product_id` and
-        :sql:column:`~file.utc_file_date`. Also sorts queue by level, date
+        :sql:column:`~file.utc_file_date`. Entries that are kept stay in
+        the order they were in the queue.
 
         Parameters
         ----------
@@ -742,26 +1098,25 @@ class DButils(object):
         DBlogging.dblogger.debug("Entering ProcessqueueClean(), there are {0} entries".format(self.ProcessqueueLen()))
         pqdata = self.ProcessqueueGetAll(version_bump=True)
         # all we need to do is look at each file and see if it is latest version or not, if it is not drop it
-        entries = []
-        version_bump = False
-        for i, pq in enumerate(pqdata):
-            # print(i, len(pqdata))
-            if pq[1] is not None:
-                entries.append(pq)  # if the version_bump is these it needs to stay in the queue
-                version_bump = True
-            else:
-                if self.fileIsNewest(pq[0]):
-                    entries.append(pq)  # if the file is newest_version than we keep it
+        # if the version_bump is there it needs to stay in the queue
+        newest = set(self.filesAreNewest([f for f, vb in pqdata if vb is None]))
+        # keyed on file_id, in the order first seen in the queue
+        entries = collections.OrderedDict()
+        for f, vb in pqdata:
+            if f not in entries and (vb is not None or f in newest):
+                entries[f] = vb
         if not dryrun:
             self.ProcessqueueFlush()
-            if not version_bump:
-                self.ProcessqueueRawadd(list(zip(*entries))[0])
-            else:
-                for f in pqdata:
-                    self.Processqueueadd(f)
+            # add back each run of the same version_bump, in queue order;
+            # commit once at the end
+            for vb, run in itertools.groupby(entries.items(),
+                                             key=itemgetter(1)):
+                self.ProcessqueueRawadd([f for f, _ in run],
+                                        version_bump=vb, commit=False)
+            self.commitDB()
         else:
             print(
-                '<dryrun> Queue cleaned leaving {0} of {1} entries'.format(len(file_entries2), self.ProcessqueueLen()))
+                '<dryrun> Queue cleaned leaving {0} of {1} entries'.format(len(entries), self.ProcessqueueLen()))
         DBlogging.dblogger.debug(
             "Done in ProcessqueueClean(), there are {0} entries left".format(self.ProcessqueueLen()))
 
@@ -794,10 +1149,88 @@ class DButils(object):
         if debug: print('latest_id', latest_id)
         return file_id == latest_id
 
-    def _purgeFileFromDB(self, filename=None, recursive=False, verbose=False, trust_id=False, commit=True):
+    def filesAreNewest(self, file_ids, chunksize=500):
+        """
+        Query the database, which of these file_ids are the newest version?
+
+        Bulk equivalent of :meth:`fileIsNewest`: rather than looking up
+        each file separately, the input is checked in chunks, each with a
+        single query. A file is newest if no other file of the same
+        :sql:column:`~file.product_id` and :sql:column:`~file.utc_file_date`
+        has a higher version.
+
+        Parameters
+        ----------
+        file_ids : :class:`~collections.abc.Iterable` of :class:`int`
+            :sql:column:`~file.file_id` of all files to check
+
+        Other Parameters
+        ----------------
+        chunksize : :class:`int`, default 500
+            Maximum number of IDs to check in a single query
+
+        Returns
+        -------
+        :class:`list` of :class:`int`
+            Those :sql:column:`~file.file_id` from ``file_ids`` which are
+            the newest version of their product and date, in the order
+            they were given. IDs not in the database are dropped.
+        """
+        if isinstance(file_ids, str_classes) \
+           or not isinstance(file_ids, collections.abc.Iterable):
+            file_ids = [file_ids]
+        file_ids = list(file_ids)
+        has_newer = self._newerExists(self.File)
+        newest = set()
+        for chunk in Utils.chunker(list(set(file_ids)), chunksize):
+            sq = self.session.query(self.File.file_id)\
+                             .filter(self.File.file_id.in_(chunk))\
+                             .filter(~has_newer)
+            newest.update(map(itemgetter(0), sq))
+        return [f for f in file_ids if f in newest]
+
+    def _newerExists(self, f):
+        """
+        Make a condition: is there a newer version of a file?
+
+        Parameters
+        ----------
+        f : :class:`~sqlalchemy.orm.util.AliasedClass`
+            :sql:table:`file` (or an alias of it) being checked; the
+            condition is correlated to it.
+
+        Returns
+        -------
+        :class:`~sqlalchemy.sql.expression.Exists`
+            True if another file of the same :sql:column:`~file.product_id`
+            and :sql:column:`~file.utc_file_date` has a higher version.
+        """
+        newer = sqlalchemy.orm.aliased(self.File)
+        return self.session.query(newer.file_id).filter(
+            newer.product_id == f.product_id,
+            newer.utc_file_date == f.utc_file_date,
+            sqlalchemy.or_(
+                newer.interface_version > f.interface_version,
+                and_(newer.interface_version == f.interface_version,
+                     newer.quality_version > f.quality_version),
+                and_(newer.interface_version == f.interface_version,
+                     newer.quality_version == f.quality_version,
+                     newer.revision_version > f.revision_version),
+            )).exists()
+
+    def _purgeFileFromDB(self, filename=None, recursive=False, verbose=False, trust_id=False, commit=True,
+                         dryrun=False):
         """
         removes a file from the DB
 
+        All files to remove (including, if ``recursive``, all descendants
+        found via :sql:table:`filefilelink`) are collected first, then all
+        references to them in :sql:table:`processqueue`,
+        :sql:table:`filefilelink`, :sql:table:`filecodelink`,
+        :sql:table:`unixtime` and :sql:table:`release` are removed in
+        bulk, followed by the :sql:table:`file` records, all in one
+        transaction.
+
         Parameters
         ----------
         filename : :class:`str` or :class:`~collections.abc.Iterable`
@@ -813,6 +1246,15 @@ class DButils(object):
             if True, assumes ``filename`` is a valid file id
         commit : :class:`bool`, default True
             Commit changes to the database when done.
+        dryrun : :class:`bool`, default False
+            Do not remove anything, only count the files which would be
+            removed.
+
+        Returns
+        -------
+        :class:`int`
+            Number of files removed from the :sql:table:`file` table (or
+            that would be removed, if ``dryrun``).
 
         Examples
         --------
@@ -823,48 +1265,55 @@ class DButils(object):
            or not isinstance(filename, collections.abc.Iterable):
             filename = [filename]
 
-        for ii, f in enumerate(filename):
-            if not trust_id:
-                try:
-                    f = self.getFileID(f)
-                except DBNoData:
-                    pass
+        file_ids = set()
+        names = []
+        for f in filename:
+            if isinstance(f, self.File):
+                file_ids.add(f.file_id)
+            elif trust_id:
+                file_ids.add(f)  # just use the id without a lookup
             else:
-                pass  # just use the id without a lookup
-
-            if recursive:
-                ids = self.session.query(self.Filefilelink.resulting_file).filter_by(source_file=f).all()
-                for fid in ids:
-                    self._purgeFileFromDB(filename=fid.resulting_file, recursive=True, verbose=verbose)
-
-            if verbose:
-                print(ii, len(filename), f)
-
-            # we need to look in each table that could have a reference to this file and delete that
-            try:  ## processqueue
-                self.ProcessqueueRemove(f)
-            except DBNoData:
-                pass
-
-            try:  ## filefilelink
-                self.delFilefilelink(f)
-            except DBNoData:
-                pass
-
-            try:  ## filecodelink
-                self.delFilecodelink(f)
-            except DBNoData:
-                pass
-
-            try:  ## file
-                self.session.delete(self.getEntry('File', f))
-            except DBNoData:
-                pass
-
-            DBlogging.dblogger.info("File removed from db {0}".format(f))
+                try:
+                    file_ids.add(int(f))
+                except ValueError:
+                    names.append(f)
+        for chunk in Utils.chunker(names, 500):
+            sq = self.session.query(self.File.file_id)\
+                             .filter(self.File.filename.in_(chunk))
+            file_ids.update(map(itemgetter(0), sq))
+
+        if recursive:
+            file_ids.update(self.getFileDescendants(file_ids, id_only=True))
+        file_ids = sorted(file_ids)
+
+        # we need to look in each table that could have a reference to this file and delete that
+        refs = [(self.Processqueue, ['file_id']),
+                (self.Filefilelink, ['source_file', 'resulting_file']),
+                (self.Filecodelink, ['resulting_file']),
+                (self.Release, ['file_id'])]
+        if hasattr(self, 'Unixtime'):
+            refs.append((self.Unixtime, ['file_id']))
+        refs.append((self.File, ['file_id']))  # last, after all references
+        removed = 0
+        for tbl, columns in refs:
+            for column in columns:
+                for chunk in Utils.chunker(file_ids, 500):
+                    sq = self.session.query(tbl).filter(
+                        getattr(tbl, column).in_(chunk))
+                    n = sq.count() if dryrun else sq.delete()
+                    if tbl is self.File:
+                        removed += n
+                    if verbose and n:
+                        print('{0}: {1} {2} records'.format(
+                            tbl.__name__.lower(),
+                            'would remove' if dryrun else 'removed', n))
+        if dryrun:
+            return removed
+        DBlogging.dblogger.info("{0} files removed from db: {1}".format(removed, file_ids))
 
         if commit:
             self.commitDB()
+        return removed
 
     def getAllSatellites(self):
         """
@@ -967,7 +1416,13 @@ class DButils(object):
             Filename of all files matching requirements.
         """
 
-        files = self.getFiles(startDate, endDate, level, product, code, instrument, exists, newest_version, limit)
+        if limit is None:
+            files = self.iterFiles(startDate, endDate, level, product, code, instrument, exists, newest_version,
+                                   columns=['file_id', 'filename'])
+        else:
+            # limit selects different files in iterFiles; keep getFiles's
+            files = self.getFiles(startDate, endDate, level, product, code, instrument, exists, newest_version,
+                                  limit)
 
         if fullPath:
             # Get file_id instead, saves time since getFileFullPath gets the ID anyway
@@ -1401,6 +1856,48 @@ class DButils(object):
         self.commitDB()
         return ffl1.source_file, ffl1.resulting_file
 
+    def addProvenance(self, resulting_file_id, source_code, source_files):
+        """
+        Add all provenance links for a newly-made file
+
+        Links a file to the code that made it (:sql:table:`filecodelink`)
+        and to all of its input files (:sql:table:`filefilelink`). All
+        links are inserted in one statement per table and committed
+        together; equivalent to :meth:`addFilecodelink` followed by
+        :meth:`addFilefilelink` for each input.
+
+        Parameters
+        ----------
+        resulting_file_id : :class:`int`
+            :sql:column:`~file.file_id` of the created file
+        source_code : :class:`int`
+            :sql:column:`~code.code_id` of the code that created the file
+        source_files : :class:`list` of :class:`int`
+            :sql:column:`~file.file_id` of all input files. Duplicates
+            are only linked once.
+
+        Raises
+        ------
+        DBError
+            if any link cannot be made (e.g. already exists); no links
+            are added.
+        """
+        source_files = list(collections.OrderedDict.fromkeys(source_files))
+        try:
+            self.session.execute(
+                self.metadata.tables['filecodelink'].insert(),
+                {'resulting_file': resulting_file_id,
+                 'source_code': source_code})
+            if source_files:
+                self.session.execute(
+                    self.metadata.tables['filefilelink'].insert(),
+                    [{'source_file': f, 'resulting_file': resulting_file_id}
+                     for f in source_files])
+        except IntegrityError as IE:
+            self.session.rollback()
+            raise DBError(IE)
+        self.commitDB()
+
     def addInstrumentproductlink(self,
                                  instrument_id,
                                  product_id):
@@ -1925,8 +2422,7 @@ class DButils(object):
             r.file_id = d1.file_id
             # Round times down so they don't slide into next second
             # (and potentially next day)
-            # If changed, also change getFiles, addUnixTimeTable,
-            # updateUnixTime.py
+            # If changed, also change getFiles, _unixTime
             r.unix_start = None if utc_start_time is None \
                            else int((utc_start_time - unx0)\
                                     .total_seconds())
@@ -2005,6 +2501,90 @@ class DButils(object):
                                  self.getFileVersion(file_entry.file_id))
         return path
 
+    def _filePathColumns(self):
+        """
+        Columns needed to build the full path of a file
+
+        Returns
+        -------
+        :class:`list`
+            Columns of :sql:table:`file` and :sql:table:`product` (so
+            query must join them) for :meth:`_filePath`.
+        """
+        return [self.File.file_id, self.File.filename,
+                self.File.utc_file_date, self.File.utc_start_time,
+                self.File.interface_version, self.File.quality_version,
+                self.File.revision_version, self.Product.relative_path]
+
+    def _filePath(self, row):
+        """
+        Build full path to a file from a database row
+
+        Equivalent to :meth:`getFileFullPath` without any queries.
+
+        Parameters
+        ----------
+        row
+            Query result including all columns from
+            :meth:`_filePathColumns`.
+
+        Returns
+        -------
+        :class:`str`
+            Full path to the file.
+        """
+        path = os.path.join(
+            self.MissionDirectory,
+            *(row.relative_path.split(posixpath.sep) + [row.filename]))
+        if '{' in path:
+            path = Utils.dirSubs(
+                path, row.filename, row.utc_file_date, row.utc_start_time,
+                Version.Version(row.interface_version, row.quality_version,
+                                row.revision_version))
+        return path
+
+    def _iterFilePaths(self, after=None, limit=None, batchsize=1000):
+        """
+        Iterate over file ID, name, full path and checksum of all files
+
+        Fetches files in batches of increasing
+        :sql:column:`~file.file_id`, one query per batch (so no cursor
+        is held open between batches) and builds the path as in
+        :meth:`getFileFullPath`.
+
+        Parameters
+        ----------
+        after : :class:`int`, optional
+            Only files with :sql:column:`~file.file_id` greater than this
+            (default all).
+        limit : :class:`int`, optional
+            Maximum number of files (default all).
+        batchsize : :class:`int`, default 1000
+            Number of files to fetch per query.
+
+        Yields
+        ------
+        :class:`list` of :class:`tuple`
+            Each batch of files. Each element is (:sql:column:`~file.file_id`,
+            :sql:column:`~file.filename`, full path,
+            :sql:column:`~file.shasum`), in order by ID.
+        """
+        columns = self._filePathColumns() + [self.File.shasum]
+        while limit is None or limit > 0:
+            n = batchsize if limit is None else min(batchsize, limit)
+            q = self.session.query(*columns).join(
+                self.Product, self.File.product_id == self.Product.product_id)
+            if after is not None:
+                q = q.filter(self.File.file_id > after)
+            rows = q.order_by(self.File.file_id).limit(n).all()
+            if not rows:
+                return
+            yield [(r.file_id, r.filename, self._filePath(r), r.shasum)
+                   for r in rows]
+            after = rows[-1].file_id
+            if limit is not None:
+                limit -= len(rows)
+
     def getProcessFromInputProduct(self, product):
         """
         Given a product id return all the processes that use that as an input
@@ -2086,7 +2666,9 @@ class DButils(object):
             if proc_name is None:
                 raise NoResultFound('No row was found for id={0}'.format(proc_id))
         except ValueError:  # it is not a number
-            proc_id = self.session.query(self.Process.process_id).filter_by(process_name=proc_name).one()[0]
+            proc_id = self.session.execute(
+                self._statement('processIDByName'),
+                {'process_name': proc_name}).one()[0]
         return proc_id
 
     def getSatelliteMission(self, sat_name):
@@ -2209,9 +2791,10 @@ class DButils(object):
         except TypeError:  # came in as list or tuple
             return list(map(self.getFileID, filename))
         except ValueError:
-            sq = self.session.query(self.File).filter_by(filename=filename).first()
-            if sq is not None:
-                return sq.file_id
+            f_id = self.session.execute(self._statement('fileIDByName'),
+                                        {'filename': filename}).scalar()
+            if f_id is not None:
+                return f_id
             else:  # no file_id found
                 raise DBNoData("No filename %s found in the DB" % (filename))
 
@@ -2381,6 +2964,154 @@ class DButils(object):
         :class:`list`
             File records of all files matching requirements.
         """
+        files = self._filesQuery([self.File], startDate, endDate, level,
+                                 product, code, instrument, exists,
+                                 startTime, endTime)
+
+        if newest_version:
+            files = files.order_by(self.File.interface_version, self.File.quality_version, self.File.revision_version)
+            x = files.limit(limit).all()
+
+            # Last item wins. https://stackoverflow.com/questions/39678672/is-a-python-dict-comprehension-always-last-wins-if-there-are-duplicate-keys
+            out = dict([((i.product_id, i.utc_file_date), i) for i in x])
+            return list(out.values())
+        else:
+            return files.limit(limit).all()
+
+    def iterFiles(self,
+                  startDate=None,
+                  endDate=None,
+                  level=None,
+                  product=None,
+                  code=None,
+                  instrument=None,
+                  exists=None,
+                  newest_version=False,
+                  limit=None,
+                  startTime=None,
+                  endTime=None,
+                  columns=None,
+                  yield_per=1000):
+        """
+        Iterate over file records, with filters.
+
+        Streaming version of :meth:`getFiles`: records are fetched from
+        the database in batches (using a server-side cursor where
+        supported) rather than all at once, so memory use does not depend
+        on the number of files. Selecting only the ``columns`` needed
+        is faster than loading the complete record.
+
+        All filters are optional and identical to :meth:`getFiles`.
+
+        Parameters
+        ----------
+        startDate : :class:`~datetime.datetime`, optional
+            First date to include, based on
+            :sql:column:`~file.utc_file_date`
+        endDate : :class:`~datetime.datetime`, optional
+            Last date to include (inclusive)
+        level : :class:`float`, optional
+            Only include files of this level.
+        product : :class:`int`, optional
+            :sql:column:`~product.product_id` of files to include
+        code : :class:`int`, optional
+            Only return files created by code with ID of
+            :sql:column:`~code.code_id`
+        instrument : :class:`int`, optional
+            Only return files with instrument
+            :sql:column:`~instrument.instrument_id`
+        exists : :class:`bool`, default False
+            Only return files that exist on disk, based on
+            :sql:column:`~file.exists_on_disk`.
+        newest_version : :class:`bool`, default False
+            Only return files that are the newest version
+            (of their product and date)
+        limit : :class:`int`
+            Limit number of results (before selecting newest version),
+            default all. Applied after sorting in the order of the
+            results (see below), so this may select different files than
+            the same ``limit`` in :meth:`getFiles`.
+        startTime : :class:`~datetime.datetime`, optional
+            Include files containing timestamps at or after this time,
+            :sql:column:`~file.utc_start_time`
+        endTime : :class:`~datetime.datetime`, optional
+            Include files containing timestamps at or before this time,
+            :sql:column:`~file.utc_stop_time`
+        columns : :class:`list` of :class:`str`, optional
+            Names of columns of :sql:table:`file` to return (default:
+            complete record). If ``newest_version``,
+            :sql:column:`~file.product_id` and
+            :sql:column:`~file.utc_file_date` are always included.
+        yield_per : :class:`int`, default 1000
+            Number of records to fetch from the database at once.
+
+        Yields
+        ------
+        various
+            File record for each file matching requirements, or a
+            :class:`tuple`-like row with attributes named by ``columns``.
+            Ordered by :sql:column:`~file.file_id`, or if
+            ``newest_version``, by :sql:column:`~file.product_id` and
+            :sql:column:`~file.utc_file_date`.
+
+        See Also
+        --------
+        getFiles
+        """
+        if columns is None:
+            entities = [self.File]
+        else:
+            columns = list(columns)
+            if newest_version:
+                columns.extend(c for c in ('product_id', 'utc_file_date')
+                               if c not in columns)
+            entities = [getattr(self.File, c) for c in columns]
+        files = self._filesQuery(entities, startDate, endDate, level,
+                                 product, code, instrument, exists,
+                                 startTime, endTime)
+        if newest_version:
+            # Versions of a product/date are adjacent, newest last
+            files = files.order_by(self.File.product_id,
+                                   self.File.utc_file_date,
+                                   self.File.interface_version,
+                                   self.File.quality_version,
+                                   self.File.revision_version)
+        else:
+            files = files.order_by(self.File.file_id)
+        files = files.limit(limit).yield_per(yield_per)
+        if not newest_version:
+            for f in files:
+                yield f
+            return
+        last = None
+        for f in files:
+            if last is not None and (last.product_id, last.utc_file_date) \
+               != (f.product_id, f.utc_file_date):
+                yield last
+            last = f
+        if last is not None:
+            yield last
+
+    def _filesQuery(self, entities, startDate=None, endDate=None, level=None,
+                    product=None, code=None, instrument=None, exists=None,
+                    startTime=None, endTime=None):
+        """
+        Build query on the file table, with filters.
+
+        Common implementation of :meth:`getFiles` and :meth:`iterFiles`;
+        see those for the meaning of the filters. Does not apply
+        ``newest_version`` or ``limit``.
+
+        Parameters
+        ----------
+        entities : :class:`list`
+            What to query, e.g. the ``File`` class or columns of it.
+
+        Returns
+        -------
+        :class:`~sqlalchemy.orm.Query`
+            Query for the requested entities, with filters applied.
+        """
         # if a datetime.datetime comes in this does not work, make them datetime.date
         startDate = Utils.datetimeToDate(startDate)
         endDate = Utils.datetimeToDate(endDate)
@@ -2390,7 +3121,7 @@ class DButils(object):
         # and non-truncated start time of file is 1.6) but better than
         # missing a file that does overlap (e.g requested start time is 1.2
         # and non-truncated file start is 1.6, truncates to 1.0)
-        # If changed, also change addFile, addUnixTimeTable, updateUnixTime.py
+        # If changed, also change addFile, _unixTime
         if startTime is not None:
             startTime = Utils.toDatetime(startTime)
             if unixtime:
@@ -2402,7 +3133,7 @@ class DButils(object):
                 endTime = int((endTime - datetime.datetime(1970, 1, 1))\
                               .total_seconds())
 
-        files = self.session.query(self.File)
+        files = self.session.query(*entities)
 
         if product is not None:
             files = files.filter_by(product_id=product)
@@ -2433,22 +3164,51 @@ class DButils(object):
 
         if unixtime and (startTime is not None or endTime is not None):
             files = files.join(self.Unixtime)
+            if self._intervalIndex:
+                files = files.filter(self._intervalOverlap(startTime, endTime))
         if startTime is not None:
             files = files.filter((self.Unixtime.unix_stop if unixtime
                                   else self.File.utc_stop_time) >= startTime)
         if endTime is not None:
             files = files.filter((self.Unixtime.unix_start if unixtime
                                   else self.File.utc_start_time) <= endTime)
+        return files
 
-        if newest_version:
-            files = files.order_by(self.File.interface_version, self.File.quality_version, self.File.revision_version)
-            x = files.limit(limit).all()
+    def _intervalOverlap(self, start, stop):
+        """
+        Build filter on interval index for files overlapping a time range
 
-            # Last item wins. https://stackoverflow.com/questions/39678672/is-a-python-dict-comprehension-always-last-wins-if-there-are-duplicate-keys
-            out = dict([((i.product_id, i.utc_file_date), i) for i in x])
-            return list(out.values())
-        else:
-            return files.limit(limit).all()
+        This only selects the candidate files quickly; the caller must
+        still compare the Unix times, as the index may not be exact.
+
+        Parameters
+        ----------
+        start : :class:`int`
+            Unix time of start of range, or :data:`None` for unbounded.
+        stop : :class:`int`
+            Unix time of end of range (inclusive), or :data:`None` for
+            unbounded.
+
+        Returns
+        -------
+        :class:`~sqlalchemy.sql.expression.ColumnElement`
+            Filter expression using the interval index.
+        """
+        if self.engine.dialect.name == 'postgresql':
+            closed = sqlalchemy.literal_column("'[]'")
+            return func.int8range(
+                self.Unixtime.unix_start, self.Unixtime.unix_stop, closed)\
+                .op('&&')(func.int8range(start, stop, closed))
+        rtree = sqlalchemy.table(
+            tables.interval_index, sqlalchemy.column('id'),
+            sqlalchemy.column('unix_start'), sqlalchemy.column('unix_stop'))
+        overlap = []
+        if start is not None:
+            overlap.append(rtree.c.unix_stop >= start)
+        if stop is not None:
+            overlap.append(rtree.c.unix_start <= stop)
+        return self.Unixtime.file_id.in_(
+            sqlalchemy.select([rtree.c.id]).where(and_(*overlap)))
 
     def getFilesByProductDate(self, product_id, daterange, newest_version=False):
         """
@@ -2656,8 +3416,14 @@ class DButils(object):
         fullPath : :class:`bool`, default True
             unused
         """
-        files = self.getFiles(startDate=startDate, endDate=endDate, level=level, product=product, code=code,
-                              instrument=instrument, exists=exists, newest_version=newest_version, limit=limit)
+        if limit is None:
+            files = self.iterFiles(startDate=startDate, endDate=endDate, level=level, product=product, code=code,
+                                   instrument=instrument, exists=exists, newest_version=newest_version,
+                                   columns=['file_id'])
+        else:
+            # limit selects different files in iterFiles; keep getFiles's
+            files = self.getFiles(startDate=startDate, endDate=endDate, level=level, product=product, code=code,
+                                  instrument=instrument, exists=exists, newest_version=newest_version, limit=limit)
 
         return list(map(attrgetter('file_id'), files))  # this is faster than a list comprehension
 
@@ -2731,11 +3497,12 @@ class DButils(object):
         if is_sequence: # Call for every input
             return list(map(self.getProductID, product_name))
         if is_name: # Product name, just get ID
-            sq = self.session.query(self.Product).filter_by(product_name=product_name)
             # if two products have the same name always return the lower id one
-            res = sorted([x.product_id for x in sq])
-            if res:
-                return res[0]
+            p_id = self.session.execute(self._statement('productIDByName'),
+                                        {'product_name': product_name})\
+                               .scalar()
+            if p_id is not None:
+                return p_id
             # no file_id found
             raise DBNoData("No product_name %s found in the DB" % (product_name))
         # Numerical product ID, make sure it exists
@@ -2869,13 +3636,12 @@ class DButils(object):
         """
         DBlogging.dblogger.debug("Entered getCodeFromProcess: {0}".format(proc_id))
         # will have as many values as there are codes for a process
-        sq = (self.session.query(self.Code.code_id).filter_by(process_id=proc_id)
-              .filter_by(newest_version=True)
-              .filter_by(active_code=True).filter(self.Code.code_start_date <= utc_file_date)
-              .filter(self.Code.code_stop_date >= utc_file_date))
-        if sq.count() == 0:
+        sq = self.session.execute(self._statement('codeFromProcess'),
+                                  {'process_id': proc_id,
+                                   'utc_file_date': utc_file_date}).fetchall()
+        if len(sq) == 0:
             return None
-        elif sq.count() > 1:
+        elif len(sq) > 1:
             raise DBError('More than one code active for a Given day')
         return sq[0].code_id
 
@@ -3088,21 +3854,41 @@ class DButils(object):
         """
         Tag all the newest versions of files to a release number (integer)
 
+        Done as a single ``INSERT INTO release SELECT ...`` of the newest
+        files, so no files are read into Python. Files already in the
+        release are skipped.
+
         Parameters
         ----------
         rel_num : :class:`int`
             Tag all "newest version" files as part of this release.
 
+        Returns
+        -------
+        :class:`int`
+            Number of files added to the release.
+
         See Also
         --------
         :ref:`concepts_releases`
         """
-        newest_files = self.getFiles(newest_version=True)
-
-        for f in newest_files:
-            self.addRelease(f, rel_num, commit=False)
+        self.session.flush()  # Core statement below bypasses the ORM
+        reltable = self.metadata.tables['release']
+        release_num = sqlalchemy.cast(sqlalchemy.literal(str(rel_num)),
+                                      reltable.c.release_num.type)
+        src = self.session.query(self.File.file_id, release_num)\
+            .filter(~self._newerExists(self.File))\
+            .filter(~sqlalchemy.exists().where(and_(
+                reltable.c.file_id == self.File.file_id,
+                reltable.c.release_num == str(rel_num))))\
+            .order_by(self.File.file_id)
+        res = self.session.connection().execute(
+            reltable.insert().from_select(['file_id', 'release_num'],
+                                          src.statement))
         self.commitDB()
-        return len(newest_files)
+        DBlogging.dblogger.debug("{0} files added to release {1}"
+                                 .format(res.rowcount, rel_num))
+        return res.rowcount
 
     def addRelease(self, filename, release, commit=False):
         """
@@ -3144,16 +3930,51 @@ class DButils(object):
         Returns
         -------
         :class:`list` of :class:`str`
-            All filenames in the release.
+            All filenames in the release, in order by
+            :sql:column:`~file.file_id`.
+
+        See Also
+        --------
+        iterRelease
         """
-        sq = self.session.query(self.Release.file_id).filter_by(release_num=rel_num).all()
-        sq = list(map(itemgetter(0), sq))
-        for i, v in enumerate(sq):
-            if fullpath:
-                sq[i] = self.getFileFullPath(v)
-            else:
-                sq[i] = self.getEntry('File', v).filename
-        return sq
+        return [path if fullpath else filename
+                for filename, path, shasum in self.iterRelease(rel_num)]
+
+    def iterRelease(self, rel_num, yield_per=1000):
+        """
+        Iterate over the files in a release, with path and checksum
+
+        Files are read in one query joining :sql:table:`release`,
+        :sql:table:`file` and :sql:table:`product`, fetched from the
+        database in batches; paths are built without further queries.
+
+        Parameters
+        ----------
+        rel_num : :class:`int`
+            Release number to list
+        yield_per : :class:`int`, default 1000
+            Number of files to fetch from the database at once.
+
+        Yields
+        ------
+        :class:`tuple` of :class:`str`
+            :sql:column:`~file.filename`, full path, and
+            :sql:column:`~file.shasum` (as stored in the database)
+            of each file in the release, in order by
+            :sql:column:`~file.file_id`.
+
+        See Also
+        --------
+        :ref:`concepts_releases`
+        """
+        q = self.session.query(*(self._filePathColumns()
+                                 + [self.File.shasum]))\
+            .join(self.Product, self.File.product_id == self.Product.product_id)\
+            .join(self.Release, self.Release.file_id == self.File.file_id)\
+            .filter(self.Release.release_num == str(rel_num))\
+            .order_by(self.File.file_id)
+        for row in q.yield_per(yield_per):
+            yield row.filename, self._filePath(row), row.shasum
 
     def checkFileSHA(self, file_id):
         """
@@ -3176,7 +3997,71 @@ class DButils(object):
 
         return disk_sha == db_sha
 
-    def checkFiles(self, limit=None):
+    def verifyFiles(self, limit=None, processes=1, batchsize=1000,
+                    checkpoint=None):
+        """
+        Check checksums of files on disk against the database
+
+        Files are read in order of :sql:column:`~file.file_id` and
+        hashed in a pool of worker processes, so that several files can be
+        read at once. Only one batch of files is in progress at a time,
+        so the number of files being read at once (and memory use) is
+        bounded by ``processes`` and ``batchsize``.
+
+        Progress can be saved to a checkpoint file after every batch, so
+        an interrupted check can be resumed from the last complete batch.
+
+        Parameters
+        ----------
+        limit : :class:`int`, optional
+            Maximum number of files to check, default all
+        processes : :class:`int`, default 1
+            Number of files to hash at once. If 1, hash in this process.
+        batchsize : :class:`int`, default 1000
+            Number of files to fetch from the database and hash per batch.
+        checkpoint : :class:`str`, optional
+            Path to a checkpoint file. If it exists, resume after the
+            last file recorded in it; after each batch, record the last
+            file checked. Default: no checkpoint, check all files.
+
+        Yields
+        ------
+        :class:`tuple`
+            For each file, (:sql:column:`~file.file_id`,
+            :sql:column:`~file.filename`, result, size) where "result" is 0
+            if the checksum matches, 1 for a bad checksum and 2 if file not
+            found on disk; "size" is number of bytes read.
+
+        See Also
+        --------
+        checkFiles
+        """
+        after = None
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                after = json.load(f)['last_file_id']
+            DBlogging.dblogger.info('Resuming checksum verification after'
+                                    ' file_id {0}'.format(after))
+        pool = multiprocessing.Pool(processes) if processes > 1 else None
+        try:
+            for batch in self._iterFilePaths(after=after, limit=limit,
+                                             batchsize=batchsize):
+                work = [(path, shasum) for _, _, path, shasum in batch]
+                results = pool.map(_checkDigest, work) if pool \
+                          else list(map(_checkDigest, work))
+                for (f_id, fname, _, _), (res, size) in zip(batch, results):
+                    yield f_id, fname, res, size
+                if checkpoint is not None:
+                    tmp = checkpoint + '.tmp'
+                    with open(tmp, 'w') as f:
+                        json.dump({'last_file_id': batch[-1][0]}, f)
+                    os.replace(tmp, checkpoint)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def checkFiles(self, limit=None, processes=1):
         """
         Check files in the DB, return inconsistent files and why
 
@@ -3184,6 +4069,8 @@ class DButils(object):
         ----------
         limit : :class:`int`
             Maximum number of files to check, default all
+        processes : :class:`int`, default 1
+            Number of files to check at once; see :meth:`verifyFiles`.
 
         Returns
         -------
@@ -3192,16 +4079,9 @@ class DButils(object):
             (:sql:column:`~file.filename`, result), where "result" is 1
             for a bad checksum and 2 if file not found on disk.
         """
-        files = self.getAllFilenames(fullPath=False, limit=limit)
-        ## check of existence and checksum
-        bad_list = []
-        for f in files:
-            try:
-                if not self.checkFileSHA(f):
-                    bad_list.append((f, 1))
-            except DigestError:
-                bad_list.append((f, 2))
-        return bad_list
+        return [(fname, res) for _, fname, res, _
+                in self.verifyFiles(limit=limit, processes=processes)
+                if res]
 
     def getTraceback(self, table, in_id, in_id2=None):
         """
@@ -3544,8 +4424,8 @@ class DButils(object):
             retval = self.session.query(getattr(self, table)).get(args)
         if retval is None:  # Not valid PK type, or PK not found
             # see if it was a name
-            if ('get' + table + 'ID') in dir(self):
-                cmd = 'get' + table + 'ID'
+            cmd = self._nameLookups.get(table)
+            if cmd is not None:
                 pk = getattr(self, cmd)(args)
                 retval = self.session.query(getattr(self, table)).get(pk)
 # This code will make it consistently raise DBNoData if nothing is found,
@@ -3578,12 +4458,164 @@ class DButils(object):
         f_ids = self.session.query(self.Filefilelink.source_file).filter_by(resulting_file=file_id).all()
         if not f_ids:
             return []
-            
+
         f_ids = list(map(itemgetter(0), f_ids))
         if id_only:
             return f_ids
 
-        return [self.getEntry('File', val) for val in f_ids]
+        # One query for all parents, returned in same order as the ids
+        files = dict((f.file_id, f) for f in self.session.query(self.File)
+                     .filter(self.File.file_id.in_(f_ids)))
+        if len(files) != len(set(f_ids)):
+            raise DBNoData('No file_id {0} found in the DB'.format(
+                sorted(set(f_ids).difference(files))))
+        return [files[val] for val in f_ids]
+
+    def _fileLineage(self, file_ids, ancestors, depth=None, id_only=False,
+                     edges=False):
+        """
+        Find all ancestors or descendants of files
+
+        Implementation of :meth:`getFileAncestors` and
+        :meth:`getFileDescendants`: follows :sql:table:`filefilelink`
+        with a recursive query, so the entire lineage (and links) is
+        returned in one round trip for each 500 starting files.
+
+        Parameters
+        ----------
+        file_ids : :class:`int`, :class:`str`, or :class:`list`
+            :sql:column:`~file.file_id` or :sql:column:`~file.filename`
+            (or a list of them) of the starting files.
+        ancestors : :class:`bool`
+            Follow links to inputs (True) or outputs (False).
+
+        Other Parameters
+        ----------------
+        depth : :class:`int`, optional
+            Maximum number of links to follow (default: unlimited).
+        id_only : :class:`bool`, default False
+            Return only the :sql:column:`~file.file_id`
+        edges : :class:`bool`, default False
+            Also return the links followed.
+        """
+        if isinstance(file_ids, str_classes) \
+           or not isinstance(file_ids, collections.abc.Iterable):
+            file_ids = [file_ids]
+        # Look up names, but don't verify each numerical ID exists
+        file_ids = set(f if isinstance(f, int) else self.getFileID(f)
+                       for f in file_ids)
+        ffl = self.metadata.tables['filefilelink']
+        # Follow from "near" end of the link to "far" end
+        near, far = (ffl.c.resulting_file, ffl.c.source_file) if ancestors \
+                    else (ffl.c.source_file, ffl.c.resulting_file)
+        records = {}
+        links = set()
+        for chunk in Utils.chunker(sorted(file_ids), 500):
+            cols = [far.label('file_id'), near.label('linked_from')]
+            if depth is not None:
+                cols.append(sqlalchemy.literal(1).label('depth'))
+            cte = sqlalchemy.select(cols).where(near.in_(chunk))\
+                            .cte('lineage', recursive=True)
+            # Without depth column, UNION de-duplicates and a cycle terminates
+            cols = [far, near]
+            if depth is not None:
+                cols.append(cte.c.depth + 1)
+            step = sqlalchemy.select(cols).where(near == cte.c.file_id)
+            if depth is not None:
+                step = step.where(cte.c.depth < depth)
+            cte = cte.union(step)
+            if id_only:
+                sq = self.session.query(cte.c.file_id, cte.c.linked_from)
+            else:
+                sq = self.session.query(self.File, cte.c.linked_from)\
+                                 .join(cte, cte.c.file_id == self.File.file_id)
+            for rec, linked_from in sq:
+                f_id = rec if id_only else rec.file_id
+                records[f_id] = rec
+                links.add((f_id, linked_from) if ancestors
+                          else (linked_from, f_id))
+        records = [records[k] for k in sorted(records)]
+        if edges:
+            return records, sorted(links)
+        return records
+
+    def getFileAncestors(self, file_ids, depth=None, id_only=False,
+                         edges=False):
+        """
+        Given files, return all files that went into making them
+
+        Includes parents, parents of parents, etc., found with a single
+        recursive query on :sql:table:`filefilelink`.
+
+        Parameters
+        ----------
+        file_ids : :class:`int`, :class:`str`, or :class:`list`
+            :sql:column:`~file.file_id` or :sql:column:`~file.filename`
+            (or a list of them) of the files of interest.
+        depth : :class:`int`, optional
+            Maximum number of generations to go back, e.g. 1 for
+            parents only (default: all).
+        id_only : :class:`bool`, default False
+            Return only the :sql:column:`~file.file_id`,
+            instead of the entire record.
+        edges : :class:`bool`, default False
+            Also return all links between files.
+
+        Returns
+        -------
+        :class:`list`
+            Complete :sql:table:`file` records for all ancestors, or just
+            :sql:column:`~file.file_id` (if ``id_only``), sorted by
+            :sql:column:`~file.file_id`. If ``edges``, a :class:`tuple`
+            of this list and a list of all links as
+            (:sql:column:`~filefilelink.source_file`,
+            :sql:column:`~filefilelink.resulting_file`).
+
+        See Also
+        --------
+        getFileParents, getFileDescendants
+        """
+        return self._fileLineage(file_ids, True, depth=depth,
+                                 id_only=id_only, edges=edges)
+
+    def getFileDescendants(self, file_ids, depth=None, id_only=False,
+                           edges=False):
+        """
+        Given files, return all files which were made from them
+
+        Includes children, children of children, etc., found with a single
+        recursive query on :sql:table:`filefilelink`.
+
+        Parameters
+        ----------
+        file_ids : :class:`int`, :class:`str`, or :class:`list`
+            :sql:column:`~file.file_id` or :sql:column:`~file.filename`
+            (or a list of them) of the files of interest.
+        depth : :class:`int`, optional
+            Maximum number of generations to go forward, e.g. 1 for
+            children only (default: all).
+        id_only : :class:`bool`, default False
+            Return only the :sql:column:`~file.file_id`,
+            instead of the entire record.
+        edges : :class:`bool`, default False
+            Also return all links between files.
+
+        Returns
+        -------
+        :class:`list`
+            Complete :sql:table:`file` records for all descendants, or just
+            :sql:column:`~file.file_id` (if ``id_only``), sorted by
+            :sql:column:`~file.file_id`. If ``edges``, a :class:`tuple`
+            of this list and a list of all links as
+            (:sql:column:`~filefilelink.source_file`,
+            :sql:column:`~filefilelink.resulting_file`).
+
+        See Also
+        --------
+        getFileAncestors
+        """
+        return self._fileLineage(file_ids, False, depth=depth,
+                                 id_only=id_only, edges=edges)
 
     def getFileVersion(self, fileid):
         """
@@ -3851,7 +4883,8 @@ class DButils(object):
 
         Used for migrating databases; doing file searches based on the
         Unix time is faster than the UTC timestamp. This will also
-        populate the time columns from a file's UTC start/stop time.
+        populate the time columns from a file's UTC start/stop time
+        (see :meth:`fillUnixTime`).
 
         Raises
         ------
@@ -3865,17 +4898,151 @@ class DButils(object):
         self.metadata.create_all(tables=[unixtime])
         # Make object for the new table definition (skips existing tables)
         self._createTableObjects()
-        unx0 = datetime.datetime(1970, 1, 1)
-        for f in self.getFiles(): # Populate the times
-            r = self.Unixtime()
-            r.file_id = f.file_id
-            # If changed, also change addFile, getFiles, updateUnixTime.py
-            r.unix_start = int((f.utc_start_time - unx0)\
-                               .total_seconds())
-            r.unix_stop = int((f.utc_stop_time - unx0)\
-                              .total_seconds())
-            self.session.add(r)
+        for _ in self.fillUnixTime():  # Populate the times
+            pass
+
+    def _unixTime(self, column):
+        """
+        Make a SQL expression for the Unix time of a timestamp column
+
+        Parameters
+        ----------
+        column : :class:`~sqlalchemy.schema.Column`
+            UTC timestamp column, e.g. :sql:column:`~file.utc_start_time`.
+
+        Returns
+        -------
+        :class:`~sqlalchemy.sql.expression.ColumnElement`
+            Integer seconds since 1970-01-01, truncated, using the
+            dialect's epoch extraction.
+        """
+        # If changed, also change addFile, getFiles
+        if self.engine.dialect.name == 'postgresql':
+            return sqlalchemy.cast(
+                func.trunc(func.extract('epoch', column)),
+                sqlalchemy.BigInteger)
+        # Drop fractional seconds; strftime would round them
+        return sqlalchemy.cast(
+            func.strftime('%s', func.substr(column, 1, 19)),
+            sqlalchemy.Integer)
+
+    def fillUnixTime(self, update=False, batchsize=10000, checkpoint=None):
+        """
+        Populate the Unix time table from files' UTC start/stop time
+
+        Files are processed in batches of increasing
+        :sql:column:`~file.file_id`; each batch is one ``INSERT ...
+        SELECT`` (and, if ``update``, one ``UPDATE``) computing the time
+        in the database, committed before the next batch.
+
+        Progress can be saved to a checkpoint file after every batch, so
+        an interrupted run can be resumed from the last complete batch.
+        Without a checkpoint, files which already have a Unix time are
+        skipped (unless ``update``), so rerunning also resumes.
+
+        Parameters
+        ----------
+        update : :class:`bool`, default False
+            Also rewrite existing Unix times (default: only add Unix
+            times for files which do not have one).
+        batchsize : :class:`int`, default 10000
+            Number of files per batch.
+        checkpoint : :class:`str`, optional
+            Path to a checkpoint file. If it exists, resume after the
+            last file recorded in it; after each batch, record the last
+            file done. Removed when all files are done. Default: no
+            checkpoint, process all files.
+
+        Yields
+        ------
+        :class:`tuple` of :class:`int`
+            After each batch, the last :sql:column:`~file.file_id` in
+            the batch and the number of Unix times added or updated.
+
+        Raises
+        ------
+        RuntimeError
+            If the Unix time table does not exist
+        """
+        if not hasattr(self, 'Unixtime'):
+            raise RuntimeError('Unixtime table does not exist.')
+        after = None
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                after = json.load(f)['last_file_id']
+            DBlogging.dblogger.info('Resuming Unix time update after'
+                                    ' file_id {0}'.format(after))
+        filetable = self.metadata.tables['file']
+        unixtable = self.metadata.tables['unixtime']
+        start = self._unixTime(filetable.c.utc_start_time)
+        stop = self._unixTime(filetable.c.utc_stop_time)
+        self.session.flush()  # Core statements below bypass the ORM
+        while True:
+            q = self.session.query(self.File.file_id)
+            if after is not None:
+                q = q.filter(self.File.file_id > after)
+            last = q.order_by(self.File.file_id).offset(batchsize - 1)\
+                .limit(1).scalar()
+            if last is None:  # Partial batch
+                last = q.with_entities(func.max(self.File.file_id)).scalar()
+                if last is None:  # All done, so next run starts over
+                    if checkpoint is not None and os.path.exists(checkpoint):
+                        os.remove(checkpoint)
+                    return
+            conn = self.session.connection()
+            count = 0
+            if update:
+                in_batch = unixtable.c.file_id <= last
+                if after is not None:
+                    in_batch = and_(unixtable.c.file_id > after, in_batch)
+                count += conn.execute(
+                    unixtable.update().where(in_batch).values(**dict(
+                        (name, sqlalchemy.select([col]).where(
+                            filetable.c.file_id == unixtable.c.file_id)
+                         .scalar_subquery())
+                        for name, col in (('unix_start', start),
+                                          ('unix_stop', stop))))).rowcount
+            in_batch = filetable.c.file_id <= last
+            if after is not None:
+                in_batch = and_(filetable.c.file_id > after, in_batch)
+            src = sqlalchemy.select([filetable.c.file_id, start, stop])\
+                .where(in_batch)\
+                .where(~sqlalchemy.exists().where(
+                    unixtable.c.file_id == filetable.c.file_id))
+            count += conn.execute(unixtable.insert().from_select(
+                ['file_id', 'unix_start', 'unix_stop'], src)).rowcount
+            self.commitDB()
+            if checkpoint is not None:
+                tmp = checkpoint + '.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump({'last_file_id': last}, f)
+                os.replace(tmp, checkpoint)
+            yield last, count
+            after = last
+
+    def addIntervalIndex(self):
+        """Add an interval index on a file's Unix start/stop time.
+
+        Used for migrating databases; makes searching for files that
+        overlap a time range fast regardless of the length of the
+        mission. The index is populated from the existing Unix times
+        and kept up to date by the database. See
+        :func:`~dbprocessing.tables.interval_index_ddl`.
+
+        Raises
+        ------
+        RuntimeError
+            If the Unix time table does not exist, or the index already
+            exists
+        """
+        if not hasattr(self, 'Unixtime'):
+            raise RuntimeError('Unixtime table does not exist.')
+        if self._intervalIndex:
+            raise RuntimeError('Interval index already seems to exist.')
+        for stmt in tables.interval_index_ddl(self.engine.dialect.name):
+            self.session.execute(sqlalchemy.text(stmt))
         self.commitDB()
+        self._intervalIndex = True
 
 
 def create_tables(filename='dbprocessing_default.db', dialect='sqlite'):
@@ -3897,4 +5064,11 @@ def create_tables(filename='dbprocessing_default.db', dialect='sqlite'):
     engine = sqlalchemy.engine.create_engine(url, echo=False)
     metadata.bind = engine
     metadata.create_all(checkfirst=True)
+    inspector = sqlalchemy.inspect(engine)
+    existing = inspector.get_table_names() \
+               + [i['name'] for i in inspector.get_indexes('unixtime')]
+    if tables.interval_index not in existing:
+        with engine.begin() as conn:
+            for stmt in tables.interval_index_ddl(dialect):
+                conn.execute(sqlalchemy.text(stmt))
     engine.dispose()
@@ -0,0 +1,202 @@
+"""Compact in-memory graph of file parent/child relationships.
+
+The full :sql:table:`file` table and its :sql:table:`filefilelink`
+relationships are held as NumPy arrays: one entry per file for each
+attribute, and compressed sparse row (CSR) adjacency lists for parents
+and children. Reachability from many files at once is a single
+breadth-first search, so shared ancestry is only traversed once.
+"""
+
+from __future__ import division
+
+import numpy as np
+
+
+class FileGraph(object):
+    """Graph of all files in a database and their parent/child links
+
+    Nodes are identified by index (0 to ``len(graph) - 1``), in order of
+    :sql:column:`~file.file_id`; use :meth:`index` to convert file IDs.
+    Per-file attributes are arrays indexed by node.
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection to load from.
+
+    Attributes
+    ----------
+    file_id : :class:`~numpy.ndarray` of :class:`int`
+        :sql:column:`~file.file_id` of each node, sorted.
+    filename : :class:`~numpy.ndarray` of :class:`object`
+        :sql:column:`~file.filename` of each node.
+    product_id : :class:`~numpy.ndarray` of :class:`int`
+        :sql:column:`~file.product_id` of each node.
+    utc_file_date : :class:`~numpy.ndarray` of ``datetime64[D]``
+        :sql:column:`~file.utc_file_date` of each node.
+    exists_on_disk : :class:`~numpy.ndarray` of :class:`bool`
+        :sql:column:`~file.exists_on_disk` of each node.
+    version : :class:`~numpy.ndarray` of :class:`int`
+        Shape (N, 3) :sql:column:`~file.interface_version`,
+        :sql:column:`~file.quality_version`,
+        :sql:column:`~file.revision_version` of each node.
+    newest : :class:`~numpy.ndarray` of :class:`bool`
+        True if node is the newest version of its product and date.
+    in_release : :class:`~numpy.ndarray` of :class:`bool`
+        True if node is in any :sql:table:`release`.
+    """
+
+    def __init__(self, dbu):
+        File = dbu.File
+        rows = dbu.session.query(
+            File.file_id, File.filename, File.product_id, File.utc_file_date,
+            File.exists_on_disk, File.interface_version,
+            File.quality_version, File.revision_version)\
+            .order_by(File.file_id).all()
+        n = len(rows)
+        cols = list(zip(*rows)) if rows else [()] * 8
+        self.file_id = np.array(cols[0], dtype=np.int64)
+        self.filename = np.array(cols[1], dtype=object)
+        self.product_id = np.array(cols[2], dtype=np.int64)
+        self.utc_file_date = np.array(cols[3], dtype='datetime64[D]')
+        self.exists_on_disk = np.array(cols[4], dtype=bool)
+        self.version = np.array(cols[5:8], dtype=np.int64).reshape(3, n).T
+        self.newest = np.zeros(n, dtype=bool)
+        self.newest[self.index(dbu.getAllFileIds(newest_version=True))] = True
+        self.in_release = np.zeros(n, dtype=bool)
+        self.in_release[self.index(
+            [r[0] for r in dbu.session.query(dbu.Release.file_id)])] = True
+        links = dbu.session.query(dbu.Filefilelink.source_file,
+                                  dbu.Filefilelink.resulting_file).all()
+        source, result = (self.index(c) for c in (
+            zip(*links) if links else ((), ())))
+        self._children_ptr, self._children = self._csr(source, result, n)
+        self._parents_ptr, self._parents = self._csr(result, source, n)
+
+    def __len__(self):
+        return len(self.file_id)
+
+    @staticmethod
+    def _csr(source, target, n):
+        """Build CSR adjacency from edge lists
+
+        Parameters
+        ----------
+        source : :class:`~numpy.ndarray` of :class:`int`
+            Node index of start of each edge
+        target : :class:`~numpy.ndarray` of :class:`int`
+            Node index of end of each edge
+        n : :class:`int`
+            Number of nodes
+
+        Returns
+        -------
+        :class:`tuple` of :class:`~numpy.ndarray`
+            Index pointer (length ``n + 1``), with the targets of node
+            ``i`` in ``indices[indptr[i]:indptr[i + 1]]``; and indices.
+        """
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=n), out=indptr[1:])
+        indices = target[np.argsort(source, kind='stable')]
+        return indptr, indices
+
+    def index(self, file_ids):
+        """Convert file IDs to node indices
+
+        Parameters
+        ----------
+        file_ids : :class:`~collections.abc.Iterable` of :class:`int`
+            :sql:column:`~file.file_id` to look up
+
+        Returns
+        -------
+        :class:`~numpy.ndarray` of :class:`int`
+            Node index of each file ID.
+
+        Raises
+        ------
+        KeyError
+            If any file ID is not in the graph.
+        """
+        file_ids = np.asarray(list(file_ids), dtype=np.int64)
+        idx = np.searchsorted(self.file_id, file_ids)
+        # Sentinel past the end so out-of-range IDs do not match
+        found = np.append(self.file_id, -1)[idx]
+        bad = found != file_ids
+        if bad.any():
+            raise KeyError(file_ids[bad].tolist())
+        return idx
+
+    def in_degree(self):
+        """Number of parents of each node
+
+        Returns
+        -------
+        :class:`~numpy.ndarray` of :class:`int`
+            Number of :sql:table:`filefilelink` entries with each node
+            as :sql:column:`~filefilelink.resulting_file`.
+        """
+        return np.diff(self._parents_ptr)
+
+    def out_degree(self):
+        """Number of children of each node
+
+        Returns
+        -------
+        :class:`~numpy.ndarray` of :class:`int`
+            Number of :sql:table:`filefilelink` entries with each node
+            as :sql:column:`~filefilelink.source_file`.
+        """
+        return np.diff(self._children_ptr)
+
+    def parents(self, node):
+        """Node indices of the direct parents (inputs) of a node"""
+        return self._parents[self._parents_ptr[node]:
+                             self._parents_ptr[node + 1]]
+
+    def children(self, node):
+        """Node indices of the direct children (outputs) of a node"""
+        return self._children[self._children_ptr[node]:
+                              self._children_ptr[node + 1]]
+
+    def reachable(self, seeds, direction):
+        """Find all nodes reachable from any of a set of nodes
+
+        Parameters
+        ----------
+        seeds : :class:`~numpy.ndarray`
+            Nodes to start from, as boolean mask or node indices.
+        direction : :class:`str`
+            ``ancestors`` to follow parents, ``descendants`` to follow
+            children.
+
+        Returns
+        -------
+        :class:`~numpy.ndarray` of :class:`bool`
+            Mask of nodes reachable from ``seeds``, including the
+            seeds themselves.
+        """
+        if direction == 'ancestors':
+            indptr, indices = self._parents_ptr, self._parents
+        elif direction == 'descendants':
+            indptr, indices = self._children_ptr, self._children
+        else:
+            raise ValueError('Unknown direction {0}'.format(direction))
+        seeds = np.asarray(seeds)
+        if seeds.dtype != bool:
+            seeds = seeds.astype(np.int64)
+        visited = np.zeros(len(self), dtype=bool)
+        visited[seeds] = True
+        frontier = np.flatnonzero(visited)
+        while frontier.size:
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            total = counts.sum()
+            if not total:
+                break
+            # Position of each neighbor of every frontier node in indices
+            offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            neighbors = indices[offsets + np.arange(total)]
+            frontier = np.unique(neighbors[~visited[neighbors]])
+            visited[frontier] = True
+        return visited
@@ -0,0 +1,262 @@
+"""Coverage of products by date.
+
+Finds which days have files for many products at once: the dates of
+files are loaded for all products in one grouped query and put into a
+products-by-days boolean array, so gaps for every product are computed
+together rather than by comparing file lists date by date.
+
+:func:`productsCoverage` gives the version of the newest file on every
+day for many products (:func:`productCoverage` for one), with filename
+and version filters applied in the database where possible.
+"""
+
+from __future__ import division
+
+import datetime
+import fnmatch
+
+import numpy as np
+
+from . import Utils
+from . import Version
+
+
+def _toDate(d):
+    """Convert a date or datetime to a date"""
+    return d.date() if isinstance(d, datetime.datetime) else d
+
+
+def _globToLike(pattern):
+    """Convert a filename glob to a SQL LIKE pattern
+
+    The LIKE pattern matches at least everything the glob does, but may
+    match more (e.g. it may be case-insensitive), so matches must still
+    be checked against the glob.
+
+    Returns
+    -------
+    :class:`str`
+        LIKE pattern, using backslash as escape character; None if
+        the glob cannot be converted (uses character sets).
+    """
+    if '[' in pattern:
+        return None
+    return pattern.replace('\\', '\\\\').replace('%', '\\%')\
+        .replace('_', '\\_').replace('*', '%').replace('?', '_')
+
+
+def _versionAtLeast(f, version):
+    """Make a condition: is version of a file at least a given version?"""
+    return Version.packKey(f.interface_version, f.quality_version,
+                           f.revision_version) >= version.key
+
+
+def coverageMatrix(dbu, products, startDate, endDate):
+    """Find which days have files, for many products
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection.
+    products : :class:`list` of :class:`int`
+        :sql:column:`~product.product_id` of products to check.
+    startDate : :class:`~datetime.date`
+        First date to check.
+    endDate : :class:`~datetime.date`
+        Last date to check (inclusive).
+
+    Returns
+    -------
+    dates : :class:`~numpy.ndarray` of ``datetime64[D]``
+        Every day from ``startDate`` to ``endDate``.
+    covered : :class:`~numpy.ndarray` of :class:`bool`
+        Shape (``len(products)``, ``len(dates)``); True where the
+        product has a file with that :sql:column:`~file.utc_file_date`.
+    """
+    startDate, endDate = _toDate(startDate), _toDate(endDate)
+    dates = np.arange(np.datetime64(startDate, 'D'),
+                      np.datetime64(endDate, 'D') + 1)
+    products = list(products)
+    covered = np.zeros((len(products), len(dates)), dtype=bool)
+    if not products or not len(dates):
+        return dates, covered
+    row = dict((p, i) for i, p in enumerate(products))
+    # Every product and date with any file has a newest version, so
+    # only need the distinct product/date pairs
+    f = dbu.File
+    rows, days = [], []
+    for chunk in Utils.chunker(sorted(row), 500):
+        q = dbu.session.query(f.product_id, f.utc_file_date)\
+            .filter(f.product_id.in_(chunk))\
+            .filter(f.utc_file_date >= startDate)\
+            .filter(f.utc_file_date <= endDate)\
+            .group_by(f.product_id, f.utc_file_date)
+        for p, d in q:
+            rows.append(row[p])
+            days.append(_toDate(d))
+    if rows:
+        idx = (np.array(days, dtype='datetime64[D]') - dates[0])\
+            .astype(np.int64)
+        covered[np.array(rows), idx] = True
+    return dates, covered
+
+
+def missingDates(dbu, products, startDate, endDate):
+    """Find days with no files, for many products
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection.
+    products : :class:`list` of :class:`int`
+        :sql:column:`~product.product_id` of products to check.
+    startDate : :class:`~datetime.date`
+        First date to check.
+    endDate : :class:`~datetime.date`
+        Last date to check (inclusive).
+
+    Returns
+    -------
+    :class:`dict`
+        Keyed by :sql:column:`~product.product_id`, sorted
+        :class:`list` of :class:`~datetime.date` with no file.
+    """
+    products = list(products)
+    dates, covered = coverageMatrix(dbu, products, startDate, endDate)
+    dates = dates.astype(object)  # datetime.date
+    return dict((p, dates[~covered[i]].tolist())
+                for i, p in enumerate(products))
+
+
+def filesOnDates(dbu, dates_by_product):
+    """Find all files of products on given dates
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection.
+    dates_by_product : :class:`dict`
+        Keyed by :sql:column:`~product.product_id`, iterable of
+        :class:`~datetime.date` to find files for.
+
+    Returns
+    -------
+    :class:`list` of :class:`int`
+        :sql:column:`~file.file_id` of all files (of any version)
+        of those products on those dates, sorted.
+    """
+    f = dbu.File
+    file_ids = set()
+    for product, dates in dates_by_product.items():
+        for chunk in Utils.chunker(sorted(set(dates)), 500):
+            file_ids.update(
+                i for i, in dbu.session.query(f.file_id)
+                .filter_by(product_id=product)
+                .filter(f.utc_file_date.in_(chunk)))
+    return sorted(file_ids)
+
+
+def productCoverage(dbu, product, startDate, endDate, glob=None,
+                    version=None):
+    """Find version of the newest file on every day, for a product
+
+    Only the newest version of a product and date is considered; if it
+    does not match the filters, the day has no file. See
+    :func:`productsCoverage` to check many products at once.
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection.
+    product : :class:`int`
+        :sql:column:`~product.product_id` of product to check.
+    startDate : :class:`~datetime.date`
+        First date to check.
+    endDate : :class:`~datetime.date`
+        Last date to check (inclusive).
+    glob : :class:`str`, optional
+        Only include files with :sql:column:`~file.filename` matching
+        this glob (as :func:`~fnmatch.fnmatch`).
+    version : :class:`~dbprocessing.Version.Version`, optional
+        Only include files with at least this version.
+
+    Returns
+    -------
+    dates : :class:`~numpy.ndarray` of ``datetime64[D]``
+        Every day from ``startDate`` to ``endDate``.
+    versions : :class:`~numpy.ndarray` of :class:`int`
+        Shape (``len(dates)``, 3): interface, quality, revision version
+        of the file on each day; -1 where there is no file.
+    """
+    dates, versions = productsCoverage(dbu, [product], startDate, endDate,
+                                       glob=glob, version=version)
+    return dates, versions[0]
+
+
+def productsCoverage(dbu, products, startDate, endDate, glob=None,
+                     version=None):
+    """Find version of the newest file on every day, for many products
+
+    The newest files are streamed from one query per 500 products.
+    Only the newest version of a product and date is considered; if it
+    does not match the filters, the day has no file.
+
+    Parameters
+    ----------
+    dbu : :class:`~dbprocessing.DButils.DButils`
+        Open database connection.
+    products : :class:`list` of :class:`int`
+        :sql:column:`~product.product_id` of products to check.
+    startDate : :class:`~datetime.date`
+        First date to check.
+    endDate : :class:`~datetime.date`
+        Last date to check (inclusive).
+    glob : :class:`str`, optional
+        Only include files with :sql:column:`~file.filename` matching
+        this glob (as :func:`~fnmatch.fnmatch`).
+    version : :class:`~dbprocessing.Version.Version`, optional
+        Only include files with at least this version.
+
+    Returns
+    -------
+    dates : :class:`~numpy.ndarray` of ``datetime64[D]``
+        Every day from ``startDate`` to ``endDate``.
+    versions : :class:`~numpy.ndarray` of :class:`int`
+        Shape (``len(products)``, ``len(dates)``, 3): interface,
+        quality, revision version of the file of each product on each
+        day; -1 where there is no file.
+    """
+    startDate, endDate = _toDate(startDate), _toDate(endDate)
+    dates = np.arange(np.datetime64(startDate, 'D'),
+                      np.datetime64(endDate, 'D') + 1)
+    products = list(products)
+    versions = np.full((len(products), len(dates), 3), -1, dtype=np.int64)
+    if not products or not len(dates):
+        return dates, versions
+    row = dict((p, i) for i, p in enumerate(products))
+    like = None if glob is None else _globToLike(glob)
+    f = dbu.File
+    rows, days, vers = [], [], []
+    for chunk in Utils.chunker(sorted(row), 500):
+        q = dbu.session.query(f.product_id, f.utc_file_date, f.filename,
+                              f.interface_version, f.quality_version,
+                              f.revision_version)\
+            .filter(f.product_id.in_(chunk))\
+            .filter(f.utc_file_date >= startDate)\
+            .filter(f.utc_file_date <= endDate)\
+            .filter(~dbu._newerExists(f))
+        if like is not None:
+            q = q.filter(f.filename.like(like, escape='\\'))
+        if version is not None:
+            q = q.filter(_versionAtLeast(f, version))
+        for p, d, filename, iv, qv, rv in q.yield_per(10000):
+            if glob is not None and not fnmatch.fnmatch(filename, glob):
+                continue
+            rows.append(row[p])
+            days.append(_toDate(d))
+            vers.append((iv, qv, rv))
+    if rows:
+        idx = (np.array(days, dtype='datetime64[D]') - dates[0])\
+            .astype(np.int64)
+        versions[np.array(rows), idx] = vers
+    return dates, versions
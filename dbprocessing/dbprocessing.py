@@ -373,7 +373,8 @@ class ProcessQueue(object):
             raise ValueError('Bad timebase for product: {0}'.format(process_id))
         return files, input_product_id
 
-    def buildChildren(self, file_id, debug=False, skip_run=False, run_procs=None):
+    def buildChildren(self, file_id, debug=False, skip_run=False, run_procs=None,
+                      newest=None, checked=None):
         """
         go through and all the runMe's and add to the runme_list variable
 
@@ -387,6 +388,14 @@ class ProcessQueue(object):
             If provided, comma-separated list of process IDs
             or process names to run; other processes are
             ignored. (Default: all possible processes).
+        newest : :class:`set` of :class:`int`, optional
+            Known newest-version file IDs, e.g. from
+            :meth:`~.DButils.filesAreNewest` on the entire queue. If
+            provided, used instead of checking this file in the database.
+        checked : :class:`set` of :class:`int`, optional
+            File IDs which were checked to make ``newest``. Files not in
+            this set are checked in the database. (Default: assume
+            ``newest`` covers all files.)
         """
 
         # if processes to run specified, turn into list of IDs
@@ -401,7 +410,12 @@ class ProcessQueue(object):
         # if this file is not a newest_version we do not ant to run
         #print("{1}: Entered buildChildren: file_id={0}".format(file_id, time.time()-T0))
         T0 = time.time()
-        if not self.dbu.fileIsNewest(file_id[0]):
+        if newest is None or (checked is not None
+                              and file_id[0] not in checked):
+            isnewest = self.dbu.fileIsNewest(file_id[0])
+        else:
+            isnewest = file_id[0] in newest
+        if not isnewest:
             DBlogging.dblogger.debug("Was not newest version in buildChildren: file_id={0}".format(file_id))
             print("    Was not newest version in buildChildren: file_id={0}".format(file_id))
             return  # do nothing
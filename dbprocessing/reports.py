@@ -16,20 +16,56 @@ from __future__ import print_function
 
 
 
+import gzip
 import os
 import re
 
 import dateutil.parser as dup
-import numpy as np
 
 from dbprocessing import DButils
 
 
+_TIMESTAMP = re.compile(r'(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d)')
+"""Timestamp at the start of a log line"""
+_LEVEL = re.compile(r'\s-\s(ERROR|INFO|DEBUG)\s-\s')
+"""Level of a log line"""
+_INGESTED = re.compile(
+    r'\s-\sINFO\s-\sFile\s.*\sentered\sin\sDB.*f\_id=\d*$')
+"""INFO line for an ingested file"""
+_MOVEDTOERROR = re.compile(r'INFO\s-\smoveToError')
+"""INFO line for a file moved to error"""
+_COMMANDRUN = re.compile(r'^.*\sINFO\s\-\srunning command\:\s.*$')
+"""INFO line for a command run"""
+
+
+def _lineTime(line):
+    """Timestamp of a log line
+
+    Parameters
+    ----------
+    line : :class:`str`
+        Line from log file
+
+    Returns
+    -------
+    :class:`str`
+        Timestamp as YYYY-MM-DD HH:MM:SS, or None if the line does not
+        start with a timestamp (e.g. continuation of a multiline entry).
+    """
+    m = _TIMESTAMP.match(line)
+    return m.group(1).replace('T', ' ') if m else None
+
+
 class logfile(object):
     """
     class to hold a datafile
+
+    The log is read in one pass, one line at a time, classifying each line
+    once. It may be plain text or gzip compressed. If a time range is
+    given, uncompressed logs are searched for the start of the range by
+    bisection, and reading stops at the end of the range.
     """
-    def __init__(self, filename, timerange=None):
+    def __init__(self, filename, timerange=None, keep_lines=True):
         """
         read in the file and collect what we need
 
@@ -40,11 +76,16 @@ class logfile(object):
         timerange : :class:`~collections.abc.Sequence`, optional
             Start and end time of log timestamps to process, default all.
             (:class:`~datetime.datetime`)
+        keep_lines : :class:`bool`, default True
+            Keep all ERROR, INFO, and DEBUG lines in :data:`error`,
+            :data:`info`, :data:`debug`. If False, these are empty, and
+            memory use is only that of the report entries (e.g.
+            :data:`ingested`, :data:`errors`); use :data:`counts` for the
+            number of lines of each level.
         """
         if not os.path.isfile(filename):
             raise(ValueError('filename does not exist'))
         #setup the instance vars so they always exist
-        self._logData = []
         self.error = []
         self.info = []
         self.debug = []
@@ -53,20 +94,17 @@ class logfile(object):
         self.commandsRun = []
         self.errors = []
         """All lines in the log with errors (:class:`list` of :class:`str`)"""
+        self.counts = {'ERROR': 0, 'INFO': 0, 'DEBUG': 0}
+        """Number of lines of each level (:class:`dict` of :class:`int`)"""
+        self.timerange = None
 
         self.filename = filename
-        self._logData = open(self.filename, 'r').readlines()
-        self.filerange = self._firstLastDate()
+        with open(self.filename, 'rb') as fp:
+            self._gzipped = fp.read(2) == b'\x1f\x8b'
         if timerange is not None:
             self.setTimerange(timerange)
-        self.error = self._error()
-        self.info = self._info()
-        self.debug = self._debug()
-
-        self.ingested = self._ingested()
-        self.movedToError = self._movedToError()
-        self.commandsRun = self._commandsRun()
-        self.errors = self._errors()
+        self.filerange = self._firstLastDate()
+        self._parse(keep_lines)
 
     def setTimerange(self, timerange):
         """Sets the time range for this report
@@ -81,135 +119,124 @@ class logfile(object):
             raise(ValueError('timerange must be a list/tuple of 2 datetime objects'))
         self.timerange = timerange
 
-    def _firstLastDate(self):
-        """Get first and last date within the log file
+    def _open(self):
+        """Open the log file for reading as binary, decompressing if needed"""
+        return gzip.open(self.filename, 'rb') if self._gzipped \
+            else open(self.filename, 'rb')
 
-        Returns
-        -------
-        :class:`tuple` of :class:`str`
-            YYYYMMDD of first and last date
-        """
-        first = dup.parse(self._logData[0].split(',')[0])
-        last = dup.parse(self._logData[-1].split(',')[0])
-        return first, last
+    def _lines(self, fp):
+        """Iterate over decoded lines from current position of a file"""
+        for line in fp:
+            yield line.decode('utf-8', 'replace')
 
-    def _error(self):
-        """
-        a list of all the error entries
+    def _nextTime(self, fp):
+        """Timestamp of the first line with one, from current position"""
+        for line in self._lines(fp):
+            t = _lineTime(line)
+            if t is not None:
+                return t
+        return None
 
-        Returns
-        -------
-        :class:`list`
-            All lines from the log that are for ERROR entries.
-        """
-        lines = []
-        for line in self._logData:
-            m = re.search( r'\s-\sERROR\s-\s' , line)
-            if m:
-                lines.append(line)
-        return lines
-
-    def _errors(self):
-        """
-        Convert all error lines to HTML report fragments
-
-        Returns
-        -------
-        :class:`list`
-            HTML report for each error (:class:`errors`).
-        """
-        lines = []
-        for line in self.error:
-            lines.append(errors(line))
-        return lines
-
-    def _info(self):
-        """
-        a list of all the INFO entries
-
-        Returns
-        -------
-        :class:`list`
-            All lines from the log that are for INFO entries.
-        """
-        lines = []
-        for line in self._logData:
-            m = re.search( r'\s-\sINFO\s-\s' , line)
-            if m:
-                lines.append(line)
-        return lines
-
-    def _debug(self):
-        """
-        a list of all the DEBUG entries
-
-        Returns
-        -------
-        :class:`list`
-            All lines from the log that are for DEBUG entries.
-        """
-        lines = []
-        for line in self._logData:
-            m = re.search( r'\s-\sDEBUG\s-\s' , line)
-            if m:
-                lines.append(line)
-        return lines
-
-    def _ingested(self):
-        """
-        return list of files ingested
-
-        file_id	filename	 product
+    def _firstLastDate(self):
+        """Get first and last date within the log file
 
         Returns
         -------
-        :class:`list`
-            HTML report fragments for all file ingestions reported in the
-            log. (:class:`ingested`)
-        """
-        lines = []
-        for line in self.info:
-            m = re.search( r'\s-\sINFO\s-\sFile\s.*\sentered\sin\sDB.*f\_id=\d*$' , line)
-            if m:
-                lines.append(ingested(line))
-        return lines
-
-    def _movedToError(self):
-        """
-        all the files that were moved to error
+        :class:`tuple` of :class:`~datetime.datetime`
+            First and last timestamp in the log
+        """
+        with self._open() as fp:
+            first = self._nextTime(fp)
+            if self._gzipped:
+                # Cannot seek back from the end, so stream it all
+                last = first
+                for line in self._lines(fp):
+                    last = _lineTime(line) or last
+            else:
+                # Back up from the end until a timestamped line is found
+                size = fp.seek(0, os.SEEK_END)
+                last = None
+                step = 4096
+                pos = size
+                while last is None and pos > 0:
+                    pos = max(pos - step, 0)
+                    fp.seek(pos)
+                    if pos:
+                        fp.readline()  # partial line
+                    for line in self._lines(fp):
+                        last = _lineTime(line) or last
+                    step *= 2
+        return tuple(None if t is None else dup.parse(t)
+                     for t in (first, last))
+
+    def _seekStart(self, fp, start):
+        """Move to a point in an uncompressed log before a time
+
+        Bisects on file position to find a position where all lines
+        after have timestamps at or after ``start``, except possibly
+        for the first full line.
+        """
+        lo, hi = 0, fp.seek(0, os.SEEK_END)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            fp.seek(mid)
+            fp.readline()  # partial line
+            t = self._nextTime(fp)
+            if t is None or t >= start:
+                hi = mid
+            else:
+                lo = mid + 1
+        fp.seek(lo)
+        if lo:
+            fp.readline()  # line at lo is before start
 
-        Returns
-        -------
-        :class:`list`
-            HTML report fragments for all file moves to error reported in the
-            log. (:class:`movedToError`)
-        """
-        lines = []
-        for line in self.info:
-            m = re.search(r'INFO\s-\smoveToError', line)
-            if m:
-                lines.append(movedToError(line))
-        return lines
-
-    def _commandsRun(self):
-        """
-        return a list of the unique commands run
+    def _parse(self, keep_lines=True):
+        """Read the log and find all report entries
 
-        Returns
-        -------
-        :class:`list`
-            HTML report fragments for unique command executions reported in the
-            log. (:class:`commandsRun`)
-        """
-        lines = []
-        for line in self.info:
-            m = re.match( r'^.*\sINFO\s\-\srunning command\:\s.*$' , line)
-            if m:
-                lines.append(commandsRun(line))
-
-        names = [v.filename for v in lines]
-        uniq, ind = np.unique(names, return_index=True)
-        return [lines[v] for v in ind]
+        Parameters
+        ----------
+        keep_lines : :class:`bool`, default True
+            Keep all lines of each level (see :class:`logfile`).
+        """
+        start = end = None
+        if self.timerange is not None:
+            start, end = (t.strftime('%Y-%m-%d %H:%M:%S')
+                          for t in self.timerange)
+        commands = {}  # First command run for each command name
+        keep = {'ERROR': self.error, 'INFO': self.info, 'DEBUG': self.debug}
+        with self._open() as fp:
+            if start is not None and not self._gzipped:
+                self._seekStart(fp, start)
+            inrange = start is None
+            for line in self._lines(fp):
+                t = _lineTime(line)
+                if t is not None:
+                    if end is not None and t > end:
+                        if not self._gzipped:
+                            break  # Everything after is out of range
+                        inrange = False
+                        continue
+                    inrange = start is None or t >= start
+                if not inrange:
+                    continue
+                m = _LEVEL.search(line)
+                if not m:
+                    continue
+                level = m.group(1)
+                self.counts[level] += 1
+                if keep_lines:
+                    keep[level].append(line)
+                if level == 'ERROR':
+                    self.errors.append(errors(line))
+                elif level == 'INFO':
+                    if _INGESTED.search(line):
+                        self.ingested.append(ingested(line))
+                    if _MOVEDTOERROR.search(line):
+                        self.movedToError.append(movedToError(line))
+                    if _COMMANDRUN.match(line):
+                        c = commandsRun(line)
+                        commands.setdefault(c.filename, c)
+        self.commandsRun = [commands[k] for k in sorted(commands)]
 
 
 class HTMLbase(object):
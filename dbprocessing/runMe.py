@@ -15,6 +15,8 @@ import tempfile
 import time
 import traceback
 
+from sqlalchemy import func
+
 from . import DBlogging
 from . import DBstrings
 from . import DButils
@@ -649,26 +651,35 @@ class runMe(object):
 
         quality_diff = False
         revision_diff = False
+        File = self.dbu.File
+        # Computed expression, so no index can give the max directly;
+        # the unique (date, product, ...) index narrows the scan to the
+        # few versions of one product and date
+        newest_key = func.max(Version.packKey(
+            File.interface_version, File.quality_version,
+            File.revision_version))
         for parent in parents:
-            # get all the files for the same date and product as the parent to make sure
-            #  this is the newest
-            parents_all = self.dbu.getFilesByProductDate(parent.product_id, [parent.utc_file_date]*2)
-            parent_max = max(parents_all, key=lambda x: self.dbu.getFileVersion(x))
+            # get the newest version for the same date and product as the
+            #  parent to make sure this is the newest (max done in the DB)
+            parent_version = self.dbu.getFileVersion(parent)
+            parent_max = Version.Version.fromKey(
+                self.dbu.session.query(newest_key)
+                .filter_by(product_id=parent.product_id,
+                           utc_file_date=parent.utc_file_date).scalar())
 
-            DBlogging.dblogger.debug("parent: {0} version: {1} parent_max {2} version {3}".format(
-                parent.file_id, self.dbu.getFileVersion(parent), parent_max.file_id,
-                self.dbu.getFileVersion(parent_max)))
+            DBlogging.dblogger.debug("parent: {0} version: {1} newest version {2}".format(
+                parent.file_id, parent_version, parent_max))
 
 
             # if a parent is no longer newest we need to inc
-            if self.dbu.getFileVersion(parent) != self.dbu.getFileVersion(parent_max):
+            if parent_version != parent_max:
                 # we have a parent file for a certain date,
                 #   get all the files for that date and see if the parent is the newest
                 #   if it is then that parent has not changed, do not run
                 #   if there is a newer parent then we do need to run
-                df = self.dbu.getFileVersion(parent_max) - self.dbu.getFileVersion(parent)
-                DBlogging.dblogger.debug("Found a difference between files {0} and {1} -- {2}".format(
-                    parent.file_id, parent_max.file_id, df))
+                df = parent_max - parent_version
+                DBlogging.dblogger.debug("Found a difference between file {0} and newest version {1} -- {2}".format(
+                    parent.file_id, parent_max, df))
 
                 if df[0]:
                     # Interface change on input is quality change on output,
@@ -754,9 +765,8 @@ class runMe(object):
         f_id = self.pq.diskfileToDB(df)
         ## here the file is in the DB so we can add the filefilelink an filecodelinks
         if f_id is not None: # None comes back if the file goes to error
-            self.dbu.addFilecodelink(f_id, self.code_id)
-            for val in self.input_files: # add a link for each input file
-                self.dbu.addFilefilelink(f_id, val)
+            # link to code and to each input file
+            self.dbu.addProvenance(f_id, self.code_id, self.input_files)
 
     def make_command_line(self, force=False, rundir=None):
         """
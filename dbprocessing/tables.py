@@ -285,3 +285,64 @@ def definition(name):
         )
     else:
         raise ValueError('Unknown table {}'.format(name))
+
+
+interval_index = 'unixtime_interval'
+"""Name of the interval index on :sql:table:`unixtime`: an R*Tree virtual
+table (sqlite) or GiST index (postgresql). See :func:`interval_index_ddl`."""
+
+
+def interval_index_ddl(dialect):
+    """Get statements to create the interval index on Unix time
+
+    The index allows finding files which overlap a time range without
+    scanning the entire history of a product. On sqlite it is an R*Tree
+    virtual table kept in sync with :sql:table:`unixtime` by triggers; on
+    postgresql it is a GiST index on the range from
+    :sql:column:`~unixtime.unix_start` to :sql:column:`~unixtime.unix_stop`,
+    which needs no maintenance. Both also index any existing rows.
+
+    Parameters
+    ----------
+    dialect : :class:`str`
+        Database dialect, ``sqlite`` or ``postgresql``.
+
+    Returns
+    -------
+    :class:`list` of :class:`str`
+        SQL statements, to be executed in order after
+        :sql:table:`unixtime` is created.
+
+    Raises
+    ------
+    ValueError
+        if the dialect is not supported
+    """
+    if dialect == 'sqlite':
+        # R*Tree stores 32-bit floats, rounded outward, so this returns
+        # a superset of the overlapping files; also filter on unixtime.
+        notnull = 'NEW.unix_start IS NOT NULL AND NEW.unix_stop IS NOT NULL'
+        insert = 'INSERT INTO {0} SELECT NEW.file_id, NEW.unix_start,' \
+                 ' NEW.unix_stop WHERE {1};'.format(interval_index, notnull)
+        delete = 'DELETE FROM {0} WHERE id = OLD.file_id;'.format(
+            interval_index)
+        return [
+            'CREATE VIRTUAL TABLE {0} USING rtree(id, unix_start, unix_stop)'
+            .format(interval_index),
+            'INSERT INTO {0} SELECT file_id, unix_start, unix_stop'
+            ' FROM unixtime WHERE unix_start IS NOT NULL'
+            ' AND unix_stop IS NOT NULL'.format(interval_index),
+            'CREATE TRIGGER {0}_insert AFTER INSERT ON unixtime'
+            ' BEGIN {1} END'.format(interval_index, insert),
+            'CREATE TRIGGER {0}_update AFTER UPDATE ON unixtime'
+            ' BEGIN {1} {2} END'.format(interval_index, delete, insert),
+            'CREATE TRIGGER {0}_delete AFTER DELETE ON unixtime'
+            ' BEGIN {1} END'.format(interval_index, delete),
+        ]
+    elif dialect == 'postgresql':
+        return [
+            "CREATE INDEX {0} ON unixtime USING gist"
+            " (int8range(unix_start, unix_stop, '[]'))".format(interval_index),
+        ]
+    else:
+        raise ValueError('Unknown dialect {}'.format(dialect))
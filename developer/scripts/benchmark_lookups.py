@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+"""Time the frequent by-name lookups in DButils.
+
+Reports the time per call of getFileID, getProductID, getProcessID,
+getCodeFromProcess and getEntry on an existing database, to check the
+per-call overhead of these lookups, which are made many times in a
+processing pass.
+
+Usage: benchmark_lookups.py database [repeats]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+import dbprocessing.DButils
+
+
+def main(dbname, number=1000):
+    dbu = dbprocessing.DButils.DButils(dbname)
+    try:
+        f = dbu.session.query(dbu.File).first()
+        prod = dbu.getEntry('Product', f.product_id)
+        proc = dbu.session.query(dbu.Process).first()
+        cases = [
+            ('getFileID', lambda: dbu.getFileID(f.filename)),
+            ('getProductID', lambda: dbu.getProductID(prod.product_name)),
+            ('getProcessID', lambda: dbu.getProcessID(proc.process_name)),
+            ('getCodeFromProcess', lambda: dbu.getCodeFromProcess(
+                proc.process_id, f.utc_file_date)),
+            ('getEntry', lambda: dbu.getEntry('File', f.filename)),
+        ]
+        for name, func in cases:
+            t = min(timeit.repeat(func, number=number, repeat=3))
+            print('{0:<20} {1:8.1f} us/call'.format(name, t / number * 1e6))
+    finally:
+        dbu.closeDB()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        sys.exit(__doc__)
+    main(sys.argv[1], *[int(a) for a in sys.argv[2:]])
@@ -69,8 +69,7 @@ for prod_id in range(1, 190):
         continue
 
     files = [rec.file_id for rec in dbu.getFiles(product=prod_id)]
-    for file_id in files:
-        dbu._purgeFileFromDB(file_id, trust_id=True, commit=False)
+    dbu._purgeFileFromDB(files, trust_id=True, commit=False)
 
     sq = dbu.session.query(dbu.Instrumentproductlink)\
         .filter_by(product_id=prod_id)
@@ -113,8 +112,7 @@ while to_process:
     new_to_process = set(new_to_process)
     delme.update(to_process)
     to_process = new_to_process.difference(delme)
-for file_id in delme:
-    dbu._purgeFileFromDB(file_id, trust_id=True, commit=False)
+dbu._purgeFileFromDB(delme, trust_id=True, commit=False)
 dbu.commitDB()
 dbu.session.execute('VACUUM')
 dbu.commitDB()
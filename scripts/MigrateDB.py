@@ -60,8 +60,37 @@ def do_unix_time(dbu):
     dbu.addUnixTimeTable()
 
 
+def check_interval_index(dbu):
+    """Check if database needs an interval index on Unix time
+
+    Parameters
+    ==========
+    dbu : dbprocessing.DButils.DButils
+        Open DButils instances for the mission to update
+
+    Returns
+    =======
+    bool
+        True if update needed (there is no interval index);
+        False otherwise (interval index exists)
+    """
+    return not dbu._intervalIndex
+
+
+def do_interval_index(dbu):
+    """Add interval index on Unix time to database
+
+    Parameters
+    ==========
+    dbu : dbprocessing.DButils.DButils
+        Open DButils instances for the mission to update
+    """
+    dbu.addIntervalIndex()
+
+
 checkme = [
-    ("Unix time table", check_unix_time, do_unix_time)
+    ("Unix time table", check_unix_time, do_unix_time),
+    ("Unix time interval index", check_interval_index, do_interval_index),
 ]
 """List of all possible updates. tuple of name, function to check if needed,
    function to perform the update. Check functions take the open DBUtils and
@@ -2,13 +2,14 @@
 from __future__ import print_function
 
 import argparse
+import atexit
 import datetime
 import os
 import operator
 import traceback
 import subprocess
 
-from dbprocessing import DBlogging, dbprocessing
+from dbprocessing import DBlogging, DBprofile, dbprocessing
 from dbprocessing.runMe import ProcessException
 from dbprocessing import runMe, Utils
 from dbprocessing.Utils import dateForPrinting as DFP
@@ -52,6 +53,9 @@ if __name__ == "__main__":
                         help="Start sqlalchemy with echo in place for debugging", default=False)
     parser.add_argument("--glb", dest="glob", type=str,
                         help='Glob to use when reading files from incoming: default "*"', default="*")
+    parser.add_argument("--profile-db", dest="profile", nargs="?", const="table",
+                        choices=["table", "json"], default=None,
+                        help="Print SQL statistics per database method at exit (table or json)")
 
     options = parser.parse_args()
 
@@ -69,6 +73,10 @@ if __name__ == "__main__":
     DBlogging.dblogger.setLevel(DBlogging.LEVELS[options.loglevel])
 
     pq = dbprocessing.ProcessQueue(options.mission, dryrun=options.dryrun, echo=options.echo)
+    if options.profile:
+        profiler = DBprofile.DBProfiler(pq.dbu)
+        profiler.start()
+        atexit.register(lambda: print(profiler.report(options.profile)))
 
     # check currently processing
     curr_proc = pq.dbu.currentlyProcessing()
@@ -145,6 +153,10 @@ if __name__ == "__main__":
          
                 # make the cpommand lines for all the files in tehj processqueue
                 totalsize = pq.dbu.ProcessqueueLen()
+                # check newest version for the entire queue at once;
+                # anything added to the queue later is checked as popped
+                checked = set(pq.dbu.ProcessqueueGetAll())
+                newest = set(pq.dbu.filesAreNewest(checked))
                 tmp_ind = 0
                 Utils.progressbar(tmp_ind, 1, totalsize, text='Command Build Progress:')
                 while pq.dbu.ProcessqueueLen() > 0:
@@ -161,7 +173,8 @@ if __name__ == "__main__":
                     #if f is None:
                     #    continue
                     pq.buildChildren(f, skip_run=options.s,
-                                     run_procs=options.o)
+                                     run_procs=options.o, newest=newest,
+                                     checked=checked)
                     tmp_ind += 1
                     Utils.progressbar(tmp_ind, 1, totalsize, text='Command Build Progress: {0}:{1}'.format(tmp_ind, totalsize))
 
@@ -3,7 +3,13 @@
 """Compare two databases for similarities in products, files, etc."""
 
 import argparse
-import collections
+import collections.abc
+import hashlib
+
+import sqlalchemy
+import sqlalchemy.orm
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import BIT
 
 import dbprocessing.DButils
 
@@ -24,15 +30,16 @@ def main(mission1, mission2):
     """
     dbu1, dbu2 = None, None
     try:
-        dbu1 = dbprocessing.DButils.DButils(mission1)
-        dbu2 = dbprocessing.DButils.DButils(mission2)
-        for t in ('product', 'process', 'code', 'file',):
+        dbu1 = dbprocessing.DButils.DButils(mission1, readonly=True)
+        dbu2 = dbprocessing.DButils.DButils(mission2, readonly=True)
+        for t in ('product', 'process', 'code'):
             res = check_tables(t, dbu1, dbu2)
             if res:
                 print('\n'.join(res))
-        res = check_links(dbu1, dbu2)
-        if res:
-            print('\n'.join(res))
+        for line in check_files(dbu1, dbu2):
+            print(line)
+        for line in check_links(dbu1, dbu2):
+            print(line)
     finally:
         if dbu1 is not None:
             dbu1.closeDB()
@@ -62,15 +69,13 @@ def check_tables(table, dbu1, dbu2):
     # Get all records for this table.
     gettername = 'getAll{}{}s'.format(table.title(),
                                       'e' if table.endswith('s') else '')
-    if table == 'file': # There is no getAllFiles
-        entries1 = [dbu1.getEntry('File', i) for i in dbu1.getAllFileIds()]
-        entries2 = [dbu2.getEntry('File', i) for i in dbu2.getAllFileIds()]
-    else:
-        entries1 = getattr(dbu1, gettername)()
-        entries2 = getattr(dbu2, gettername)()
+    if table == 'file':
+        return list(check_files(dbu1, dbu2))
+    entries1 = getattr(dbu1, gettername)()
+    entries2 = getattr(dbu2, gettername)()
     # E.g. getAllCodes returns dicts, of which only one part is the code record
     # So recover just that part
-    if entries1 and isinstance(entries1[0], collections.Mapping):
+    if entries1 and isinstance(entries1[0], collections.abc.Mapping):
         entries1 = [e[table] for e in entries1]
         entries2 = [e[table] for e in entries2]
     # Codes also have a description not a name, and files have no _
@@ -141,6 +146,10 @@ def check_tables(table, dbu1, dbu2):
 def check_links(dbu1, dbu2):
     """Compare file-file and file-code links across databases
 
+    Links are compared with :func:`diff_rows`, so only files whose
+    links differ are examined in detail. Links of files that are only
+    in one database are not reported (see :func:`check_files`).
+
     Parameters
     ----------
     dbu1, dbu2 : dbprocessing.DButils.DButils
@@ -148,51 +157,243 @@ def check_links(dbu1, dbu2):
 
     Returns
     -------
-    list
-        Any discrepancies found between databases (empty list if none)
+    generator of str
+        Any discrepancies found between databases
     """
-    out = []
-    entries1 = [dbu1.getEntry('File', i) for i in dbu1.getAllFileIds()]
-    entries2 = [dbu2.getEntry('File', i) for i in dbu2.getAllFileIds()]
-    entries1 = { e.filename: e.file_id for e in entries1 }
-    entries2 = { e.filename: e.file_id for e in entries2 }
-    for f in sorted(entries1.keys()):
-        if f not in entries2: # Handled in the table check above
+    def in_both(f):
+        """Is file f in both databases?"""
+        for dbu in (dbu1, dbu2):
+            try:
+                dbu.getFileID(f)
+            except dbprocessing.DButils.DBNoData:
+                return False
+        return True
+
+    for f, rows1, rows2 in diff_rows(dbu1, dbu2, _input_rows):
+        if not in_both(f):
             continue
         # Check for same input files
-        infiles1 = set([e.filename for e in dbu1.getFileParents(entries1[f])])
-        infiles2 = set([e.filename for e in dbu2.getFileParents(entries2[f])])
+        infiles1 = set(r[1] for r in rows1)
+        infiles2 = set(r[1] for r in rows2)
         for n in sorted(infiles1.difference(infiles2)):
-            out.append('{} input file {} is in mission1 but not mission2.'
-                       .format(f, n))
+            yield '{} input file {} is in mission1 but not mission2.'\
+                .format(f, n)
         for n in sorted(infiles2.difference(infiles1)):
-            out.append('{} input file {} is in mission2 but not mission1.'
-                       .format(f, n))
-        # Now check for same input codes
-        incode1 = dbu1.session.query(dbu1.Filecodelink)\
-                       .filter_by(resulting_file=entries1[f]).all()
-        incode2 = dbu2.session.query(dbu2.Filecodelink)\
-                       .filter_by(resulting_file=entries2[f]).all()
-        if len(incode1) != len(incode2):
-            out.append('{} has {} codes in mission1 but {} in mission2.'
-                       .format(f, len(incode1), len(incode2)))
+            yield '{} input file {} is in mission2 but not mission1.'\
+                .format(f, n)
+    # Now check for same input codes
+    for f, incode1, incode2 in diff_rows(dbu1, dbu2, _code_rows):
+        if not in_both(f):
             continue
-        if len(incode1) == 0:
+        if len(incode1) != len(incode2):
+            yield '{} has {} codes in mission1 but {} in mission2.'\
+                .format(f, len(incode1), len(incode2))
             continue
         if len(incode1) != 1:
-            out.append('{} has {} codes, should be 0 or 1.'
-                       .format(f, len(incode1)))
+            yield '{} has {} codes, should be 0 or 1.'.format(f, len(incode1))
             continue
-        incode1, incode2 = incode1[0], incode2[0]
-        code1 = dbu1.getEntry('Code', incode1.source_code)
-        code2 = dbu2.getEntry('Code', incode2.source_code)
-        for attr in ('code_description', 'filename', 'relative_path',
-                     'arguments'):
-            e1, e2 = getattr(code1, attr), getattr(code2, attr)
+        for attr, e1, e2 in zip(
+                ('code_description', 'filename', 'relative_path', 'arguments'),
+                incode1[0][1:], incode2[0][1:]):
             if e1 != e2:
-                out.append('{} code has {} {} in mission1 but {} in mission2.'
-                           .format(f, attr, e1, e2))
-    return out
+                yield '{} code has {} {} in mission1 but {} in mission2.'\
+                    .format(f, attr, e1, e2)
+
+
+def check_files(dbu1, dbu2, leafsize=1000):
+    """Compare file records across databases
+
+    Records are matched by filename and compared with :func:`diff_rows`,
+    so if the databases mostly match, only a few aggregate queries are
+    made. Product is compared by name; file ID, provenance, shasum and
+    creation date are not compared.
+
+    Parameters
+    ----------
+    dbu1, dbu2 : dbprocessing.DButils.DButils
+        database utils instances
+    leafsize : int
+        Maximum number of records to compare directly, rather than by
+        digest.
+
+    Returns
+    -------
+    generator of str
+        Any discrepancies found between databases
+    """
+    columns = _file_rows(dbu1)[1]
+    for n, rows1, rows2 in diff_rows(dbu1, dbu2, _file_rows, leafsize):
+        if not rows2:
+            yield 'File {} is in mission1 but not mission2.'.format(n)
+        elif not rows1:
+            yield 'File {} is in mission2 but not mission1.'.format(n)
+        else:
+            for c, v1, v2 in zip(columns[1:], rows1[0][1:], rows2[0][1:]):
+                if v1 == v2:
+                    continue
+                if c.key == 'product_id':
+                    yield 'File {} {} is {} in mission 1 but {} in mission 2'\
+                        .format(n, c.key, v1, v2)
+                else:
+                    yield 'File {} {} is {} in mission 1 but {} in mission2'\
+                        .format(n, c.key, v1, v2)
+
+
+def _file_rows(dbu):
+    """Comparable file records, keyed by filename
+
+    Returns
+    -------
+    tuple
+        Key column, list of columns for each row (key first), table to
+        select from, and list of joins (each a tuple of arguments to
+        :meth:`~sqlalchemy.orm.Query.join`), as used by :func:`diff_rows`.
+    """
+    f, p = dbu.File, dbu.Product
+    columns = [f.filename]
+    for c in dbu.metadata.tables['file'].columns:
+        if c.name in ('file_id', 'filename', 'verbose_provenance', 'shasum',
+                      'file_create_date'):
+            continue
+        # Reference to another table, compare *names*
+        columns.append(p.product_name.label('product_id')
+                       if c.name == 'product_id' else getattr(f, c.name))
+    return f.filename, columns, f, [(p, p.product_id == f.product_id)]
+
+
+def _input_rows(dbu):
+    """Input file names of every file, keyed by filename; see _file_rows"""
+    link = dbu.Filefilelink
+    result = sqlalchemy.orm.aliased(dbu.File)
+    source = sqlalchemy.orm.aliased(dbu.File)
+    return result.filename, [result.filename, source.filename], link, [
+        (result, result.file_id == link.resulting_file),
+        (source, source.file_id == link.source_file)]
+
+
+def _code_rows(dbu):
+    """Code used to make every file, keyed by filename; see _file_rows"""
+    link, c = dbu.Filecodelink, dbu.Code
+    result = sqlalchemy.orm.aliased(dbu.File)
+    return result.filename, [result.filename, c.code_description, c.filename,
+                             c.relative_path, c.arguments], link, [
+        (result, result.file_id == link.resulting_file),
+        (c, c.code_id == link.source_code)]
+
+
+def _digest_part(text, part):
+    """32 bits (part 0 or 1) of the MD5 of text, as an integer
+
+    Registered as a function with sqlite, and matches the postgresql
+    expression made by :func:`_row_digests`.
+    """
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()
+               [8 * part:8 * part + 8], 16)
+
+
+def _row_digests(dbu, columns):
+    """Make expressions for the digest of a row
+
+    The digest of a set of rows is the count and sum of these, which
+    does not depend on row order and can be aggregated by the database.
+
+    Returns
+    -------
+    list
+        Two expressions, each a 32-bit integer digest of ``columns``.
+    """
+    text = sqlalchemy.literal('')
+    for c in columns:
+        text = text + '|' + func.coalesce(
+            sqlalchemy.cast(c, sqlalchemy.String), '\\N')
+    if dbu.engine.dialect.name == 'postgresql':
+        return [sqlalchemy.cast(sqlalchemy.cast(
+            sqlalchemy.literal('x') + func.substr(func.md5(text),
+                                                  8 * part + 1, 8),
+            BIT(32)), sqlalchemy.BigInteger) for part in (0, 1)]
+    # sqlite has no hash function; use ours, defined per connection
+    dbu.session.connection().connection.create_function(
+        'dbp_digest_part', 2, _digest_part)
+    return [func.dbp_digest_part(text, part) for part in (0, 1)]
+
+
+def diff_rows(dbu1, dbu2, rows, leafsize=1000):
+    """Find differences in a set of rows between databases
+
+    The rows are split into chunks by range of a key. Each database
+    computes the count and digest of a chunk in one aggregate query;
+    only chunks which differ are split further (at the median key),
+    and only small chunks are loaded and compared directly. Digests
+    are only compared between databases of the same type; otherwise
+    every chunk is compared directly.
+
+    Parameters
+    ----------
+    dbu1, dbu2 : dbprocessing.DButils.DButils
+        database utils instances
+    rows : callable
+        Takes a DButils and returns key column, list of columns (key
+        first), table, and list of joins, e.g. :func:`_file_rows`.
+    leafsize : int
+        Maximum number of rows to compare directly, rather than by
+        digest.
+
+    Returns
+    -------
+    generator of tuple
+        For every key which differs, in order: the key, and sorted
+        list of rows with that key from each database.
+    """
+    specs = [rows(dbu) for dbu in (dbu1, dbu2)]
+    same_dialect = dbu1.engine.dialect.name == dbu2.engine.dialect.name
+
+    def query(i, entities, lo, hi):
+        """Query on database i for rows with key in [lo, hi)"""
+        dbu = (dbu1, dbu2)[i]
+        key, columns, table, joins = specs[i]
+        q = dbu.session.query(*entities).select_from(table)
+        for j in joins:
+            q = q.join(*j)
+        if lo is not None:
+            q = q.filter(key >= lo)
+        if hi is not None:
+            q = q.filter(key < hi)
+        return q
+
+    def digest(i, lo, hi):
+        """Count and digest of rows on database i with key in [lo, hi)"""
+        parts = _row_digests((dbu1, dbu2)[i], specs[i][1]) \
+            if same_dialect else []
+        return tuple(query(i, [func.count()] + [func.sum(p) for p in parts],
+                           lo, hi).one())
+
+    def load(i, lo, hi):
+        """Rows on database i with key in [lo, hi), by key"""
+        out = collections.defaultdict(list)
+        for r in query(i, specs[i][1], lo, hi):
+            out[r[0]].append(tuple(r))
+        return out
+
+    ranges = [(None, None)]
+    while ranges:
+        lo, hi = ranges.pop()
+        d1, d2 = digest(0, lo, hi), digest(1, lo, hi)
+        if same_dialect and d1 == d2:
+            continue
+        count = max(d1[0], d2[0])
+        if count > leafsize:
+            # Split at median key of the database with more rows
+            i = 0 if d1[0] >= d2[0] else 1
+            mid = query(i, [specs[i][0]], lo, hi).order_by(specs[i][0])\
+                .offset(count // 2).limit(1).scalar()
+            if mid is not None and mid != lo:
+                ranges.extend([(mid, hi), (lo, mid)])  # Low half first
+                continue
+        rows1, rows2 = load(0, lo, hi), load(1, lo, hi)
+        for k in sorted(set(rows1).union(rows2)):
+            r1, r2 = sorted(rows1.get(k, [])), sorted(rows2.get(k, []))
+            if r1 != r2:
+                yield k, r1, r2
 
 
 def parse_args(argv=None):
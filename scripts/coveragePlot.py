@@ -14,7 +14,6 @@ try:
 except ImportError: # Py2
     import ConfigParser as configparser
 import datetime
-import fnmatch
 import os
 import subprocess
 import sys
@@ -29,6 +28,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import spacepy.toolbox as tb
 
+from dbprocessing import coverage
 from dbprocessing import Utils
 from dbprocessing import DButils
 
@@ -191,46 +191,52 @@ if __name__ == "__main__":
     dates = list(Utils.chunker(dates, int(conf['panel']['daysperplot'])))
 
     # make the arrays that hold the files
-    dbu = DButils.DButils(conf['settings']['mission'], echo=echo)
+    dbu = DButils.DButils(conf['settings']['mission'], echo=echo,
+                          readonly=True)
 
     # go through the panel and see how many plots there are
     nplots = _get_nplots(conf)
 
     ans = []
 
+    # Products with the same productN_glob and productN_version are all
+    # collected in one query, culled based on those in the query
+    filters = {}
+    for pnum in range(1, nplots + 1):
+        plotconf = conf['plot{0}'.format(pnum)]
+        for pn in range(1, _get_nproducts(conf, pnum) + 1):
+            key = (plotconf.get('product{0}_glob'.format(pn)),
+                   plotconf.get('product{0}_version'.format(pn)))
+            filters.setdefault(key, set()).add(
+                dbu.getProductID(plotconf['product{0}'.format(pn)]))
+    coverages = {}  # (product ID, glob, version) to versions on each day
+    for (glb, version), product_ids in filters.items():
+        product_ids = sorted(product_ids)
+        _, versions = coverage.productsCoverage(
+            dbu, product_ids, dates[0][0], dates[-1][-1], glob=glb,
+            version=None if version is None
+            else Utils.parseVersion(version))
+        for product_id, v in zip(product_ids, versions):
+            coverages[product_id, glb, version] = v
+
     for pnum, ind_pnum in enumerate(range(nplots), 1):
-        ans.append([])
+        ans.append([[] for d in dates])
         n_prods = _get_nproducts(conf, pnum)
-        prods = []
-        for ind_d, d in enumerate(dates):
-            ans[ind_pnum].append([])
-
-            for pn, ind_pn in enumerate(range(n_prods), 1):
-                ans[ind_pnum][ind_d].append([])
-                product_id = dbu.getProductID(conf['plot{0}'.format(pnum)]['product{0}'.format(pn)])
-                # print pnum, n_prods, product_id
-
-                ans[ind_pnum][ind_d][ind_pn].append(d)
-                ans[ind_pnum][ind_d][ind_pn].append(np.zeros(len(d), dtype=int))
-                files = dbu.getFilesByProductDate(product_id, [d[0], d[-1]], newest_version=True)
-                # print  len(d), pnum, n_prods, product_id, len(files)
-                # cull the files list based on productN_glob
-                if 'product{0}_glob'.format(pn) in conf['plot{0}'.format(pnum)]:
-                    files = [f for f in files if fnmatch.fnmatch(f.filename,
-                                                                 conf['plot{0}'.format(pnum)][
-                                                                     'product{0}_glob'.format(pn)])]
-
-                if 'product{0}_version'.format(pn) in conf['plot{0}'.format(pnum)]:
-                    files = [f for f in files if (dbu.getFileVersion(dbu.getEntry('File', f.file_id).file_id) >=
-                                                  Utils.parseVersion(
-                                                      conf['plot{0}'.format(pnum)]['product{0}_version'.format(pn)]))]
-                # now that we have all the files loop through and the the dates that we have to 1
-                f_dates = [dbu.getEntry('File', f.file_id).utc_file_date for f in files]
-                for fd in f_dates:
-                    ans[ind_pnum][ind_d][ind_pn][1][ans[ind_pnum][ind_d][ind_pn][0].index(fd)] = 1
-                print("\tcollected {0} from {1} to {2}"
-                      .format(conf['plot{0}'.format(pnum)]['product{0}'.format(pn)],
-                              d[0], d[-1]))
+        plotconf = conf['plot{0}'.format(pnum)]
+        for pn in range(1, n_prods + 1):
+            product_id = dbu.getProductID(plotconf['product{0}'.format(pn)])
+            versions = coverages[product_id,
+                                 plotconf.get('product{0}_glob'.format(pn)),
+                                 plotconf.get('product{0}_version'.format(pn))]
+            # dates that we have files are 1
+            have = (versions[:, 0] >= 0).astype(int)
+            start = 0
+            for ind_d, d in enumerate(dates):
+                ans[ind_pnum][ind_d].append([d, have[start:start + len(d)]])
+                start += len(d)
+            print("\tcollected {0} from {1} to {2}"
+                  .format(plotconf['product{0}'.format(pn)],
+                          dates[0][0], dates[-1][-1]))
 
     print('Collected data')
 
@@ -38,6 +38,8 @@ if __name__ == "__main__":
                         help="Print out each file as it is checked", default=False)
     parser.add_argument("-p", "--path", action="store_true",
                         help="Print full file path of missing files", default=False)
+    parser.add_argument("--scan", action="store_true",
+                        help="List each directory once rather than checking each file", default=False)
 
     
     options = parser.parse_args()
@@ -58,17 +60,26 @@ if __name__ == "__main__":
 
     dbu = dbprocessing.DButils.DButils(options.mission, echo=options.echo)
 
-    files = sorted(dbu.getAllFileIds(startDate=startDate, endDate=endDate, newest_version=options.newest))
-    files = files[bisect.bisect_left(files, options.startID):]
+    def report(f):
+        if options.path:
+            print("{0} is missing".format(dbu.getFileFullPath(f)))
+        else:
+            print("{0} is missing".format(f))
 
-    for f in files:
-        if options.verbose:
-            print("{0} is being checked".format(f))
-        if not dbu.checkDiskForFile(f, options.fix):
-            if options.path:
-                print("{0} is missing".format(dbu.getFileFullPath(f)))
-            else:
-                print("{0} is missing".format(f))
+    if options.scan:
+        for f in dbu.checkDiskForFiles(
+                startDate=startDate, endDate=endDate,
+                newest_version=options.newest, startID=options.startID,
+                fix=options.fix):
+            report(f)
+    else:
+        files = sorted(dbu.getAllFileIds(startDate=startDate, endDate=endDate, newest_version=options.newest))
+        files = files[bisect.bisect_left(files, options.startID):]
 
+        for f in files:
+            if options.verbose:
+                print("{0} is being checked".format(f))
+            if not dbu.checkDiskForFile(f, options.fix):
+                report(f)
 
     dbu.closeDB()
@@ -13,8 +13,7 @@ if __name__ == "__main__":
     options = parser.parse_args()
 
     a = DButils.DButils(options.mission)
-    f = a.getAllFilenames(fullPath=False)
-    for ff in f:
-        a._purgeFileFromDB(ff)
-    print('deleted {0} files'.format(len(f)))
+    f = a.getAllFileIds()
+    n = a._purgeFileFromDB(f, trust_id=True)
+    print('deleted {0} files'.format(n))
     a.closeDB()
@@ -2,55 +2,28 @@
 
 import argparse
 import datetime
-import itertools
 import os
 import os.path
 import shutil
 import warnings
 
-import networkx
+import numpy as np
 import spacepy.datamanager
 
 from dbprocessing import DButils, Version
+from dbprocessing.FileGraph import FileGraph
 
 
 def build_graph(dbu):
-    """Loads the file records and their parent-child relationships into a networkX graph
+    """Loads the file records and their parent-child relationships into a graph
 
     Arguments:
         dbu {DButils} -- The DButils instance for the mission
 
     Returns:
-        networkx.Graph -- A Graph of file records and their parent-child relationships
+        FileGraph -- A Graph of file records and their parent-child relationships
     """
-
-    G = networkx.DiGraph()
-    # This way is WAY slower, by about 3x - Myles 5/29/18
-    # G.add_nodes_from([(f.file_id, f)
-    #                   for f in dbu.session.query(dbu.File).all()])
-    G.add_nodes_from([(i, {
-        'file_id': i,
-        'filename': a,
-        'in_release': False, #Assume false, correct below
-        'newest': False, #Assume false, correct below
-        'product_id': b,
-        'utc_file_date': c,
-        'exists_on_disk': d,
-        'version': Version.Version(e, f, g)
-    }) for i, a, b, c, d, e, f, g in dbu.session.query(
-        dbu.File.file_id, dbu.File.filename, dbu.File.product_id, dbu.File.
-        utc_file_date, dbu.File.exists_on_disk, dbu.File.interface_version,
-        dbu.File.quality_version, dbu.File.revision_version).all()])
-
-    for f in dbu.getFiles(newest_version=True):
-        G.nodes[f.file_id]['newest'] = True
-    for f in dbu.session.query(dbu.Release.file_id):
-        G.nodes[f[0]]['in_release'] = True
-
-    G.add_edges_from(
-        dbu.session.query(dbu.Filefilelink.source_file,
-                          dbu.Filefilelink.resulting_file).all())
-    return G
+    return FileGraph(dbu)
 
 
 def filter_graph(graph, cutoff):
@@ -74,26 +47,26 @@ def filter_graph(graph, cutoff):
     aren't the latest (i.e. the database is in an inconsistent state).
     Earlier version of fast_data would not keep those inputs, so this
     is a little more paranoid.
+
+    Returns:
+        numpy.ndarray -- Boolean mask of graph nodes which are not kept
+                         (i.e. meet the fast data criteria)
     """
-    removenodes = set()
-    for i in graph:
-        if graph.nodes[i]['newest'] or graph.nodes[i]['in_release']:
-            removenodes.add(i)
-            removenodes.update(networkx.ancestors(graph, i))
-        if graph.in_degree(i) == 0 and graph.nodes[i]['utc_file_date'] <= cutoff:
-            removenodes.add(i)
-            removenodes.update(networkx.descendants(graph, i))
-    graph.remove_nodes_from(removenodes)
+    keep = graph.reachable(graph.newest | graph.in_release, 'ancestors')
+    old_roots = (graph.in_degree() == 0) \
+        & (graph.utc_file_date <= np.datetime64(cutoff, 'D'))
+    keep |= graph.reachable(old_roots, 'descendants')
+    return ~keep
 
 
 def reap(dbu, graph, participants, dofiles=False, dorecords=False, verbose=False,
          archive=None):
-    """Reap files and/or records from fileids in a set
+    """Reap files and/or records from nodes in a graph
 
     Arguments:
         graph: the full graph of file relationships
-        participants: Nodes (file IDs) that meet the fast data criteria
-                      (from get_fastdata_participants). Set.
+        participants: Nodes (boolean mask or node indices) that meet the
+                      fast data criteria (from filter_graph).
         dofiles: remove files from disc
         dorecords: remove records from db (only if the files do not exist)
         verbose: print matching files (ones to delete)
@@ -111,14 +84,23 @@ def reap(dbu, graph, participants, dofiles=False, dorecords=False, verbose=False
     leading_idx = len(missiondir)
     if missiondir[-1] == '':
         leading_idx -= 1
-    nodes = [graph.nodes[x] for x in participants]
-    nodes.sort(key=lambda file: (
-        file['product_id'], file['utc_file_date'], file['version']))
-    for node in reversed(nodes[:-1]):
+    participants = np.asarray(participants)
+    if participants.dtype == bool:
+        participants = np.flatnonzero(participants)
+    # Sort by product, date, version (last key is primary)
+    version = graph.version[participants]
+    nodes = participants[np.lexsort((
+        Version.packKey(version[:, 0], version[:, 1], version[:, 2]),
+        graph.utc_file_date[participants], graph.product_id[participants]))]
+    nodes = nodes[:-1][::-1]
+    # Only purge records of files that were already off disk at start
+    purge = nodes[~graph.exists_on_disk[nodes]] if dorecords else nodes[:0]
+    removed = []
+    for node in nodes:
         if verbose:
-            print(node['filename'])
-        if node['exists_on_disk'] and dofiles:
-            fullpath = dbu.getFileFullPath(node['file_id'])
+            print(graph.filename[node])
+        if graph.exists_on_disk[node] and dofiles:
+            fullpath = dbu.getFileFullPath(int(graph.file_id[node]))
             if archive is None:
                 os.remove(fullpath)
             else:
@@ -128,11 +110,14 @@ def reap(dbu, graph, participants, dofiles=False, dorecords=False, verbose=False
                 if not os.path.isdir(targetdir):
                     os.makedirs(targetdir)
                 shutil.move(fullpath, targetdir)
-            # This is slow, and we(I.E. not me) can fix it later if its too slow. - Myles 6/5/2018
-            dbu.getEntry('File', node['file_id']).exists_on_disk = False
-        if dorecords:
-            if not node['exists_on_disk']:
-                dbu._purgeFileFromDB(node['file_id'], trust_id=True)
+            removed.append(node)
+    if removed:
+        dbu._setExistsOnDisk(graph.file_id[removed].tolist(), False,
+                             commit=False)
+        graph.exists_on_disk[removed] = False
+    if purge.size:
+        dbu._purgeFileFromDB(graph.file_id[purge].tolist(),
+                             trust_id=True, commit=False)
 
 
 if __name__ == '__main__':
@@ -187,10 +172,9 @@ if __name__ == '__main__':
     dbu = DButils.DButils(options.mission)
     G = build_graph(dbu)
 
-    filter_graph(G, cut_date)
-    fd = set(G)
+    fd = filter_graph(G, cut_date)
 
-    if fd:
+    if fd.any():
         reap(dbu, G, fd, dofiles=options.files, dorecords=options.records,
              verbose=options.verbose, archive=options.archive)
 
@@ -2,8 +2,10 @@
 from __future__ import print_function
 
 import argparse
+import collections
 import datetime
 import glob
+import hashlib
 import os
 import sys
 import re
@@ -13,10 +15,11 @@ import time
 import stat
 
 import dateutil
+import numpy
 from sqlalchemy import func
 
 
-from dbprocessing import Utils, inspector
+from dbprocessing import coverage, Utils, inspector, Version
 
 from dbprocessing import DButils
 
@@ -29,64 +32,96 @@ def EventTimer(Event, Time1):
     print("%4.2f" % (Time2 - Time1), Event)
     return Time2
 
-class product(object):
-    """
-    class to hold product info
-    """
-    def __init__(self, dbu, prod):
-        """
-        prod is a dbutils instance
-        """
-        self.product_name = prod.product_name
-        self.product_id = prod.product_id
-        self.level = prod.level
-        self.satellite = dbu.getTraceback('Product', prod.product_id)['satellite'].satellite_name
-
-class file_(object):
-    """
-    class to hold file info
-    """
-    def __init__(self, dbu, f):
-        """
-        f is a dbutils file instance
-        """
-        self.filename = f.filename
-        self.version = dbu.getFileVersion(f)
-        self.utc_file_date = f.utc_file_date
+product = collections.namedtuple(
+    'product', ['product_name', 'product_id', 'level', 'satellite'])
+"""Information on one product in the report"""
+
+coverageInfo = collections.namedtuple(
+    'coverageInfo', ['startdate', 'enddate', 'satellites'])
+"""Information for the whole report, as from :func:`getInfo`"""
 
 
 def getInfo(mission):
     """
     connect to the db and get the information that we need into a dict
+
+    Products (with their satellite) are read in one joined query, and
+    the version of the newest file of each product on each date from
+    :func:`~dbprocessing.coverage.productsCoverage`. Returns a
+    :data:`coverageInfo` with the first and last file date in the
+    database; ``satellites[satellite][product_name]`` is a list of a
+    :class:`product` and an array of the version on each day (one row
+    per day from ``startdate``; -1 if no file).
     """
     Time2 = time.time()
 
-    info = {}
-
-    dbu = DButils.DButils(mission)
-    # get all the products then break them by spacecraft
-    prods = dbu.getAllProducts()
-
-    products = [product(dbu, v) for v in prods]
-
-    # loop over all the products and put them into a dict
-    for ii, p in enumerate(products):
-        if p.satellite not in info:
-            info[p.satellite] = {}
-        info[p.satellite][p.product_name] = [p,]
-
-    Time2 = EventTimer ('     Products collected', Time2) 
-
-    # loop over each product and add the files to the tuple
-    for sc in info:
-        for p in info[sc]: # p is the product name
-            info[sc][p].append([file_(dbu, f) for f in dbu.getFilesByProduct(info[sc][p][0].product_id, newest_version=True)])
-        Time2 = EventTimer ('     {0} files collected'.format(sc), Time2) 
+    dbu = DButils.DButils(mission, readonly=True)
+    startdate = dbu.session.query(func.min(dbu.File.utc_file_date)).first()[0]
+    enddate = dbu.session.query(func.max(dbu.File.utc_file_date)).first()[0]
+
+    q = dbu.session.query(
+        dbu.Satellite.satellite_name, dbu.Product.product_id,
+        dbu.Product.product_name, dbu.Product.level)\
+        .join(dbu.Instrument,
+              dbu.Instrument.satellite_id == dbu.Satellite.satellite_id)\
+        .join(dbu.Instrumentproductlink,
+              dbu.Instrumentproductlink.instrument_id
+              == dbu.Instrument.instrument_id)\
+        .join(dbu.Product, dbu.Product.product_id
+              == dbu.Instrumentproductlink.product_id)
+    products = {}  # product ID to product
+    for sat, p_id, name, level in q:
+        # First satellite of a product with more than one instrument
+        products.setdefault(p_id, product(name, p_id, level, sat))
+    p_ids = sorted(products)
+    if startdate is not None:
+        _, versions = coverage.productsCoverage(
+            dbu, p_ids, startdate, enddate)
+    else:
+        versions = numpy.full((len(p_ids), 0, 3), -1)
+    versions = versions.astype(numpy.int32)
+
+    satellites = {}
+    for p_id, ver in zip(p_ids, versions):
+        p = products[p_id]
+        satellites.setdefault(p.satellite, {})[p.product_name] = [p, ver]
+    Time2 = EventTimer ('     Products and files collected', Time2)
+
+    return coverageInfo(startdate, enddate, satellites), dbu
+
+
+def signature(dbu, info, satellite, delta_days=3):
+    """
+    find a signature of the contents of a satellite's page
 
-    return info, dbu
+    The page only needs to be rewritten if the signature changes.
+    """
+    h = hashlib.md5()
+    h.update(repr((dbu.mission, satellite, info.startdate, info.enddate,
+                   delta_days)).encode('ascii'))
+    for name in sorted(info.satellites[satellite]):
+        p, ver = info.satellites[satellite][name]
+        h.update(repr(tuple(p)).encode('ascii'))
+        h.update(ver.tobytes())
+    return h.hexdigest()
 
 
-def makeHTML(dbu, info, satellite, delta_days=3):
+def pageSignature(filename):
+    """
+    find the signature recorded in an existing page, None if none
+    """
+    try:
+        with open(filename, 'rt') as fp:
+            for line in fp:
+                match = re.match(r'\s*<!-- signature: (\w+) -->', line)
+                if match:
+                    return match.group(1)
+    except IOError:
+        pass
+    return None
+
+
+def makeHTML(dbu, info, satellite, delta_days=3, signature=None):
     """
     given the info dict mak the html that we want to write out
     """
@@ -129,6 +164,8 @@ def makeHTML(dbu, info, satellite, delta_days=3):
         kwargs['encoding'] = 'ascii'
     output = tempfile.NamedTemporaryFile(**kwargs)
     output.writelines(header)
+    if signature is not None:
+        output.write('<!-- signature: {0} -->\n'.format(signature))
 
     output.write('<h1>{0}</h1>\n'.format(dbu.mission))
     output.write('<h2>{0}</h2>\n'.format(datetime.datetime.utcnow().isoformat()))
@@ -136,7 +173,8 @@ def makeHTML(dbu, info, satellite, delta_days=3):
 
     output.write('<h2>{0}</h2>\n'.format('Files Present'))
 
-    products = sorted(info[satellite].keys(), key=lambda x: (info[satellite][x][0].level, info[satellite][x][0].product_name))
+    prodinfo = info.satellites[satellite]
+    products = sorted(prodinfo.keys(), key=lambda x: (prodinfo[x][0].level, prodinfo[x][0].product_name))
 
     def makeHeader():
         # make the table structure now for the products
@@ -152,13 +190,13 @@ def makeHTML(dbu, info, satellite, delta_days=3):
         output.write('<td></td>') #date
         output.write('<td></td>') # mission day
         for prod in products:
-            output.write('<th>{0}</th>'.format(info[satellite][prod][0].product_id))
+            output.write('<th>{0}</th>'.format(prodinfo[prod][0].product_id))
         output.write('<td></td>')
         output.write('</tr>\n')
 
     # now add in all the data
-    startdate = dbu.session.query(func.min(dbu.File.utc_file_date)).first()[0]
-    enddate = dbu.session.query(func.max(dbu.File.utc_file_date)).first()[0] + datetime.timedelta(days=delta_days)
+    startdate = info.startdate
+    enddate = info.enddate + datetime.timedelta(days=delta_days)
     d_d = enddate - startdate
 
     dates = [startdate + datetime.timedelta(days=v) for v in range(d_d.days)]
@@ -177,12 +215,14 @@ def makeHTML(dbu, info, satellite, delta_days=3):
         output.write('<td>{0}</td>'.format(
             d.strftime('%Y-%j')))
 
+        # versions for each product start on startdate
+        ind = (d - startdate).days
         for p in products:
-            fdates = [v.utc_file_date for v in info[satellite][p][1]]
-            try:
-                ind = fdates.index(d)
-                output.write('<td>[{0}]</td>'.format(info[satellite][p][1][ind].version))
-            except ValueError:
+            versions = prodinfo[p][1]
+            if ind < len(versions) and versions[ind, 0] >= 0:
+                output.write('<td>[{0}]</td>'.format(
+                    Version.Version(*versions[ind])))
+            else:
                 output.write('<td>{0}</td>'.format(None))
 
         output.write('</tr>\n')
@@ -202,6 +242,8 @@ if __name__ == "__main__":
                         help="mission to connect to")
     parser.add_argument("-d", "--deltadays", type=int,
                         help="days past last file to make table", default=3)
+    parser.add_argument("-f", "--force", action="store_true", default=False,
+                        help="rewrite all pages, even if unchanged")
     parser.add_argument('outbase', type=str,
                         help='Output filename base; _mission.html is appended.')
     options = parser.parse_args()
@@ -210,9 +252,14 @@ if __name__ == "__main__":
     info, dbu = getInfo(options.mission)
     Time1 = EventTimer ('Info collected', Time1) 
 
-    for sat in info:
-        filename = makeHTML(dbu, info, sat, delta_days=options.deltadays)
+    for sat in info.satellites:
         outname = options.outbase + '_{0}.html'.format(sat)
+        sig = signature(dbu, info, sat, delta_days=options.deltadays)
+        if not options.force and pageSignature(outname) == sig:
+            Time1 = EventTimer ('Unchanged: {0}'.format(outname), Time1)
+            continue
+        filename = makeHTML(dbu, info, sat, delta_days=options.deltadays,
+                            signature=sig)
         shutil.move(filename, outname)
         os.chmod(outname, 0o664)
         Time1 = EventTimer ('Created: {0}'.format(outname), Time1) 
@@ -13,6 +13,7 @@ try:
 except ImportError:  # Python 2
     collections.abc = collections
 import datetime
+import fnmatch
 import glob
 from pprint import pprint
 import os
@@ -24,8 +25,10 @@ import warnings
 from dateutil import parser as dup
 
 from dbprocessing import inspector
+import dbprocessing.coverage
 import dbprocessing.Utils
 import dbprocessing.DButils
+import dbprocessing.Version
 
 
 ################################################################
@@ -65,25 +68,12 @@ def cull_to_newest(files, options=None):
 
     match everything in front of v\d\d?\.\d\d?\.\d\d?\.
     """
-    ans = []
-    # make a set of all the file bases
-    tmp = [getBaseVersion(f) for f in files]
-    tmp = list(zip(*tmp))
-    bases = tmp[0]
-    versions = tmp[1]
-    uniq_bases = list(set(bases))
-    while uniq_bases:
-        val = uniq_bases.pop(0)
-        tmp = [f for f in files if val in f ]
-        if len(tmp) > 1:
-            inds = [i for i in range(len(files)) if bases[i] == val]
-            vers = [versions[i] for i in inds]
-            maxver = max(vers)
-            maxfile = [files[i] for i in inds if versions[i] == maxver][0]
-            ans.append(maxfile)
-        else:
-            ans.append(tmp[0])
-    return ans
+    newest = collections.OrderedDict()
+    for f in files:
+        base, version = getBaseVersion(f)
+        if base not in newest or version > newest[base][1]:
+            newest[base] = (f, version)
+    return [f for f, version in newest.values()]
 
 def cull_to_dates(files, startdate, enddate, nodate=False, options=None):
     """
@@ -160,6 +150,149 @@ def delete_unneeded(files, files_out, options):
             if options.verbose: print("removing unneeded link {0}".format(f))
 
 
+def newest_from_db(dbu, sourcedir, glb='*', startdate=None, enddate=None):
+    """
+    Find the newest version of files in a directory, from the database
+
+    Rather than listing sourcedir and parsing versions from filenames,
+    stream the files on disk from the database, in version order, for
+    all products which might be in sourcedir. The glob is applied in the
+    database where possible, and the newest matching file of each
+    product and date is kept. Names in the products' paths (e.g.
+    ``{SATELLITE}``) are looked up once per product.
+
+    Parameters
+    ----------
+    dbu : dbprocessing.DButils.DButils
+        Open mission database
+    sourcedir : str
+        Full path of directory containing the files
+    glb : str
+        Only include filenames matching this glob
+    startdate, enddate : datetime.date
+        First and last (inclusive) file date to include, default all
+
+    Returns
+    -------
+    dict
+        Full path to file, keyed by filename
+    """
+    sourcedir = os.path.normpath(sourcedir)
+    f = dbu.File
+    like = dbprocessing.coverage._globToLike(glb)
+    ans = {}
+    for prod in dbu.getAllProducts():
+        relative_path = prod.relative_path
+        if any('{' + k + '}' in relative_path for k in
+               ('INSTRUMENT', 'MISSION', 'PRODUCT', 'SATELLITE', 'SPACECRAFT')):
+            # Names are the same for every file of the product
+            tb = dbu.getTraceback('Product', prod.product_id)
+            for k, v in (('INSTRUMENT', tb['instrument'].instrument_name),
+                         ('MISSION', tb['mission'].mission_name),
+                         ('PRODUCT', prod.product_name),
+                         ('SATELLITE', tb['satellite'].satellite_name),
+                         ('SPACECRAFT', tb['satellite'].satellite_name)):
+                relative_path = relative_path.replace('{' + k + '}', v)
+        # Leading part of the path that does not depend on the file
+        static = os.path.normpath(os.path.join(
+            dbu.MissionDirectory, relative_path.split('{')[0]))
+        templated = '{' in relative_path
+        if not (sourcedir.startswith(static) if templated
+                else sourcedir == static):
+            continue
+        q = dbu.session.query(
+            f.filename, f.utc_file_date, f.utc_start_time,
+            f.interface_version, f.quality_version, f.revision_version)\
+            .filter_by(product_id=prod.product_id, exists_on_disk=True)
+        if startdate is not None:
+            q = q.filter(f.utc_file_date >= startdate)
+        if enddate is not None:
+            q = q.filter(f.utc_file_date <= enddate)
+        if like is not None:  # LIKE may match more, so still check glob
+            q = q.filter(f.filename.like(like, escape='\\'))
+        # Versions of a date are adjacent, newest last
+        q = q.order_by(f.utc_file_date, dbprocessing.Version.packKey(
+            f.interface_version, f.quality_version, f.revision_version))\
+            .yield_per(1000)
+        newest = {}
+        for row in q:
+            if fnmatch.fnmatch(row.filename, glb):
+                newest[row.utc_file_date] = row
+        for row in newest.values():
+            path = os.path.join(dbu.MissionDirectory, relative_path,
+                                row.filename)
+            if templated:
+                path = dbprocessing.Utils.dirSubs(
+                    path, row.filename, row.utc_file_date,
+                    row.utc_start_time, dbprocessing.Version.Version(
+                        row.interface_version, row.quality_version,
+                        row.revision_version))
+                if os.path.dirname(os.path.normpath(path)) != sourcedir:
+                    continue
+            ans[row.filename] = path
+    return ans
+
+def sync_symlinks(files, outdir, glb='*', mode='775', options=None):
+    """
+    make the symlinks in outdir match files
+
+    Lists outdir once, removes links (matching glb) which are not in
+    files or point elsewhere, and links any files which are not already.
+
+    Parameters
+    ----------
+    files : dict
+        Full path to file to link, keyed by filename
+    outdir : str
+        Directory to make links in
+    glb : str
+        Only consider existing links matching this glob
+    mode : str
+        Mode (octal) to make outdir with, if it does not exist
+
+    Returns
+    -------
+    tuple of int
+        Number of links created and removed
+    """
+    verbose = options is not None and options.verbose
+    if not os.path.isdir(outdir):
+        if verbose:
+            print('making outdir: {0} mode:{1}'.format(outdir, int(mode, 8)))
+        os.makedirs(outdir, int(mode, 8))
+    existing = {}
+    for entry in os.scandir(outdir):
+        if fnmatch.fnmatch(entry.name, glb):
+            existing[entry.name] = entry
+    removed = 0
+    for name, entry in existing.items():
+        if not entry.is_symlink():
+            if name not in files:
+                warnings.warn("Trying to remove a non link: {0}".format(
+                    entry.path))
+            continue
+        if os.readlink(entry.path) == files.get(name):
+            continue
+        if verbose: print("removing unneeded link {0}".format(entry.path))
+        os.remove(entry.path)
+        removed += 1
+    created = 0
+    for name in sorted(files):
+        entry = existing.get(name)
+        if entry is not None and (not entry.is_symlink() or
+                                  os.readlink(entry.path) == files[name]):
+            continue  # Already linked (or not ours to replace)
+        outf = os.path.join(outdir, name)
+        if verbose: print("linking {0}->{1}".format(files[name], outf))
+        try:
+            os.symlink(files[name], outf)
+            created += 1
+        except OSError:
+            warnings.warn("File {0} not linked:\n\t{1}".format(
+                files[name], traceback.format_exc()))
+    return created, removed
+
+
 def readconfig(config_filepath):
     expected_items = ['sourcedir', 'destdir', 'deltadays', 'startdate',
                       'enddate', 'filter', 'linkdirs', 'outmode', 'nodate']
@@ -205,6 +338,9 @@ if __name__ == '__main__':
                         help="Instead of syncing list the sections of the conf file", default=False)
     parser.add_argument("-f", "--filter",
                   help="Comma seperated list of strings that must be in the sync conf name (e.g. -f hope,rbspa)", default=None)
+    parser.add_argument("-m", "--mission", default=None,
+                        help="Take newest files from this mission database"
+                        " rather than from filenames")
     parser.add_argument('config', type=str, help='Configuration file')
 
     options = parser.parse_args()
@@ -237,9 +373,29 @@ if __name__ == '__main__':
         sys.exit(0)
     pprint(config)
 
+    dbu = None if options.mission is None \
+          else dbprocessing.DButils.DButils(options.mission, readonly=True)
     for sec in config:
         print('Processing [{0}]'.format(sec))
         filter = config[sec]['filter']
+        if dbu is not None:
+            startdate = enddate = None
+            if not toBool(config[sec]['nodate']):
+                startdate = dup.parse(config[sec]['startdate']).date()
+                enddate = min(
+                    dup.parse(config[sec]['enddate']).date(),
+                    datetime.date.today() - datetime.timedelta(
+                        days=int(config[sec]['deltadays'])))
+            for filt in filter.split(','):
+                print(filt.strip())
+                files = newest_from_db(dbu, config[sec]['sourcedir'],
+                                       filt.strip(), startdate, enddate)
+                created, removed = sync_symlinks(
+                    files, config[sec]['destdir'], filt.strip(),
+                    config[sec]['outmode'], options)
+                print('   {0} links created, {1} removed'.format(
+                    created, removed))
+            continue
         for filt in filter.split(','):
             files = []
             files_out = []
@@ -268,6 +424,8 @@ if __name__ == '__main__':
             #if options.verbose: print files
             #if options.verbose: print files_out
             make_symlinks(files, files_out, config[sec]['destdir'], config[sec]['linkdirs'], config[sec]['outmode'], options)
+    if dbu is not None:
+        dbu.closeDB()
 
 # Example configuration file, copy and remove leading "##" to use
 ##[isois]
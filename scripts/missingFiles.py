@@ -4,21 +4,19 @@
 """
 go through the DB and print put a list of dates that do not have files for a given database
 
+Missing dates for every child product are found at once (see
+:mod:`dbprocessing.coverage`), and the files of the parent products
+on those dates added to the process queue in one push.
 """
 
 import argparse
 import datetime
-import fnmatch
-import os
-import subprocess
-import sys
 
 from dateutil import parser as dup
 
 import dbprocessing.DBlogging as DBlogging
-import dbprocessing.dbprocessing as dbprocessing
+from dbprocessing import coverage
 from dbprocessing import DButils
-from dbprocessing import inspector
 
 
 if __name__ == "__main__":
@@ -29,8 +27,9 @@ if __name__ == "__main__":
                         help="Date to end search (e.g. 2012-10-25 or 20121025)", default=None)
     parser.add_argument("-m", "--mission", dest="mission", required=True,
                         help="selected mission database **required**", default=None)
+    parser.add_argument("-d", "--dryrun", action="store_true", default=False,
+                        help="only print missing dates, do not add to the process queue")
 
-    
     options = parser.parse_args()
 
     if options.startDate is not None:
@@ -45,23 +44,32 @@ if __name__ == "__main__":
     if endDate < startDate:
         parser.error("endDate must be >= to startDate")
 
-    dbu = DButils.DButils(options.mission)
+    dbu = DButils.DButils(options.mission, readonly=options.dryrun)
 
     # get the product tree:
     tree = dbu.getProductParentTree()
-    del dbu
-    for t1 in tree:
-        for t2 in t1[1]:
-            cmd = [
-                sys.executable,
-                os.path.join(os.path.dirname(__file__),
-                             'missingFilesByProduct.py'),
-                '-m', options.mission,
-                '-s', startDate.date().isoformat(),
-                '-e', endDate.date().isoformat(),
-                '-p', '--parent={0}'.format(t1[0]), str(t2) ]
-            print("Running {0}".format(cmd))
-            subprocess.call(cmd)
-            
-
+    children = sorted(set(c for parent, kids in tree for c in kids))
+    missing = coverage.missingDates(dbu, children,
+                                    startDate.date(), endDate.date())
 
+    # dates to reprocess for each parent product
+    todo = {}
+    for parent, kids in tree:
+        for child in kids:
+            if not missing[child]:
+                continue
+            print("Missing files for product {0} (parent {1}) for these dates:"
+                  .format(child, parent))
+            print("{0}".format(' '.join(d.isoformat() for d in missing[child])))
+            todo.setdefault(parent, set()).update(missing[child])
+    if not todo:
+        print("No missing files")
+    elif not options.dryrun:
+        files = coverage.filesOnDates(dbu, todo)
+        added = dbu.ProcessqueuePush(files)
+        print("   -- Added {0} files to be reprocessed for products {1}"
+              .format(len(added), ', '.join(str(p) for p in sorted(todo))))
+        DBlogging.dblogger.info(
+            'Added {0} files to be reprocessed for products {1}'.format(
+                len(added), ', '.join(str(p) for p in sorted(todo))))
+    dbu.closeDB()
@@ -9,7 +9,6 @@ go through the DB and print put a list of dates that do not have files for a giv
 import argparse
 import datetime
 import fnmatch
-from operator import itemgetter
 import sys
 import warnings
 
@@ -17,6 +16,7 @@ from dateutil import parser as dup
 
 import dbprocessing.DBlogging as DBlogging
 import dbprocessing.dbprocessing as dbprocessing
+from dbprocessing import coverage
 from dbprocessing import DButils
 from dbprocessing import inspector
 
@@ -65,29 +65,10 @@ if __name__ == "__main__":
 
     dbu = DButils.DButils(options.mission, echo=options.echo)
 
-    dates = [startDate + datetime.timedelta(days=v) for v in range((endDate-startDate).days +1)]
-    if not dates: # only one day
-        dates = [startDate]
-
-    # this is the possible dates for a product
-    dates = sorted(dates)
-
     product_id = options.product_id
 
-    dbfiles = dbu.getFilesByProductDate(product_id,
-                                        [startDate, endDate],
-                                        newest_version=True)
-    # this returns filenames
-    # make it file objects
-    #dbfiles = [dbu.getEntry('File', v) for v in dbfiles]
-    
-    # this is then file objects for all the newest files in the date range for this product
-    # find the missing days
-    missing_dates = []
-    for d in dates:
-        tmp = [f.filename for f in dbfiles if f.utc_file_date == d]
-        if not tmp:
-            missing_dates.append(d)
+    missing_dates = coverage.missingDates(
+        dbu, [product_id], startDate, endDate)[product_id]
     if not missing_dates:
         print("No missing files")
         del dbu
@@ -100,9 +81,7 @@ if __name__ == "__main__":
     if options.process:
         if options.parent is None:
             parser.error("Cannot process without a parent product id specified")
-        # do a custom query here to get all the file ids in one sweep
-        files = dbu.session.query(dbu.File.file_id).filter_by(product_id=options.parent).filter(dbu.File.utc_file_date.in_(missing_dates)).all()
-        files = list(map(itemgetter(0), files))
+        files = coverage.filesOnDates(dbu, {options.parent: missing_dates})
         added = dbu.ProcessqueuePush(files)
         print("   -- Added {0} files to be reprocessed for product {1}".format(len(added), options.parent))
         DBlogging.dblogger.info('Added {0} files to be reprocessed for product {1}'.format(len(added), options.parent))
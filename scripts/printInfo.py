@@ -46,7 +46,7 @@ if __name__ == '__main__':
     mission = options.database
     field = options.field.capitalize()
 
-    dbu = DButils.DButils(mission)
+    dbu = DButils.DButils(mission, readonly=True)
 
     basepath = dbu.session.query(dbu.Mission).filter_by(mission_name=dbu.getMissions()[0]).all()[0].rootdir
     if not hasattr(dbu, field):
@@ -7,8 +7,11 @@ import sys
 
 from dbprocessing import DButils
 
-def output_html(items, products=None):
-    output = """<!DOCTYPE html>
+def output_html(items, products=None, start=0, output=None):
+    """Write queue as HTML to output (default stdout), a row at a time"""
+    if output is None:
+        output = sys.stdout
+    output.write("""<!DOCTYPE html>
 <html>
   <head>
     <title>DBprocessing</title>
@@ -34,48 +37,48 @@ def output_html(items, products=None):
 
 
   <body>
-"""
-    output += '    <h1>{0}</h1>\n'.format(dbu.mission)
-    output += '    <h2>{0}</h2>\n'.format(datetime.datetime.utcnow().isoformat())
+""")
+    output.write('    <h1>{0}</h1>\n'.format(dbu.mission))
+    output.write('    <h2>{0}</h2>\n'.format(datetime.datetime.utcnow().isoformat()))
 
     if products:
-        output += '    <h2>{0}</h2>\n'.format('Products')
-        output +="""    <table>
+        output.write('    <h2>{0}</h2>\n'.format('Products'))
+        output.write("""    <table>
         <tr><th>product_id</th><th>product</th></tr>
-"""
+""")
         for i, prod in enumerate(products):
-            output += '        <tr{}>'.format(
-                " class='alt'" if i % 2 else '')
-            output += '<td>{0}</td><td>{1}</td></tr>\n'.format(
-                prod.product_id, prod.product_name)
-        output += "    </table>\n"
-    output += '    <h2>{0}</h2>\n'.format('processQueue')
-    output +="""    <table>
+            output.write('        <tr{}>'.format(
+                " class='alt'" if i % 2 else ''))
+            output.write('<td>{0}</td><td>{1}</td></tr>\n'.format(
+                prod.product_id, prod.product_name))
+        output.write("    </table>\n")
+    output.write('    <h2>{0}</h2>\n'.format('processQueue'))
+    output.write("""    <table>
         <tr><th>file #</th><th>filename</th><th>product</th></tr>
-"""
-    for index, item in enumerate(items):
+""")
+    for index, item in enumerate(items, start):
         if( index % 2 == 0 ):
-            output += '        <tr>'
+            output.write('        <tr>')
         else:
-            output += "        <tr class='alt'>"
+            output.write("        <tr class='alt'>")
 
-        output += '<td>{0}</td><td>{1}</td><td>{2}</td></tr>\n'.format(index, item['file'].filename, item['product'].product_name)
+        output.write('<td>{0}</td><td>{1}</td><td>{2}</td></tr>\n'.format(index, item.filename, item.product_name))
 
-    output += "    </table>\n  </body>\n</html>"
-    return output
+    output.write("    </table>\n  </body>\n</html>")
 
-def output_text(items, products=None):
-    output = dbu.mission + '\n'
-    output += datetime.datetime.utcnow().isoformat() + '\n'
+def output_text(items, products=None, start=0, output=None):
+    """Write queue as text to output (default stdout), a line at a time"""
+    if output is None:
+        output = sys.stdout
+    output.write(dbu.mission + '\n')
+    output.write(datetime.datetime.utcnow().isoformat() + '\n')
     if products:
-        output += 'Products\n{}\n'.format('\n'.join([
+        output.write('Products\n{}\n'.format('\n'.join([
             '{}\t{}'.format(p.product_id, p.product_name)
-            for p in products]))
-    output += 'ProcessQueue\n'
-    for index, item in enumerate(items):
-        output += '{0}\t{1}\t{2}\n'.format(index, item['file'].filename, item['product'].product_name)
-
-    return output
+            for p in products])))
+    output.write('ProcessQueue\n')
+    for index, item in enumerate(items, start):
+        output.write('{0}\t{1}\t{2}\n'.format(index, item.filename, item.product_name))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
@@ -94,37 +97,43 @@ if __name__ == '__main__':
     parser.add_argument(
         "-s", "--sort", action='store_true',
         help="Sort output by date, then product (default: in queue order).")
+    parser.add_argument(
+        "--offset", type=int, default=None,
+        help="Skip this many files at start of output.")
+    parser.add_argument(
+        "--limit", type=int, default=None,
+        help="Output at most this many files.")
     returncode = parser.add_mutually_exclusive_group()
     returncode.add_argument("-e", "--exist",  action='store_true',
                             help="Exit code 1 if queue empty; 0 (True) if not.")
     returncode.add_argument("-c", "--count", action='store_true',
                             help="Set exit code to count of files in queue.")
     options = parser.parse_args()
-    if options.quiet and (options.html or options.output or options.sort):
-        parser.error('--html, -o, and -s are useless with -q.')
+    if options.quiet and (options.html or options.output or options.sort
+                          or options.offset or options.limit):
+        parser.error('--html, -o, -s, --offset, and --limit are useless'
+                     ' with -q.')
 
-    dbu = DButils.DButils(options.database)
-    items = dbu.ProcessqueueGetAll()
-    traceback = [dbu.getTraceback('File', v) for v in items]
+    dbu = DButils.DButils(options.database, readonly=True)
     products = None if options.product is None\
                else [dbu.getEntry('Product', p) for p in options.product]
-    if products:
-        prod_ids = [p.product_id for p in products]
-        traceback = [tb for tb in traceback if tb['product'].product_id
-                     in prod_ids]
-    if options.sort:
-        traceback.sort(key=lambda x: (x['file'].utc_file_date,
-                                      x['product'].product_name))
+    prod_ids = [p.product_id for p in products] if products else None
     if not options.quiet:
-        out = (output_html if options.html else output_text)(
-            traceback, products)
+        items = dbu.ProcessqueueIter(products=prod_ids, sort=options.sort,
+                                     offset=options.offset,
+                                     limit=options.limit)
+        writer = output_html if options.html else output_text
         if options.output is None:
-            print(out)
+            writer(items, products, start=options.offset or 0)
+            print()
         else:
             with open(options.output, 'w') as output:
-                output.write(out)
-    del dbu
+                writer(items, products, start=options.offset or 0,
+                       output=output)
+    if options.exist or options.count:
+        count = dbu.ProcessqueueLen(products=prod_ids)
+    dbu.closeDB()
     if options.exist:
-        sys.exit(not(traceback))
+        sys.exit(not(count))
     if options.count:
-        sys.exit(min(len(traceback), 255))
+        sys.exit(min(count, 255))
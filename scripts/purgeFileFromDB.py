@@ -14,6 +14,9 @@ if __name__ == '__main__':
                         help="Recursive removal", default=False)
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Verbose", default=False)
+    parser.add_argument("-d", "--dryrun", action="store_true",
+                        help="Only count files that would be removed",
+                        default=False)
     parser.add_argument("-m", "--mission", required=True,
                         help="selected mission database", default=None)
     parser.add_argument("filename", nargs='+',
@@ -21,5 +24,7 @@ if __name__ == '__main__':
     options = parser.parse_args()
 
     dbu = DButils.DButils(options.mission)
-    dbu._purgeFileFromDB(options.filename, recursive=options.recursive, verbose=options.verbose)
+    n = dbu._purgeFileFromDB(options.filename, recursive=options.recursive, verbose=options.verbose,
+                             dryrun=options.dryrun)
+    print('{0} files {1}'.format(n, 'would be removed' if options.dryrun else 'removed'))
     dbu.closeDB()
@@ -2,36 +2,28 @@
 
 import argparse
 
-from dbprocessing import DButils
+from dbprocessing import DBcheck, DButils
 
 class scrubber(object):
     def __init__(self, mission):
-        self.dbu = DButils.DButils(mission)
+        self.dbu = DButils.DButils(mission, readonly=True)
 
     def __del__(self):
         del self.dbu
 
     def parents_are_newest(self):
-        n = self.dbu.getAllFileIds(newest_version=True)
-
-        xp = self.dbu.session.query(self.dbu.Filefilelink.source_file).filter(self.dbu.Filefilelink.resulting_file.in_(n)).all()
-        np = set(list(zip(*xp))[0])
-
-        if np.issubset(n):
+        bad = DBcheck.runCheck(self.dbu, 'parents_not_newest')
+        if not bad:
             print("All parents of newest are newest")
         else:
             print("Parents of newest aren't newest")
-            print(np.difference(n))
+            print(set(b['source_file'] for b in bad))
 
     def version_number_check(self):
-        x = self.dbu.session.execute("SELECT max(interface_version), max(quality_version), max(revision_version) FROM file").fetchone()
-        if x[0] >= 1000:
-            print("A interface version is too large")
-        if x[1] >= 1000:
-            print("A quality version is too large")
-        if x[2] >= 1000:
-            print("A revision version is too large")
-        
+        for f in DBcheck.runCheck(self.dbu, 'version_too_large'):
+            print("File {0}:{1} has a version that is too large".format(
+                f['file_id'], f['filename']))
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
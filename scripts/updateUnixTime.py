@@ -2,8 +2,9 @@
 
 """Update Unix file timestamps in a database from the UTC start/stop time"""
 
+from __future__ import print_function
+
 import argparse
-import datetime
 import sys
 
 import dbprocessing.DButils
@@ -25,34 +26,47 @@ def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("-m", "--mission", required=True,
                         help="selected mission database")
+    parser.add_argument("--missing", action="store_true", default=False,
+                        help="Only add Unix times for files without one")
+    parser.add_argument("-c", "--checkpoint", default=None,
+                        help="Checkpoint file, to resume an interrupted run")
+    parser.add_argument("-b", "--batch-size", dest="batchsize", type=int,
+                        default=10000,
+                        help="Number of files per batch (and checkpoint)")
     options = parser.parse_args(argv)
     return vars(options)
 
 
-def main(mission):
+def main(mission, missing=False, checkpoint=None, batchsize=10000):
     """Rewrite Unix timestamps for a database.
 
     Opens an existing database and rewrites all Unix timestamps based on the
-    UTC file timestamps.
+    UTC file timestamps. Prints progress after each batch (to stderr).
 
     Parameters
     ==========
     mission : str
         Path to the mission file
+    missing : bool
+        Only add Unix times for files without one (e.g. to finish an
+        interrupted migration), do not rewrite existing times.
+    checkpoint : str
+        Path to checkpoint file
+    batchsize : int
+        Number of files per batch
     """
     dbu = dbprocessing.DButils.DButils(mission)
-    unx0 = datetime.datetime(1970, 1, 1)
-    for f in dbu.getFiles(): # Populate the times
-        r = dbu.getEntry('Unixtime', f.file_id)
-        # If changed, also change addFile, addUnixTimeTable, getFiles
-        # (all in DButils)
-        r.unix_start = int((f.utc_start_time - unx0)\
-                           .total_seconds())
-        r.unix_stop = int((f.utc_stop_time - unx0)\
-                          .total_seconds())
-    dbu.commitDB()
+    done = 0
+    try:
+        for last, count in dbu.fillUnixTime(
+                update=not missing, batchsize=batchsize,
+                checkpoint=checkpoint):
+            done += count
+            print('{0} Unix times written, through file_id {1}'.format(
+                done, last), file=sys.stderr)
+    finally:
+        dbu.closeDB()
 
 
 if __name__ == "__main__":
     main(**parse_args())
-
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""Verify checksums of all files in a database against the files on disk"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+import dbprocessing.DButils
+
+
+def parse_args(argv=None):
+    """Parse arguments for this script
+
+    Parameters
+    ==========
+    argv : list
+        Argument list, default from sys.argv
+
+    Returns
+    =======
+    options : argparse.Values
+        Arguments from command line, from flags and non-flag arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--mission", required=True,
+                        help="selected mission database")
+    parser.add_argument("-n", "--num-proc", dest="processes", type=int,
+                        default=1, help="Number of files to hash at once")
+    parser.add_argument("-c", "--checkpoint", default=None,
+                        help="Checkpoint file, to resume an interrupted run")
+    parser.add_argument("-b", "--batch-size", dest="batchsize", type=int,
+                        default=1000,
+                        help="Number of files per batch (and checkpoint)")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Maximum number of files to check")
+    options = parser.parse_args(argv)
+    return vars(options)
+
+
+def main(mission, processes=1, checkpoint=None, batchsize=1000, limit=None):
+    """Verify checksums of files in a database
+
+    Prints every file that is missing or has a bad checksum, and
+    progress/throughput after each batch (to stderr).
+
+    Parameters
+    ==========
+    mission : str
+        Path to the mission file
+    processes : int
+        Number of files to hash at once
+    checkpoint : str
+        Path to checkpoint file
+    batchsize : int
+        Number of files per batch
+    limit : int
+        Maximum number of files to check
+
+    Returns
+    =======
+    int
+        Number of files with problems
+    """
+    dbu = dbprocessing.DButils.DButils(mission)
+    msgs = {1: 'bad checksum', 2: 'missing'}
+    t0 = time.time()
+    checked = bad = nbytes = 0
+    try:
+        for f_id, fname, res, size in dbu.verifyFiles(
+                limit=limit, processes=processes, batchsize=batchsize,
+                checkpoint=checkpoint):
+            checked += 1
+            nbytes += size
+            if res:
+                bad += 1
+                print('{0} {1}: {2}'.format(f_id, fname, msgs[res]))
+            if checked % batchsize == 0:
+                elapsed = time.time() - t0
+                sys.stderr.write(
+                    '{0} files checked, {1} bad, {2:.1f} files/s,'
+                    ' {3:.1f} MB/s\n'.format(
+                        checked, bad, checked / elapsed,
+                        nbytes / elapsed / 1e6))
+    finally:
+        dbu.closeDB()
+    elapsed = time.time() - t0
+    sys.stderr.write('Done: {0} files checked, {1} bad in {2:.1f} s\n'
+                     .format(checked, bad, elapsed))
+    return bad
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main(**parse_args()) else 0)
@@ -285,6 +285,10 @@ class AddtoDBMixin(object):
             tbl.drop()
             self.dbu.metadata.remove(tbl)
             del self.dbu.Unixtime
+            if not self.pg:  # postgresql index went with the table
+                self.dbu.session.execute('DROP TABLE {}'.format(
+                    dbprocessing.tables.interval_index))
+            self.dbu._intervalIndex = False
         if data['productprocesslink']\
            and 'yesterday' not in data['productprocesslink'][0]:
             # Dump from old database w/o yesterday/tomorrow,
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Unit testing for DBcheck"""
+
+import datetime
+import os.path
+import unittest
+
+import dbp_testing
+from dbprocessing import DBcheck
+
+
+class DBcheckTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """Tests for database consistency checks"""
+
+    def setUp(self):
+        super(DBcheckTests, self).setUp()
+        self.makeTestDB()
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+
+    def tearDown(self):
+        super(DBcheckTests, self).tearDown()
+        self.removeTestDB()
+
+    def test_clean(self):
+        """Checks on a consistent database"""
+        results = DBcheck.runChecks(self.dbname, connections=3)
+        self.assertEqual(list(DBcheck.checks), list(results))
+        for name in results:
+            if name != 'suspicious_duration':
+                self.assertEqual([], results[name], name)
+        self.assertEqual([6645], [v['file_id'] for v in
+                                  results['suspicious_duration']])
+
+    def test_violations(self):
+        """Find violations of checks"""
+        parent = self.dbu.getEntry('File', 5865)
+        date = datetime.datetime.combine(parent.utc_file_date,
+                                         datetime.time())
+        self.addFile('newer_parent_20130904_v9.0.0', parent.product_id,
+                     utc_date=date)
+        dup = self.addFile('duplicate_20130904_v9.0.0', parent.product_id,
+                           utc_date=date)
+        big = self.addFile('big_20130904_v1000.0.0', 10, utc_date=date)
+        self.dbu.session.query(self.dbu.Instrumentproductlink)\
+            .filter_by(product_id=10).delete()
+        self.dbu.commitDB()
+        results = DBcheck.runChecks(
+            self.dbname, ['duplicate_version', 'parents_not_newest',
+                          'version_too_large', 'no_instrument_link'])
+        self.assertEqual(
+            [{'product_id': parent.product_id,
+              'utc_file_date': parent.utc_file_date,
+              'interface_version': 9, 'quality_version': 0,
+              'revision_version': 0, 'count': 2}],
+            results['duplicate_version'])
+        # 5991 is no longer newest, since "big" is newer
+        self.assertEqual([], results['parents_not_newest'])
+        self.assertEqual([big],
+                         [v['file_id'] for v in results['version_too_large']])
+        self.assertEqual([10], [v['product_id']
+                                for v in results['no_instrument_link']])
+        self.dbu._purgeFileFromDB([big], trust_id=True)
+        self.assertEqual(
+            [{'resulting_file': 5991, 'source_file': 5865}],
+            DBcheck.runCheck(self.dbu, 'parents_not_newest'))
+
+    def test_unknown(self):
+        """Unknown check name"""
+        with self.assertRaises(KeyError):
+            DBcheck.runChecks(self.dbname, ['nonexistent'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Unit testing for DBprofile"""
+
+from __future__ import print_function
+
+import json
+import os.path
+import unittest
+
+import dbp_testing
+from dbprocessing import DBprofile
+
+
+class DBProfilerTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """Tests for DBProfiler class"""
+
+    def setUp(self):
+        super(DBProfilerTests, self).setUp()
+        self.makeTestDB()
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+        self.prof = DBprofile.DBProfiler(self.dbu)
+
+    def tearDown(self):
+        self.prof.stop()
+        super(DBProfilerTests, self).tearDown()
+        self.removeTestDB()
+
+    def test_counts(self):
+        """Count calls and statements per method"""
+        self.prof.start()
+        for i in range(3):
+            self.dbu.getFileID(1)
+        self.dbu.getFileParents(1881, id_only=True)
+        self.prof.stop()
+        # Including the call from getFileParents
+        self.assertEqual(4, self.prof.stats['getFileID']['calls'])
+        self.assertEqual(1, self.prof.stats['getFileParents']['calls'])
+        self.assertTrue(self.prof.stats['getFileParents']['statements'] > 0)
+        self.assertTrue(self.prof.stats['getFileParents']['time']
+                        >= self.prof.stats['getFileParents']['sql_time'])
+        self.assertFalse('getEntry' in self.prof.stats)
+
+    def test_stop(self):
+        """Stopping restores original methods"""
+        self.prof.start()
+        self.assertTrue('getFileID' in vars(self.dbu))
+        self.prof.stop()
+        self.assertFalse('getFileID' in vars(self.dbu))
+        self.dbu.getFileID(1)
+        self.assertEqual({}, self.prof.stats)
+
+    def test_other(self):
+        """Statements outside a method are collected separately"""
+        self.prof.start()
+        self.dbu.session.query(self.dbu.File).all()
+        self.prof.stop()
+        self.assertEqual(
+            1, self.prof.stats[DBprofile.DBProfiler.OTHER]['statements'])
+        self.assertEqual(
+            0, self.prof.stats[DBprofile.DBProfiler.OTHER]['calls'])
+
+    def test_report(self):
+        """Format the statistics"""
+        self.prof.start()
+        self.dbu.getFileID(1)
+        self.prof.stop()
+        stats = json.loads(self.prof.report('json'))
+        self.assertEqual(1, stats['getFileID']['calls'])
+        lines = self.prof.report().split('\n')
+        self.assertEqual(['method', 'calls', 'statements', 'rows', 'time',
+                          'sql_time'], lines[0].split())
+        self.assertEqual('getFileID', lines[1].split()[0])
+        self.assertRaises(ValueError, self.prof.report, 'xml')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@
 from __future__ import print_function
 
 import datetime
+import json
 import os
 import os.path
 import shutil
@@ -142,6 +143,26 @@ class DBUtilsOtherTests(TestSetup):
                          'ect_rbspa_0377_377_01.ptp.gz'])
         self.assertEqual(ans, newest_files)
 
+    def test_readonly(self):
+        """Read-only access reads, refuses writes"""
+        ro = DButils.DButils(self.dbname, readonly=True)
+        try:
+            self.assertTrue(ro.readonly)
+            self.assertEqual(922, len(ro.getAllFileIds()))
+            f = ro.getEntry('File', 1)
+            f.exists_on_disk = not f.exists_on_disk
+            with self.assertRaises(DButils.DBError) as cm:
+                ro.commitDB()
+            self.assertEqual('Database is open read-only', str(cm.exception))
+            ro.session.rollback()
+            self.assertRaises(DButils.DBError, ro.ProcessqueueFlush)
+            # Reader does not block the writer
+            self.dbu.ProcessqueueFlush()
+            self.dbu.ProcessqueueRawadd(1)
+            self.assertEqual([1], ro.ProcessqueueGetAll())
+        finally:
+            ro.closeDB()
+
     def test_checkIncoming(self):
         """checkIncoming"""
         e = self.dbu.getEntry('Mission', 1)
@@ -228,6 +249,25 @@ class DBUtilsOtherTests(TestSetup):
                           'ect_rbspb_0377_356_01.ptp.gz')
         self.assertEqual(self.dbu.session.query(self.dbu.File).count(), 921)
 
+    def test_purgeFileFromDBRecursive(self):
+        """purgeFileFromDB, removing all descendants"""
+        self.assertEqual([518, 562, 1872, 1881],
+                         self.dbu.getFileDescendants(243, id_only=True))
+        self.assertEqual(5, self.dbu._purgeFileFromDB(
+            'ect_rbspa_0377_35c_02.ptp.gz', recursive=True, dryrun=True))
+        self.assertEqual(self.dbu.session.query(self.dbu.File).count(), 922)
+        self.dbu.ProcessqueuePush([518, 1881, 17])
+        self.assertEqual(5, self.dbu._purgeFileFromDB(
+            'ect_rbspa_0377_35c_02.ptp.gz', recursive=True))
+        self.assertEqual(self.dbu.session.query(self.dbu.File).count(), 917)
+        for f in (243, 518, 562, 1872, 1881):
+            self.assertRaises(DButils.DBNoData, self.dbu.getFileID, f)
+            self.assertFalse(self.dbu.session.query(self.dbu.Filefilelink)
+                             .filter((self.dbu.Filefilelink.source_file == f)
+                                     | (self.dbu.Filefilelink.resulting_file
+                                        == f)).count())
+        self.assertEqual([17], self.dbu.ProcessqueueGetAll())
+
     def test_nameSubProduct(self):
         """_nameSubProduct"""
         self.assertTrue(self.dbu._nameSubProduct(None, 1) is None)
@@ -454,6 +494,52 @@ class DBUtilsGetTests(TestSetup):
         files = self.dbu.getAllFileIds(newest_version=True, limit=10)
         self.assertEqual(10, len(files))
         self.assertEqual(len(files), len(set(files)))
+        # Same files as getFiles, not as iterFiles
+        self.assertEqual(
+            sorted(f.file_id for f in self.dbu.getFiles(
+                newest_version=True, limit=10)),
+            sorted(files))
+
+    def test_iterFiles(self):
+        """iterFiles matches getFiles"""
+        kwargs = {'startDate': datetime.date(2013, 9, 10),
+                  'endDate': datetime.date(2013, 9, 12)}
+        expected = sorted(f.file_id for f in self.dbu.getFiles(**kwargs))
+        self.assertTrue(expected)
+        files = list(self.dbu.iterFiles(yield_per=2, **kwargs))
+        self.assertEqual(expected, sorted(f.file_id for f in files))
+        self.assertTrue(isinstance(files[0], self.dbu.File))
+        files = list(self.dbu.iterFiles(columns=['file_id', 'filename'],
+                                        **kwargs))
+        self.assertEqual(expected, sorted(f.file_id for f in files))
+        self.assertEqual(self.dbu.getEntry('File', files[0].file_id).filename,
+                         files[0].filename)
+
+    def test_iterFilesNewest(self):
+        """iterFiles matches getFiles, newest version"""
+        expected = sorted(f.file_id for f in
+                          self.dbu.getFiles(newest_version=True))
+        self.assertEqual(
+            expected,
+            sorted(f.file_id for f in self.dbu.iterFiles(
+                newest_version=True, yield_per=7)))
+        files = list(self.dbu.iterFiles(newest_version=True,
+                                        columns=['file_id']))
+        self.assertEqual(expected, sorted(f.file_id for f in files))
+        self.assertEqual(('file_id', 'product_id', 'utc_file_date'),
+                         tuple(files[0]._fields))
+
+    def test_iterFilesLimit(self):
+        """iterFiles applies limit after sorting"""
+        self.assertEqual(list(range(1, 11)), [
+            f.file_id for f in self.dbu.iterFiles(limit=10,
+                                                  columns=['file_id'])])
+        files = list(self.dbu.iterFiles(newest_version=True, limit=10,
+                                        columns=['file_id']))
+        first = min((f.product_id, f.utc_file_date) for f in
+                    self.dbu.getFiles())
+        self.assertEqual(first, (files[0].product_id, files[0].utc_file_date))
+        self.assertTrue(len(files) <= 10)
 
     def test_getAllCodes(self):
         """getAllCodes"""
@@ -722,6 +808,53 @@ class DBUtilsGetTests(TestSetup):
         val = self.dbu.getFiles(startTime=start_time, product=4)
         self.assertEqual([fID], [v.file_id for v in val])
 
+    def test_getFilesUTCDayInterval(self):
+        """getFiles with a single UTC day time, lookup by interval index"""
+        self.dbu.addUnixTimeTable()
+        self.dbu.addIntervalIndex()
+        self.assertRaises(RuntimeError, self.dbu.addIntervalIndex)
+        self.test_getFilesUTCDay()
+        self.test_getFilesStartTime()
+        self.test_getFilesByProductTime()
+
+    def test_intervalIndexUpdate(self):
+        """Interval index is kept up to date with the Unix time table"""
+        self.dbu.addUnixTimeTable()
+        self.dbu.addIntervalIndex()
+        kwargs = {
+            'filename': "rbspa_int_ect-mageisM35-hr-L1_20100101_v1.0.0.cdf",
+            'data_level': 1.0,
+            'version': Version.Version(1, 0, 0),
+            'file_create_date': datetime.date(2010, 1, 1),
+            'exists_on_disk': True,
+            'utc_file_date': datetime.date(2010, 1, 1),
+            'utc_start_time': datetime.datetime(2010, 1, 1),
+            'utc_stop_time': datetime.datetime(2010, 1, 1, 23),
+            'product_id': 4,
+            'shasum': '0'
+        }
+        fID = self.dbu.addFile(**kwargs)
+        val = self.dbu.getFiles(
+            startTime=datetime.datetime(2010, 1, 1, 22), product=4)
+        self.assertEqual([fID], [v.file_id for v in val])
+        r = self.dbu.getEntry('Unixtime', fID)
+        r.unix_stop += 3600
+        self.dbu.commitDB()
+        # Past the original stop, only found if index updated
+        val = self.dbu.getFiles(
+            startTime=datetime.datetime(2010, 1, 1, 23, 30), product=4)
+        self.assertEqual([fID], [v.file_id for v in val])
+        # A second past the new stop
+        val = self.dbu.getFiles(
+            startTime=datetime.datetime(2010, 1, 2, 0, 0, 1), product=4)
+        self.assertEqual([], val)
+        self.dbu._purgeFileFromDB(fID)
+        if self.pg:  # Index is on the table itself
+            return
+        self.assertEqual(0, self.dbu.session.execute(
+            'SELECT COUNT(*) FROM unixtime_interval WHERE id = {}'
+            .format(fID)).scalar())
+
     def test_getFilesByProductTime(self):
         """getFiles by the UTC date of data"""
         expected = ['ect_rbspb_0377_381_05.ptp.gz',
@@ -891,6 +1024,27 @@ class DBUtilsGetTests(TestSetup):
         self.assertFalse(self.dbu.getCodeFromProcess(1, datetime.date(1900, 9, 11)))
         self.assertTrue(self.dbu.getCodeFromProcess(1, datetime.date(1900, 9, 11)) is None)
 
+    def test_getCodeFromProcessMultiple(self):
+        """getCodeFromProcess with more than one active code"""
+        code = self.dbu.getEntry('Code', 1)
+        self.dbu.addCode('second_code.py', code.relative_path,
+                         '2010-01-01', '2099-01-01', 'duplicate',
+                         code.process_id, '2.0.0', True, '2013-01-01',
+                         code.output_interface_version, True)
+        with self.assertRaises(DButils.DBError) as cm:
+            self.dbu.getCodeFromProcess(1, datetime.date(2013, 9, 10))
+        self.assertEqual('More than one code active for a Given day',
+                         str(cm.exception))
+
+    def test_statementCache(self):
+        """Lookup statements are built once and reused"""
+        self.dbu.getFileID('rbspb_pre_MagEphem_OP77Q_20130909_v1.0.0.txt')
+        stmt = self.dbu._statement('fileIDByName')
+        self.assertEqual(1, self.dbu.getFileID(
+            'rbspb_pre_MagEphem_OP77Q_20130909_v1.0.0.txt'))
+        self.assertIs(stmt, self.dbu._statement('fileIDByName'))
+        self.assertRaises(ValueError, self.dbu._statement, 'badStatement')
+
     def test_getMissionDirectory(self):
         """getMissionDirectory"""
         self.assertEqual(
@@ -1014,6 +1168,42 @@ class DBUtilsGetTests(TestSetup):
         self.assertEqual([235, 240, 233], ids)
         self.assertEqual([], self.dbu.getFileParents(255))
 
+    def test_getFileParentsMissing(self):
+        """getFileParents with a parent that has no file record"""
+        if self.pg:
+            self.skipTest('Link to nonexistent file violates foreign key')
+        self.dbu.session.execute(
+            self.dbu.metadata.tables['filefilelink'].insert(),
+            {'source_file': 100000, 'resulting_file': 517})
+        self.dbu.commitDB()
+        self.assertEqual(4, len(self.dbu.getFileParents(517, id_only=True)))
+        with self.assertRaises(DButils.DBNoData):
+            self.dbu.getFileParents(517)
+
+    def test_getFileAncestors(self):
+        """getFileAncestors"""
+        ids, links = self.dbu.getFileAncestors(1881, id_only=True, edges=True)
+        self.assertEqual([242, 243, 245, 247, 248, 249, 250, 518, 526, 562,
+                          568, 1824, 1868, 1872], ids)
+        self.assertEqual(15, len(links))
+        self.assertTrue((1872, 1881) in links)
+        self.assertTrue((243, 518) in links)
+        self.assertEqual(sorted(self.dbu.getFileParents(1881, id_only=True)),
+                         self.dbu.getFileAncestors(1881, depth=1, id_only=True))
+        files = self.dbu.getFileAncestors(1881, depth=2)
+        self.assertEqual([562, 568, 1824, 1868, 1872],
+                         [f.file_id for f in files])
+        self.assertEqual([], self.dbu.getFileAncestors(243))
+
+    def test_getFileDescendants(self):
+        """getFileDescendants"""
+        self.assertEqual(([518, 562], [(243, 518), (518, 562)]),
+                         self.dbu.getFileDescendants(
+                             [243], depth=2, id_only=True, edges=True))
+        files = self.dbu.getFileDescendants('ect_rbspa_0377_35c_02.ptp.gz')
+        self.assertEqual([518, 562, 1872, 1881], [f.file_id for f in files])
+        self.assertEqual([], self.dbu.getFileDescendants(1881))
+
     def test_getProductParentTree(self):
         """getProductParentTree"""
         tmp = self.dbu.getProductParentTree()
@@ -1194,6 +1384,33 @@ class ProcessqueueTests(TestSetup):
         self.assertFalse(self.dbu.ProcessqueueGetAll())
         self.assertFalse(self.dbu.ProcessqueueGetAll(version_bump=True))
 
+    def test_pq_iter(self):
+        """test self.ProcessqueueIter"""
+        self.assertEqual([], list(self.dbu.ProcessqueueIter()))
+        self.add_files()
+        expected = []
+        for f_id in [17, 18, 19, 20, 21]:
+            tb = self.dbu.getTraceback('File', f_id)
+            expected.append((f_id, None, tb['file'].filename,
+                             tb['file'].utc_file_date,
+                             tb['product'].product_id,
+                             tb['product'].product_name))
+        self.assertEqual(expected,
+                         [tuple(r) for r in self.dbu.ProcessqueueIter()])
+        self.assertEqual(
+            sorted(expected, key=lambda x: (x[3], x[5])),
+            [tuple(r) for r in self.dbu.ProcessqueueIter(sort=True)])
+        self.assertEqual(
+            expected[1:3],
+            [tuple(r) for r in self.dbu.ProcessqueueIter(offset=1, limit=2)])
+        prod = expected[0][4]
+        self.assertEqual(
+            [e for e in expected if e[4] == prod],
+            [tuple(r) for r in self.dbu.ProcessqueueIter(products=[prod])])
+        self.assertEqual(len([e for e in expected if e[4] == prod]),
+                         self.dbu.ProcessqueueLen(products=[prod]))
+        self.assertEqual(0, self.dbu.ProcessqueueLen(products=[]))
+
     def test_pq_flush(self):
         """test self.ProcessqueueFlush"""
         self.add_files()
@@ -1300,6 +1517,30 @@ class ProcessqueueTests(TestSetup):
         pq = self.dbu.ProcessqueueGetAll()
         self.assertTrue(17 in pq)
 
+    def test_pq_clean_version_bump(self):
+        """test self.ProcessqueueClean keeps version bumped entries"""
+        self.dbu.ProcessqueuePush([17, 18, 19])
+        self.dbu.ProcessqueuePush([20, 21], version_bump=1)
+        self.dbu.ProcessqueueClean()
+        self.assertEqual([(17, None), (20, 1), (21, 1)],
+                         sorted(self.dbu.ProcessqueueGetAll(version_bump=True)))
+
+    def test_pq_clean_order(self):
+        """test self.ProcessqueueClean keeps the order of the queue"""
+        self.dbu.ProcessqueuePush([17, 18, 19])
+        self.dbu.ProcessqueuePush([20, 21], version_bump=1)
+        # Queue order is not observable on all databases, so fake it
+        self.dbu.ProcessqueueGetAll = lambda version_bump: [
+            (21, 1), (18, None), (17, None), (20, 1), (21, 1)]
+        added = []
+        rawadd = self.dbu.ProcessqueueRawadd
+        def record(fileid, version_bump=None, commit=True):
+            added.append((fileid, version_bump))
+            return rawadd(fileid, version_bump=version_bump, commit=commit)
+        self.dbu.ProcessqueueRawadd = record
+        self.dbu.ProcessqueueClean()
+        self.assertEqual([([21], 1), ([17], None), ([20], 1)], added)
+
     def test_pq_rawadd(self):
         """test self.ProcessqueueRawadd"""
         self.assertEqual(0, self.dbu.ProcessqueueLen())
@@ -1315,6 +1556,26 @@ class ProcessqueueTests(TestSetup):
         pq = self.dbu.ProcessqueuePop(1)
         self.assertRaises(DButils.DBNoData, self.dbu.getFileID, pq)
 
+    def test_pq_rawadd_duplicates(self):
+        """test self.ProcessqueueRawadd only counts new entries"""
+        self.assertEqual(2, self.dbu.ProcessqueueRawadd([20, 21], 2))
+        self.assertEqual(1, self.dbu.ProcessqueueRawadd([19, 20, 21, 19]))
+        self.assertEqual(0, self.dbu.ProcessqueueRawadd([]))
+        self.assertEqual([(19, None), (20, 2), (21, 2)],
+                         sorted(self.dbu.ProcessqueueGetAll(version_bump=True)))
+
+    def test_pq_rawadd_failed(self):
+        """A failed add does not leave ids behind for the next add"""
+        # version_bump is constrained to be less than 3
+        self.assertRaises(DButils.DBError, self.dbu.ProcessqueueRawadd,
+                          [19, 20], 5)
+        self.assertEqual(0, self.dbu.ProcessqueueLen())
+        self.assertFalse(self.dbu.engine.dialect.has_table(
+            self.dbu.session.connection(), 'processqueue_incoming'))
+        self.assertEqual(1, self.dbu.ProcessqueueRawadd([21]))
+        self.assertEqual([21], self.dbu.ProcessqueueGetAll())
+        self.assertEqual([17], self.dbu.ProcessqueuePush([17]))
+
 
 class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
     """Tests that require the new testDB (or were written after it was made)"""
@@ -1356,6 +1617,44 @@ class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
         self.dbu.getEntry('File', 1).exists_on_disk = False
         self.assertTrue(self.dbu.checkDiskForFile(1))
 
+    def test_checkDiskForFiles(self):
+        """Check all files in database against directory listing"""
+        self.assertEqual([], self.dbu.checkDiskForFiles())
+        os.remove(self.td + '/L0/testDB_001_001.raw')
+        os.remove(self.td + '/L0/testDB_000_000.raw')
+        id1 = self.dbu.getFileID('testDB_001_001.raw')
+        id2 = self.dbu.getFileID('testDB_000_000.raw')
+        self.assertEqual(sorted([id1, id2]), self.dbu.checkDiskForFiles())
+        self.assertEqual([max(id1, id2)], self.dbu.checkDiskForFiles(
+            startID=max(id1, id2)))
+        # Same answer as checking each file
+        self.assertEqual(
+            self.dbu.checkDiskForFiles(),
+            [f for f in sorted(self.dbu.getAllFileIds())
+             if not self.dbu.checkDiskForFile(f)])
+        # Fixed files are consistent, as with checkDiskForFile
+        self.assertEqual([], self.dbu.checkDiskForFiles(fix=True))
+        self.assertFalse(self.dbu.getEntry('File', id1).exists_on_disk)
+        self.assertFalse(self.dbu.getEntry('File', id2).exists_on_disk)
+        self.assertEqual([], self.dbu.checkDiskForFiles())
+
+    def test_checkDiskForFilesNewest(self):
+        """Newest version is of all files, not only those on disk"""
+        os.remove(self.td + '/L0/testDB_001_001.raw')
+        f = self.dbu.getEntry('File', self.dbu.getFileID('testDB_001_001.raw'))
+        self.assertIn(f.file_id, self.dbu.checkDiskForFiles(
+            newest_version=True))
+        # Newer version, not on disk
+        self.addFile('testDB_001_001_v9.9.9.raw', f.product_id,
+                     utc_date=datetime.datetime.combine(
+                         f.utc_file_date, datetime.time()),
+                     version='9.9.9', exists=False)
+        expected = [i for i in sorted(self.dbu.getAllFileIds(
+            newest_version=True)) if not self.dbu.checkDiskForFile(i)]
+        self.assertEqual(expected,
+                         self.dbu.checkDiskForFiles(newest_version=True))
+        self.assertNotIn(f.file_id, expected)
+
     def test_checkFileSHA(self):
         """Compare DB and real checksum, both matching and nonmatching"""
         file_id = self.dbu.getFileID("testDB_001_001.raw")
@@ -1374,6 +1673,27 @@ class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
         ans = [('testDB_001_000.raw', 1), ('testDB_000_000.raw', 2)]
         self.assertEqual(ans, self.dbu.checkFiles())
 
+    def test_verifyFiles(self):
+        """verifyFiles in parallel, with a checkpoint"""
+        with open(self.td + '/L0/testDB_001_000.raw', 'w') as fp:
+            fp.write('I am some text that will change the SHA\n')
+        os.remove(self.td + '/L0/testDB_000_000.raw')
+        ids = sorted(self.dbu.getAllFileIds())
+        expected = dict((f_id, res) for f_id, fname, res, size
+                        in self.dbu.verifyFiles())
+        self.assertEqual(ids, sorted(expected))
+        self.assertEqual([1, 2], sorted(v for v in expected.values() if v))
+        checkpoint = os.path.join(self.td, 'checkpoint.json')
+        # Stop partway through, after first batch of 3
+        res = list(self.dbu.verifyFiles(limit=4, processes=2, batchsize=3,
+                                        checkpoint=checkpoint))
+        self.assertEqual(ids[:4], [r[0] for r in res])
+        self.assertTrue(all(r[3] > 0 for r in res if r[2] != 2))
+        res.extend(self.dbu.verifyFiles(processes=2, batchsize=3,
+                                        checkpoint=checkpoint))
+        self.assertEqual(ids, [r[0] for r in res])
+        self.assertEqual(expected, dict((r[0], r[2]) for r in res))
+
     def addGenericCode(self, processID=1):
         """Adds a dummy code."""
         cID = self.dbu.addCode(filename="run_test.py",
@@ -1454,6 +1774,24 @@ class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
         self.assertFalse(self.dbu.fileIsNewest(fID1))
         self.assertTrue(self.dbu.fileIsNewest(fID4))
 
+    def test_filesAreNewest(self):
+        """test which of a set of files are the newest version"""
+        fID1 = self.addGenericFile(1, version=(1, 0, 0))
+        fID2 = self.addGenericFile(1, version=(1, 1, 0))
+        fID3 = self.addGenericFile(1, version=(1, 0, 5))
+        fID4 = self.addGenericFile(1, version=(2, 0, 0))
+        self.assertEqual([fID4], self.dbu.filesAreNewest(
+            [fID1, fID2, fID3, fID4]))
+        self.assertEqual([], self.dbu.filesAreNewest([fID1, fID2]))
+        self.assertEqual([fID4], self.dbu.filesAreNewest(fID4))
+        # Nonexistent file is dropped
+        self.assertEqual([fID4], self.dbu.filesAreNewest([fID4, 123456]))
+        # Chunking doesn't change answer; other product/dates included
+        expected = [f for f in range(1, fID4 + 1)
+                    if self.dbu.fileIsNewest(f)]
+        self.assertEqual(expected, self.dbu.filesAreNewest(
+            range(1, fID4 + 1), chunksize=2))
+
     def test_addCode(self):
         """Tests if addCode is succesful"""
         cID = self.addGenericCode()
@@ -1639,6 +1977,26 @@ class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
         self.assertEqual(f1ID, i.resulting_file)
         self.assertEqual(f1ID - 1, i.source_file)
 
+    def test_addProvenance(self):
+        """Tests if addProvenance is succesful"""
+        cID = self.addGenericCode()
+        fID = self.addGenericFile(1)
+        self.dbu.addProvenance(fID, cID, [fID - 2, fID - 1, fID - 2])
+        self.assertEqual(
+            [(fID, cID)],
+            self.dbu.session.query(self.dbu.Filecodelink.resulting_file,
+                                   self.dbu.Filecodelink.source_code)
+            .filter_by(resulting_file=fID).all())
+        self.assertEqual([fID - 2, fID - 1],
+                         sorted(self.dbu.getFileParents(fID, id_only=True)))
+        # Already linked, nothing changes
+        self.assertRaises(DButils.DBError, self.dbu.addProvenance,
+                          fID, cID + 1, [fID - 3, fID - 1])
+        self.assertEqual([fID - 2, fID - 1],
+                         sorted(self.dbu.getFileParents(fID, id_only=True)))
+        self.assertEqual(1, self.dbu.session.query(self.dbu.Filecodelink)
+                         .filter_by(resulting_file=fID).count())
+
     def test_delInspector(self):
         """Tests if delInspector is succesful"""
         iID = self.addGenericInspector(1)
@@ -1769,6 +2127,22 @@ class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
             [os.path.join(self.td , 'L1', 'testDB_2016-01-01.cat')],
             self.dbu.list_release('2', fullpath=True))
 
+    def test_tag_release(self):
+        """Tag release in bulk and iterate over it"""
+        newest = self.dbu.getFiles(newest_version=True)
+        self.assertEqual(len(newest), self.dbu.tag_release(1))
+        # Already tagged
+        self.assertEqual(0, self.dbu.tag_release(1))
+        expected = sorted((f.file_id, f.filename, f.shasum) for f in newest)
+        self.assertEqual(
+            [(f, self.dbu.getFileFullPath(f), sha)
+             for f, filename, sha in expected],
+            [(self.dbu.getFileID(filename), path, sha)
+             for filename, path, sha in self.dbu.iterRelease(1)])
+        self.assertEqual([filename for f, filename, sha in expected],
+                         self.dbu.list_release('1', fullpath=False))
+        self.assertEqual([], list(self.dbu.iterRelease(2)))
+
     def test_getAllFilenames_all(self):
         """getAllFilenames should return all files in the db when passed no filters"""
         ans = sorted(['testDB_001_001.raw', 'testDB_000_001.raw', 
@@ -2073,6 +2447,61 @@ class TestWithtestDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
         self.assertEqual('Unixtime table already seems to exist.',
                          str(cm.exception))
 
+    def testFillUnixTime(self):
+        """Populate Unix time in batches"""
+        with self.assertRaises(RuntimeError):
+            list(self.dbu.fillUnixTime())
+        f = self.dbu.getEntry('File', 1)
+        f.utc_start_time = datetime.datetime(2016, 1, 2, 0, 0, 0, 999999)
+        f.utc_stop_time = datetime.datetime(2016, 1, 2, 23, 59, 59, 500000)
+        self.dbu.commitDB()
+        self.dbu.addUnixTimeTable()
+        unx0 = datetime.datetime(1970, 1, 1)
+
+        def expected():
+            return sorted(
+                (f.file_id, int((f.utc_start_time - unx0).total_seconds()),
+                 int((f.utc_stop_time - unx0).total_seconds()))
+                for f in self.dbu.getFiles())
+
+        def actual():
+            return sorted((r.file_id, r.unix_start, r.unix_stop)
+                          for r in self.dbu.session.query(self.dbu.Unixtime))
+        self.assertEqual(expected(), actual())
+        self.assertEqual((1451692800, 1451779199), actual()[0][1:])
+        # Change times, and remove some
+        r = self.dbu.getEntry('Unixtime', 2)
+        r.unix_start = r.unix_stop = 0
+        self.dbu.session.query(self.dbu.Unixtime).filter(
+            self.dbu.Unixtime.file_id > 10).delete()
+        self.dbu.commitDB()
+        nfiles = len(expected())
+        self.assertEqual(
+            nfiles - 10, sum(c for _, c in self.dbu.fillUnixTime()))
+        self.assertNotEqual(expected(), actual())
+        checkpoint = os.path.join(self.td, 'checkpoint.json')
+        with open(checkpoint, 'w') as fp:
+            json.dump({'last_file_id': 1}, fp)
+        batches = list(self.dbu.fillUnixTime(
+            update=True, batchsize=3, checkpoint=checkpoint))
+        self.assertEqual(nfiles - 1, sum(c for _, c in batches))
+        self.assertEqual([3] * ((nfiles - 1) // 3),
+                         [c for _, c in batches][:(nfiles - 1) // 3])
+        self.assertEqual(expected(), actual())
+        # Completed, so checkpoint removed and next run does all files
+        self.assertFalse(os.path.exists(checkpoint))
+        self.assertEqual(nfiles, sum(c for _, c in self.dbu.fillUnixTime(
+            update=True, checkpoint=checkpoint)))
+        # Interrupted run leaves checkpoint
+        for last, _ in self.dbu.fillUnixTime(update=True, batchsize=3,
+                                             checkpoint=checkpoint):
+            break
+        with open(checkpoint) as fp:
+            self.assertEqual(last, json.load(fp)['last_file_id'])
+        self.assertEqual(nfiles - 3, sum(c for _, c in self.dbu.fillUnixTime(
+            update=True, checkpoint=checkpoint)))
+        self.assertFalse(os.path.exists(checkpoint))
+
 
 if __name__ == "__main__":
     unittest.main()
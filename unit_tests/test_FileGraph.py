@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Unit testing for FileGraph"""
+
+import os.path
+import unittest
+
+import numpy
+
+import dbp_testing
+from dbprocessing import FileGraph
+
+
+class FileGraphTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """Tests for FileGraph class"""
+
+    def setUp(self):
+        super(FileGraphTests, self).setUp()
+        self.makeTestDB()
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+        self.graph = FileGraph.FileGraph(self.dbu)
+
+    def tearDown(self):
+        super(FileGraphTests, self).tearDown()
+        self.removeTestDB()
+
+    def test_load(self):
+        """Nodes and attributes match the database"""
+        self.assertEqual(self.dbu.session.query(self.dbu.File).count(),
+                         len(self.graph))
+        i = self.graph.index([1881])[0]
+        f = self.dbu.getEntry('File', 1881)
+        self.assertEqual(f.filename, self.graph.filename[i])
+        self.assertEqual(f.product_id, self.graph.product_id[i])
+        self.assertEqual(numpy.datetime64(f.utc_file_date, 'D'),
+                         self.graph.utc_file_date[i])
+        self.assertEqual(
+            [f.interface_version, f.quality_version, f.revision_version],
+            self.graph.version[i].tolist())
+        self.assertEqual(
+            sorted(self.dbu.getAllFileIds(newest_version=True)),
+            self.graph.file_id[self.graph.newest].tolist())
+        self.assertEqual(
+            sorted(self.dbu.getFileParents(1881, id_only=True)),
+            sorted(self.graph.file_id[self.graph.parents(i)].tolist()))
+
+    def test_index_missing(self):
+        """Looking up nonexistent file raises KeyError"""
+        with self.assertRaises(KeyError):
+            self.graph.index([1881, 100000])
+
+    def test_reachable(self):
+        """Multi-source search matches ancestor/descendant queries"""
+        seeds = [1881, 5991]
+        expected = set(seeds)
+        expected.update(self.dbu.getFileAncestors(seeds, id_only=True))
+        mask = self.graph.reachable(self.graph.index(seeds), 'ancestors')
+        self.assertEqual(sorted(expected),
+                         self.graph.file_id[mask].tolist())
+        roots = self.graph.in_degree() == 0
+        expected = set(self.graph.file_id[roots].tolist())
+        expected.update(self.dbu.getFileDescendants(expected, id_only=True))
+        mask = self.graph.reachable(roots, 'descendants')
+        self.assertEqual(sorted(expected),
+                         self.graph.file_id[mask].tolist())
+        with self.assertRaises(ValueError):
+            self.graph.reachable(roots, 'sideways')
+
+
+if __name__ == "__main__":
+    unittest.main()
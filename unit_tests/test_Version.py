@@ -3,6 +3,9 @@ from __future__ import print_function
 
 import unittest
 
+import numpy
+import sqlalchemy
+
 import dbp_testing
 from dbprocessing import Version
 
@@ -121,6 +124,57 @@ class VersionTests(unittest.TestCase):
         """fromString"""
         self.assertEqual(Version.Version(1,0,1), Version.Version.fromString('1.0.1'))
 
+    def test_hash(self):
+        """Equal versions hash equal, can be used in sets and dicts"""
+        self.assertEqual(hash(Version.Version(1, 2, 3)),
+                         hash(Version.Version(1, 2, 3)))
+        self.assertEqual(
+            2, len(set([Version.Version(1, 2, 3), Version.Version(1, 2, 3),
+                        Version.Version(1, 2, 4)])))
+        d = {Version.Version(1, 0, 0): 'a'}
+        self.assertEqual('a', d[Version.Version.fromString('1.0.0')])
+        self.assertNotEqual(Version.Version(1, 0, 0), (1, 0, 0))
+
+    def test_slots(self):
+        """Cannot add attributes to a Version"""
+        v = Version.Version(1, 0, 0)
+        with self.assertRaises(AttributeError):
+            v.foo = 1
+
+    def test_key(self):
+        """Packed key sorts the same as Version"""
+        versions = [Version.Version(*v) for v in
+                    [(1, 0, 0), (1, 0, 1), (1, 1, 0), (1, 65535, 65535),
+                     (2, 0, 0), (10, 3, 2), (3, 0, 70)]]
+        self.assertEqual(sorted(versions),
+                         sorted(versions, key=lambda v: v.key))
+        for v in versions:
+            self.assertEqual(v, Version.Version.fromKey(v.key))
+        self.assertEqual(2 ** 32 + 2 * 2 ** 16 + 3,
+                         Version.Version(1, 2, 3).key)
+        self.assertRaises(Version.VersionError,
+                          lambda: Version.Version(1, 65536, 0).key)
+
+    def test_packKey(self):
+        """packKey works on arrays and SQL expressions"""
+        arr = numpy.array([[1, 2, 3], [2, 0, 0], [1, 10, 0]])
+        self.assertEqual(
+            [Version.Version(*v).key for v in arr.tolist()],
+            Version.packKey(arr[:, 0], arr[:, 1], arr[:, 2]).tolist())
+        engine = sqlalchemy.create_engine('sqlite://')
+        meta = sqlalchemy.MetaData()
+        t = sqlalchemy.Table(
+            'v', meta, *[sqlalchemy.Column(c, sqlalchemy.Integer)
+                         for c in ('i', 'q', 'r')])
+        meta.create_all(engine)
+        with engine.connect() as conn:
+            conn.execute(t.insert(), [dict(zip('iqr', v))
+                                      for v in arr.tolist()])
+            newest = conn.execute(sqlalchemy.select([sqlalchemy.func.max(
+                Version.packKey(t.c.i, t.c.q, t.c.r))])).scalar()
+        self.assertEqual(Version.Version(2, 0, 0),
+                         Version.Version.fromKey(newest))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -8,18 +8,26 @@ import os.path
 
 from test_addFromConfig import *
 from test_CreateDB import *
+from test_compareDB import *
+from test_coverage import *
 from test_dbprocessing import *
+from test_DBcheck import *
 from test_DBfile import *
+from test_FileGraph import *
+from test_DBprofile import *
 from test_DBqueue import *
 from test_DBRunner import *
 from test_DButils import *
+from test_fast_data import *
 from test_Diskfile import *
 from test_tables import *
+from test_reports import *
 from test_Version import *
 from test_DBstrings import *
 from test_Utils import *
 from test_Inspector import *
 from test_linkUningested import *
+from test_makeLatestSymlinks import *
 
 
 if __name__ == "__main__":
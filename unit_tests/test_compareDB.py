@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Unit testing for compareDB script"""
+
+import os.path
+import shutil
+import unittest
+
+import dbp_testing
+dbp_testing.add_scripts_to_path()
+
+import compareDB
+import dbprocessing.DButils
+
+
+class CompareDBTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """compareDB tests"""
+
+    def setUp(self):
+        super(CompareDBTests, self).setUp()
+        self.makeTestDB()
+        if self.pg:
+            self.skipTest('Comparison test requires two sqlite databases')
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+        self.dbu.closeDB()
+        self.dbname2 = os.path.join(self.td, 'testDB2.sqlite')
+        shutil.copy(self.dbname, self.dbname2)
+        self.dbu = dbprocessing.DButils.DButils(self.dbname)
+        self.dbu2 = dbprocessing.DButils.DButils(self.dbname2)
+
+    def tearDown(self):
+        self.dbu2.closeDB()
+        super(CompareDBTests, self).tearDown()
+        self.removeTestDB()
+
+    def test_same(self):
+        """Identical databases have no differences"""
+        self.assertEqual([], list(compareDB.check_files(
+            self.dbu, self.dbu2, leafsize=10)))
+        self.assertEqual([], list(compareDB.check_links(self.dbu, self.dbu2)))
+
+    def test_files(self):
+        """Find differences in files"""
+        f = self.dbu2.getEntry('File', 5991)
+        f.quality_version = 5
+        self.dbu2.session.add(f)
+        self.dbu2.commitDB()
+        self.dbu2._purgeFileFromDB(1881, trust_id=True)
+        self.dbu2.session.query(self.dbu2.Filefilelink).filter_by(
+            resulting_file=5991, source_file=14).delete()
+        self.dbu2.commitDB()
+        self.assertEqual(
+            ['File rbspa_int_ect-mageisM35-L3_20130904_v3.0.0.cdf'
+             ' quality_version is 0 in mission 1 but 5 in mission2',
+             'File {} is in mission1 but not mission2.'.format(
+                 self.dbu.getEntry('File', 1881).filename)],
+            list(compareDB.check_files(self.dbu, self.dbu2, leafsize=10)))
+        self.assertEqual(
+            ['rbspa_int_ect-mageisM35-L3_20130904_v3.0.0.cdf input file {}'
+             ' is in mission1 but not mission2.'.format(
+                 self.dbu.getEntry('File', 14).filename)],
+            list(compareDB.check_links(self.dbu, self.dbu2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""Unit testing for coverage"""
+
+import datetime
+import os.path
+import unittest
+
+import numpy
+
+import dbp_testing
+from dbprocessing import coverage
+from dbprocessing import Version
+
+
+class CoverageTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """Tests for coverage of products by date"""
+
+    def setUp(self):
+        super(CoverageTests, self).setUp()
+        self.makeTestDB()
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+        self.start = datetime.date(2013, 9, 1)
+        self.end = datetime.date(2013, 9, 30)
+
+    def tearDown(self):
+        super(CoverageTests, self).tearDown()
+        self.removeTestDB()
+
+    def test_coverageMatrix(self):
+        """Coverage matches checking each product and date"""
+        products = sorted(p.product_id for p in self.dbu.getAllProducts())
+        dates, covered = coverage.coverageMatrix(
+            self.dbu, products, self.start, self.end)
+        self.assertEqual(30, len(dates))
+        self.assertEqual(numpy.datetime64('2013-09-01'), dates[0])
+        self.assertEqual((len(products), 30), covered.shape)
+        for i, p in enumerate(products):
+            have = set(f.utc_file_date for f in self.dbu.getFilesByProductDate(
+                p, [self.start, self.end], newest_version=True))
+            expected = [d in have for d in dates.astype(object)]
+            self.assertEqual(expected, covered[i].tolist(), p)
+        self.assertTrue(covered.any())
+        self.assertFalse(covered.all())
+
+    def test_missingDates(self):
+        """Find dates with no file"""
+        missing = coverage.missingDates(
+            self.dbu, [10, 9999], self.start, self.end)
+        self.assertEqual([10, 9999], sorted(missing))
+        self.assertEqual(30, len(missing[9999]))
+        have = set(f.utc_file_date for f in self.dbu.getFilesByProductDate(
+            10, [self.start, self.end]))
+        self.assertEqual(
+            sorted(set(self.start + datetime.timedelta(days=i)
+                       for i in range(30)) - have),
+            missing[10])
+        self.assertTrue(all(isinstance(d, datetime.date) for d in missing[10]))
+
+    def test_coverageMatrixEmpty(self):
+        """Coverage with no products or dates"""
+        dates, covered = coverage.coverageMatrix(
+            self.dbu, [], self.start, self.end)
+        self.assertEqual((0, 30), covered.shape)
+        dates, covered = coverage.coverageMatrix(
+            self.dbu, [10], self.end, self.start)
+        self.assertEqual((1, 0), covered.shape)
+
+    def test_filesOnDates(self):
+        """Find files on given dates"""
+        dates = [datetime.date(2013, 9, 5), datetime.date(2013, 9, 6)]
+        expected = sorted(
+            f.file_id for d in dates
+            for f in self.dbu.getFilesByProductDate(10, [d, d]))
+        self.assertTrue(expected)
+        self.assertEqual(expected, coverage.filesOnDates(self.dbu, {10: dates}))
+        self.assertEqual([], coverage.filesOnDates(self.dbu, {10: []}))
+
+    def test_productCoverage(self):
+        """Versions of newest file on each day"""
+        # Newer version on 9/5 which does not match the glob below
+        self.addFile('rbspa_int_ect-mageisM35-L3_20130905_v3.1.0.CDF', 10)
+        dates, versions = coverage.productCoverage(
+            self.dbu, 10, self.start, self.end)
+        self.assertEqual((30, 3), versions.shape)
+        newest = dict(
+            (f.utc_file_date, self.dbu.getFileVersion(f))
+            for f in self.dbu.getFilesByProductDate(
+                10, [self.start, self.end], newest_version=True))
+        for d, v in zip(dates.astype(object), versions):
+            if d in newest:
+                self.assertEqual(newest[d], Version.Version(*v), d)
+            else:
+                self.assertEqual([-1, -1, -1], v.tolist(), d)
+        self.assertEqual([3, 1, 0], versions[4].tolist())
+        # Glob is case-sensitive, so newest file on 9/5 does not match
+        # and that day has no file
+        _, globbed = coverage.productCoverage(
+            self.dbu, 10, self.start, self.end, glob='*_2013090[5-9]_*.cdf')
+        self.assertEqual([-1, 3, 3, 3, 3], globbed[4:9, 0].tolist())
+        self.assertTrue((globbed[9:, 0] == -1).all())
+        _, globbed = coverage.productCoverage(
+            self.dbu, 10, self.start, self.end, glob='*M35?L3_*.cdf')
+        self.assertEqual(
+            (versions[:, 0] >= 0).sum() - 1, (globbed[:, 0] >= 0).sum())
+        _, globbed = coverage.productCoverage(
+            self.dbu, 10, self.start, self.end, glob='*M35%L3_*')
+        self.assertTrue((globbed == -1).all())
+        _, filtered = coverage.productCoverage(
+            self.dbu, 10, self.start, self.end,
+            version=Version.Version(3, 1, 0))
+        self.assertEqual([3, 1, 0], filtered[4].tolist())
+        self.assertEqual(1, (filtered[:, 0] >= 0).sum())
+
+    def test_productsCoverage(self):
+        """Versions of newest file on each day, many products"""
+        products = sorted(p.product_id for p in self.dbu.getAllProducts())
+        for kwargs in ({}, {'glob': '*_2013090[5-9]_*.cdf'},
+                       {'version': Version.Version(3, 0, 0)}):
+            dates, versions = coverage.productsCoverage(
+                self.dbu, products + [9999], self.start, self.end, **kwargs)
+            self.assertEqual((len(products) + 1, 30, 3), versions.shape)
+            self.assertTrue((versions[-1] == -1).all())
+            for i, p in enumerate(products):
+                d, v = coverage.productCoverage(
+                    self.dbu, p, self.start, self.end, **kwargs)
+                self.assertEqual(d.tolist(), dates.tolist())
+                self.assertEqual(v.tolist(), versions[i].tolist(), p)
+        self.assertTrue((versions >= 0).any())
+        self.assertEqual((0, 30, 3), coverage.productsCoverage(
+            self.dbu, [], self.start, self.end)[1].shape)
+
+    def test_globToLike(self):
+        """Convert glob to LIKE pattern"""
+        self.assertEqual('a%b_c\\%\\_', coverage._globToLike('a*b?c%_'))
+        self.assertIsNone(coverage._globToLike('a[bc]'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -88,6 +88,21 @@ class BuildChildrenTests(ProcessQueueTestsBase):
             'level_1_20120101_v1.0.0']]
         self.checkCommandLines(fid, expected)
 
+    def testNewestSnapshot(self):
+        """Newest-version snapshot only used for files it checked"""
+        l0pid = self.addProduct('level 0')
+        l1pid = self.addProduct('level 1', level=1)
+        l01process, l01code = self.addProcess('level 0-1', l1pid)
+        self.addProductProcessLink(l0pid, l01process)
+        fid = self.addFile('level_0_20120101_v1.0.0', l0pid)
+        # Not in the snapshot, so checked in the database
+        self.pq.buildChildren([fid, None], newest=set(), checked=set())
+        self.assertEqual(1, len(self.pq.runme_list))
+        del self.pq.runme_list[:]
+        # Snapshot says not newest
+        self.pq.buildChildren([fid, None], newest=set(), checked=set([fid]))
+        self.assertEqual(0, len(self.pq.runme_list))
+
     def testSingleDailyUpdate(self):
         """Single daily file making another, new version appears"""
         l0pid = self.addProduct('level 0')
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Unit testing for fast_data script"""
+
+import datetime
+import os
+import os.path
+import unittest
+
+try:
+    import networkx
+except ImportError:
+    networkx = None
+
+import dbp_testing
+dbp_testing.add_scripts_to_path()
+
+import fast_data
+import dbprocessing.DButils
+
+
+class FastDataTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """fast_data tests"""
+
+    def setUp(self):
+        super(FastDataTests, self).setUp()
+        self.makeTestDB()
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+
+    def tearDown(self):
+        super(FastDataTests, self).tearDown()
+        self.removeTestDB()
+
+    def networkx_participants(self, cutoff):
+        """Files to reap, as found by the networkx implementation"""
+        G = networkx.DiGraph()
+        G.add_nodes_from(self.dbu.getAllFileIds())
+        for i, d in self.dbu.session.query(self.dbu.File.file_id,
+                                           self.dbu.File.utc_file_date):
+            G.nodes[i]['utc_file_date'] = d
+        G.add_edges_from(self.dbu.session.query(
+            self.dbu.Filefilelink.source_file,
+            self.dbu.Filefilelink.resulting_file).all())
+        keep = set(self.dbu.getAllFileIds(newest_version=True))
+        keep.update(f for f, in self.dbu.session.query(
+            self.dbu.Release.file_id))
+        for i in list(keep):
+            keep.update(networkx.ancestors(G, i))
+        for i in G:
+            if G.in_degree(i) == 0 and G.nodes[i]['utc_file_date'] <= cutoff:
+                keep.add(i)
+                keep.update(networkx.descendants(G, i))
+        return sorted(set(G).difference(keep))
+
+    @unittest.skipIf(networkx is None, 'networkx not available')
+    def test_filter_graph(self):
+        """Files to reap match networkx implementation"""
+        G = fast_data.build_graph(self.dbu)
+        for cutoff in (datetime.date(2013, 1, 1), datetime.date(2013, 9, 5),
+                       datetime.date(2020, 1, 1)):
+            mask = fast_data.filter_graph(G, cutoff)
+            self.assertEqual(self.networkx_participants(cutoff),
+                             G.file_id[mask].tolist(), str(cutoff))
+
+    def reapable(self, G, mask):
+        """File IDs of participants, less the one reap always skips"""
+        participants = G.file_id[mask].tolist()
+        last = max(participants, key=lambda f: (
+            G.product_id[G.index([f])[0]], G.utc_file_date[G.index([f])[0]],
+            self.dbu.getFileVersion(f)))
+        participants.remove(last)
+        return participants
+
+    def reopen(self):
+        """Reopen database, after changing mission directory"""
+        self.dbu.closeDB()
+        self.dbu = dbprocessing.DButils.DButils(self.dbname)
+
+    def test_reap_records(self):
+        """Reap records only of files not on disk at start"""
+        G = fast_data.build_graph(self.dbu)
+        mask = fast_data.filter_graph(G, datetime.date(2013, 9, 5))
+        participants = self.reapable(G, mask)
+        gone = participants[:5]
+        self.dbu._setExistsOnDisk(gone, False)
+        G = fast_data.build_graph(self.dbu)
+        fast_data.reap(self.dbu, G, mask, dorecords=True)
+        self.dbu.commitDB()
+        remaining = set(self.dbu.getAllFileIds())
+        self.assertFalse(remaining.intersection(gone))
+        self.assertEqual(set(participants[5:]),
+                         remaining.intersection(participants))
+
+    def test_reap_files(self):
+        """Archive files, keeping records"""
+        self.dbu.session.query(self.dbu.Mission).update(
+            {'rootdir': os.path.join(self.td, 'data')})
+        self.dbu.commitDB()
+        self.reopen()
+        G = fast_data.build_graph(self.dbu)
+        mask = fast_data.filter_graph(G, datetime.date(2013, 9, 5))
+        ondisk = self.reapable(G, mask)[:2]
+        self.dbu._setExistsOnDisk(self.dbu.getAllFileIds(), False)
+        self.dbu._setExistsOnDisk(ondisk, True)
+        paths = [self.dbu.getFileFullPath(f) for f in ondisk]
+        for p in paths:
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            with open(p, 'w'):
+                pass
+        G = fast_data.build_graph(self.dbu)
+        archive = os.path.join(self.td, 'archive')
+        fast_data.reap(self.dbu, G, mask, dofiles=True, archive=archive)
+        self.dbu.commitDB()
+        for f, p in zip(ondisk, paths):
+            self.assertFalse(os.path.exists(p))
+            self.assertTrue(os.path.exists(os.path.join(
+                archive, os.path.relpath(p, self.dbu.MissionDirectory))))
+            self.assertFalse(self.dbu.getEntry('File', f).exists_on_disk)
+        self.assertEqual(len(G), len(self.dbu.getAllFileIds()))
+
+
+if __name__ == "__main__":
+    unittest.main()
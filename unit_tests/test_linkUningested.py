@@ -70,6 +70,42 @@ class LinkUningestedTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
         self.assertEqual(
             [os.path.join('junk', 'prod219990501.txt')], sorted(res2))
 
+    def test_list_all_files(self):
+        """List files for several products, with partly-static paths"""
+        self.makeTestDB()
+        try:
+            self.dbu = dbprocessing.DButils.DButils(self.dbname)
+            mis = self.dbu.addMission('mission', self.td, self.td)
+            sat = self.dbu.addSatellite('sat', mis)
+            self.dbu.addInstrument('inst', sat)
+            p1 = self.addProduct('product1', format='prod1{Y}{m}{d}.txt')
+            p2 = self.addProduct('product2', format='prod2{Y}{m}{d}.txt')
+            self.dbu.getEntry('Product', p1).relative_path \
+                = 'data/{PRODUCT}/{Y}'
+            self.dbu.getEntry('Product', p2).relative_path = 'data'
+            self.dbu.commitDB()
+            self.assertEqual(
+                os.path.join('data', 'product1'),
+                linkUningested.product_pattern(self.dbu, p1)[0])
+            self.assertEqual(
+                'data', linkUningested.product_pattern(self.dbu, p2)[0])
+            os.makedirs(os.path.join(self.td, 'data', 'product1', '2000'))
+            os.makedirs(os.path.join(self.td, 'other', 'data'))
+            for f in (('data', 'product1', '2000', 'prod120000101.txt'),
+                      ('data', 'product1', '2000', 'prod220000101.txt'),
+                      ('data', 'prod219990501.txt'),
+                      ('other', 'data', 'prod219990502.txt'),
+                      ('data', 'another.txt')):
+                open(os.path.join(self.td, *f), 'w').close()
+            res = linkUningested.list_all_files(self.dbu, [p1, p2])
+        finally:
+            self.removeTestDB()
+        self.assertEqual(
+            [os.path.join('data', 'product1', '2000', 'prod120000101.txt')],
+            res[p1])
+        self.assertEqual(
+            [os.path.join('data', 'prod219990501.txt')], res[p2])
+
 class LinkUningestedTestsWithDB(unittest.TestCase, dbp_testing.AddtoDBMixin):
     """
     Tests that use the magEIS database
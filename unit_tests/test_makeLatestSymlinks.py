@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Unit testing for makeLatestSymlinks script"""
+
+import datetime
+import os
+import os.path
+import unittest
+import warnings
+
+import dbp_testing
+dbp_testing.add_scripts_to_path()
+
+import makeLatestSymlinks
+
+
+class MakeLatestSymlinksTests(unittest.TestCase, dbp_testing.AddtoDBMixin):
+    """makeLatestSymlinks tests"""
+
+    def setUp(self):
+        super(MakeLatestSymlinksTests, self).setUp()
+        self.makeTestDB()
+        self.loadData(os.path.join(dbp_testing.testsdir, 'data', 'db_dumps',
+                                   'RBSP_MAGEIS_dump.json'))
+        self.sourcedir = os.path.join(self.dbu.MissionDirectory, 'rbspa',
+                                      'mageis_vc', 'level3', 'int')
+
+    def tearDown(self):
+        super(MakeLatestSymlinksTests, self).tearDown()
+        self.removeTestDB()
+
+    def test_cull_to_newest(self):
+        """Cull filenames to newest version"""
+        self.assertEqual(
+            ['a_20100101_v1.2.0.cdf', 'b_20100101_v1.0.0.cdf'],
+            makeLatestSymlinks.cull_to_newest(
+                ['a_20100101_v1.0.0.cdf', 'a_20100101_v1.2.0.cdf',
+                 'b_20100101_v1.0.0.cdf', 'a_20100101_v1.1.0.cdf']))
+
+    def test_newest_from_db(self):
+        """Find newest files for a directory from database"""
+        files = makeLatestSymlinks.newest_from_db(
+            self.dbu, self.sourcedir, 'rbspa_int_ect-mageisM35-L3_*')
+        expected = sorted(f.filename for f in self.dbu.getFiles(
+            product=10, newest_version=True, exists=True))
+        self.assertEqual(expected, sorted(files))
+        for f in files:
+            self.assertEqual(os.path.join(self.sourcedir, f), files[f])
+        files = makeLatestSymlinks.newest_from_db(
+            self.dbu, self.sourcedir, 'rbspa_int_ect-mageisM35-L3_*',
+            startdate=datetime.date(2013, 9, 4),
+            enddate=datetime.date(2013, 9, 4))
+        self.assertEqual(['rbspa_int_ect-mageisM35-L3_20130904_v3.0.0.cdf'],
+                         list(files))
+        self.assertEqual({}, makeLatestSymlinks.newest_from_db(
+            self.dbu, os.path.join(self.td, 'nowhere')))
+
+    def test_newest_from_db_templated(self):
+        """Find newest files for directory with names in product path"""
+        expected = makeLatestSymlinks.newest_from_db(
+            self.dbu, self.sourcedir, 'rbspa_int_ect-mageisM35-L3_*')
+        prod = self.dbu.getEntry('Product', 10)
+        self.assertEqual('rbspa/mageis_vc/level3/int', prod.relative_path)
+        prod.relative_path = '{SATELLITE}/mageis_vc/level3/int'
+        self.dbu.commitDB()
+        tracebacks = []
+        getTraceback = self.dbu.getTraceback
+        def count(table, *args, **kwargs):
+            tracebacks.append(table)
+            return getTraceback(table, *args, **kwargs)
+        self.dbu.getTraceback = count
+        files = makeLatestSymlinks.newest_from_db(
+            self.dbu, self.sourcedir, 'rbspa_int_ect-mageisM35-L3_*')
+        self.assertEqual(expected, files)
+        # Once per product with names in its path, never per file
+        self.assertEqual(['Product'], tracebacks)
+        # Older version when newer does not match glob
+        self.addFile('rbspa_int_ect-mageisM35-L3_20130904_v3.1.0.CDF', 10)
+        files = makeLatestSymlinks.newest_from_db(
+            self.dbu, self.sourcedir, 'rbspa_int_ect-mageisM35-L3_*.cdf',
+            startdate=datetime.date(2013, 9, 4),
+            enddate=datetime.date(2013, 9, 4))
+        self.assertEqual(['rbspa_int_ect-mageisM35-L3_20130904_v3.0.0.cdf'],
+                         list(files))
+
+    def test_sync_symlinks(self):
+        """Create and remove links to match list of files"""
+        outdir = os.path.join(self.td, 'latest')
+        files = {'a_v2.cdf': os.path.join(self.td, 'a_v2.cdf'),
+                 'b_v1.cdf': os.path.join(self.td, 'b_v1.cdf')}
+        self.assertEqual(
+            (2, 0), makeLatestSymlinks.sync_symlinks(dict(files), outdir))
+        self.assertEqual((0, 0), makeLatestSymlinks.sync_symlinks(
+            dict(files), outdir))
+        os.symlink(os.path.join(self.td, 'a_v1.cdf'),
+                   os.path.join(outdir, 'a_v1.cdf'))
+        with open(os.path.join(outdir, 'readme.txt'), 'w') as f:
+            pass
+        del files['b_v1.cdf']
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            self.assertEqual((0, 0), makeLatestSymlinks.sync_symlinks(
+                dict(files), outdir, glb='*.cdf.gz'))
+            self.assertEqual((0, 2), makeLatestSymlinks.sync_symlinks(
+                dict(files), outdir, glb='*.cdf'))
+            self.assertFalse([x for x in w if 'non link' in str(x.message)])
+        self.assertEqual(['a_v2.cdf', 'readme.txt'],
+                         sorted(os.listdir(outdir)))
+        self.assertEqual(files['a_v2.cdf'],
+                         os.readlink(os.path.join(outdir, 'a_v2.cdf')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Unit testing for reports"""
+
+import datetime
+import gzip
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import dbp_testing
+from dbprocessing import reports
+
+
+class LogfileTests(unittest.TestCase):
+    """Tests for reading dbprocessing logs"""
+
+    def setUp(self):
+        super(LogfileTests, self).setUp()
+        self.td = tempfile.mkdtemp()
+        self.lines = []
+        t = datetime.datetime(2013, 9, 5)
+        for i in range(2000):
+            stamp = (t + datetime.timedelta(minutes=i)).strftime(
+                '%Y-%m-%d %H:%M:%S,123')
+            if i % 100 == 0:
+                msg = 'dbprocessing:10 - INFO - running command: ' \
+                      '/bin/code{0} arg'.format(i % 300)
+            elif i % 100 == 1:
+                msg = 'DButils:20 - INFO - File file_{0}.cdf entered in ' \
+                      'DB, f_id={0}'.format(i)
+            elif i % 100 == 2:
+                msg = 'DBfile:30 - INFO - moveToError /in/file_{0}.cdf ' \
+                      'moved to /err'.format(i)
+            elif i % 100 == 3:
+                msg = 'inspector:40 - ERROR - Bad file {0}'.format(i)
+            elif i % 2:
+                msg = 'runMe:50 - DEBUG - Debug {0}'.format(i)
+            else:
+                msg = 'runMe:60 - INFO - Info {0}'.format(i)
+            self.lines.append('{0} - {1}\n'.format(stamp, msg))
+            if i % 100 == 3:
+                # Multiline entries, e.g. tracebacks
+                self.lines.append('Traceback (most recent call last):\n')
+        self.filename = os.path.join(self.td, 'dbprocessing_log.log')
+        with open(self.filename, 'w') as f:
+            f.writelines(self.lines)
+
+    def tearDown(self):
+        super(LogfileTests, self).tearDown()
+        shutil.rmtree(self.td)
+
+    def checkLog(self, log, lines):
+        """Compare log against lines it should contain"""
+        for level in ('ERROR', 'INFO', 'DEBUG'):
+            expected = [l for l in lines if ' - {0} - '.format(level) in l]
+            self.assertEqual(expected, getattr(log, level.lower()))
+            self.assertEqual(len(expected), log.counts[level])
+        self.assertEqual(
+            [l.split()[-1] for l in lines if 'entered in DB' in l],
+            ['f_id=' + v.file_id for v in log.ingested])
+        self.assertEqual(
+            len([l for l in lines if 'moveToError' in l]),
+            len(log.movedToError))
+        self.assertEqual(
+            sorted(set(l.split()[-2] for l in lines if 'running command' in l)),
+            [v.filename for v in log.commandsRun])
+        self.assertEqual(len(log.error), len(log.errors))
+
+    def test_logfile(self):
+        """Read entire log"""
+        log = reports.logfile(self.filename)
+        self.assertEqual((datetime.datetime(2013, 9, 5),
+                          datetime.datetime(2013, 9, 6, 9, 19)),
+                         log.filerange)
+        self.checkLog(log, self.lines)
+        self.assertEqual(20, log.counts['ERROR'])
+        self.assertEqual(['/bin/code0', '/bin/code100', '/bin/code200'],
+                         [v.filename for v in log.commandsRun])
+        self.assertEqual('Bad file 3', log.errors[0].errormsg)
+
+    def test_timerange(self):
+        """Read part of log"""
+        tr = [datetime.datetime(2013, 9, 5, 3, 20),
+              datetime.datetime(2013, 9, 5, 10, 0)]
+        log = reports.logfile(self.filename, timerange=tr)
+        expected = [l for l in self.lines
+                    if '2013-09-05 03:20:00' <= l[:19] <= '2013-09-05 10:00:00']
+        self.assertEqual(401, len(expected))
+        self.checkLog(log, expected)
+        # First and last date is of the whole file
+        self.assertEqual(datetime.datetime(2013, 9, 6, 9, 19),
+                         log.filerange[1])
+        log = reports.logfile(self.filename, timerange=[
+            datetime.datetime(2013, 9, 1), datetime.datetime(2013, 9, 7)])
+        self.checkLog(log, self.lines)
+        log = reports.logfile(self.filename, timerange=[
+            datetime.datetime(2013, 9, 7), datetime.datetime(2013, 9, 8)])
+        self.checkLog(log, [])
+
+    def test_gzip(self):
+        """Read gzipped log, with and without timerange"""
+        gzname = self.filename + '.gz'
+        with gzip.open(gzname, 'wt') as f:
+            f.writelines(self.lines)
+        self.checkLog(reports.logfile(gzname), self.lines)
+        tr = [datetime.datetime(2013, 9, 5, 3, 20),
+              datetime.datetime(2013, 9, 5, 10, 0)]
+        self.assertEqual(
+            reports.logfile(self.filename, timerange=tr).error,
+            reports.logfile(gzname, timerange=tr).error)
+
+    def test_keep_lines(self):
+        """Do not keep lines of each level"""
+        log = reports.logfile(self.filename, keep_lines=False)
+        self.assertEqual([], log.info)
+        self.assertEqual(20, log.counts['ERROR'])
+        self.assertEqual(20, len(log.errors))
+        self.assertEqual(20, len(log.ingested))
+
+
+if __name__ == "__main__":
+    unittest.main()